@@ -0,0 +1,30 @@
+"""Add job_states table for incremental job cursors
+
+Revision ID: 4c2d8e1f6a7b
+Revises: 3a400dd0fc64
+Create Date: 2026-10-18 09:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "4c2d8e1f6a7b"
+down_revision = "3a400dd0fc64"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "job_states",
+        sa.Column("name", sa.String(length=100), primary_key=True, nullable=False),
+        sa.Column("cursor_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("metadata", sa.JSON(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_messages_fetched_at", "messages", ["fetched_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_messages_fetched_at", table_name="messages")
+    op.drop_table("job_states")
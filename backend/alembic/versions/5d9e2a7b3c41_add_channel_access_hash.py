@@ -0,0 +1,22 @@
+"""Add access_hash to channels for entity cache
+
+Revision ID: 5d9e2a7b3c41
+Revises: 4c2d8e1f6a7b
+Create Date: 2026-10-18 10:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "5d9e2a7b3c41"
+down_revision = "4c2d8e1f6a7b"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("channels", sa.Column("access_hash", sa.BigInteger(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("channels", "access_hash")
@@ -0,0 +1,33 @@
+"""Add last_message_id fetch cursor to channels
+
+Revision ID: 6e1f3b8c2d57
+Revises: 5d9e2a7b3c41
+Create Date: 2026-10-18 11:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "6e1f3b8c2d57"
+down_revision = "5d9e2a7b3c41"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("channels", sa.Column("last_message_id", sa.BigInteger(), nullable=True))
+    # Start existing channels from what is already stored
+    op.execute(
+        """
+        UPDATE channels
+        SET last_message_id = (
+            SELECT MAX(messages.telegram_message_id)
+            FROM messages
+            WHERE messages.channel_id = channels.id
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("channels", "last_message_id")
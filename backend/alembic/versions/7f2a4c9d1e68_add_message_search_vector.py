@@ -0,0 +1,64 @@
+"""Add full-text search vector and GIN index to messages
+
+Revision ID: 7f2a4c9d1e68
+Revises: 6e1f3b8c2d57
+Create Date: 2026-10-18 12:00:00
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "7f2a4c9d1e68"
+down_revision = "6e1f3b8c2d57"
+branch_labels = None
+depends_on = None
+
+# Frozen copy of app.services.search_index.TEXT_SEARCH_CONFIGS as of this
+# revision, so later edits to the app cannot change what this migration does
+TEXT_SEARCH_CONFIGS = {
+    "ar": "arabic",
+    "da": "danish",
+    "de": "german",
+    "en": "english",
+    "es": "spanish",
+    "fi": "finnish",
+    "fr": "french",
+    "hu": "hungarian",
+    "it": "italian",
+    "nl": "dutch",
+    "no": "norwegian",
+    "pt": "portuguese",
+    "ro": "romanian",
+    "ru": "russian",
+    "sv": "swedish",
+    "tr": "turkish",
+}
+
+
+def _config_case(language_column: str) -> str:
+    branches = " ".join(
+        f"WHEN '{code}' THEN '{config}'::regconfig"
+        for code, config in TEXT_SEARCH_CONFIGS.items()
+    )
+    return f"CASE {language_column} {branches} ELSE 'simple'::regconfig END"
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        # SQLite builds its FTS5 table in init_db
+        return
+    op.execute(
+        "ALTER TABLE messages ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('simple', coalesce(original_text, '')), 'A') || "
+        f"setweight(to_tsvector({_config_case('source_language')}, coalesce(original_text, '')), 'B') || "
+        "setweight(to_tsvector('simple', coalesce(translated_text, '')), 'B') || "
+        f"setweight(to_tsvector({_config_case('target_language')}, coalesce(translated_text, '')), 'C')"
+        ") STORED"
+    )
+    op.execute("CREATE INDEX ix_messages_search_vector ON messages USING GIN (search_vector)")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("DROP INDEX IF EXISTS ix_messages_search_vector")
+    op.execute("ALTER TABLE messages DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,115 @@
+"""Add duplicate_clusters table
+
+Revision ID: 8a3b5d7e9f10
+Revises: 7f2a4c9d1e68
+Create Date: 2026-10-18 15:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "8a3b5d7e9f10"
+down_revision = "7f2a4c9d1e68"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "duplicate_clusters",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column(
+            "first_channel_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("channels.id", ondelete="SET NULL"),
+            nullable=True,
+        ),
+        sa.Column("member_count", sa.Integer(), nullable=False),
+        sa.Column("channel_count", sa.Integer(), nullable=False),
+        sa.Column("first_seen_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_seen_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("spread_seconds", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_duplicate_clusters_first_seen_at", "duplicate_clusters", ["first_seen_at"])
+    op.create_index("ix_duplicate_clusters_last_seen_at", "duplicate_clusters", ["last_seen_at"])
+
+    # Groups assigned before union-find could chain (a repost grouped under
+    # another repost). Resolve every message to the root of its chain, then
+    # relabel each group with its earliest member, as the job now does.
+    op.execute(
+        """
+        WITH RECURSIVE chain (id, group_id, depth) AS (
+            SELECT id, duplicate_group_id, 0
+            FROM messages
+            WHERE duplicate_group_id IS NOT NULL
+            UNION ALL
+            SELECT chain.id, parent.duplicate_group_id, chain.depth + 1
+            FROM chain
+            JOIN messages AS parent ON parent.id = chain.group_id
+            WHERE parent.duplicate_group_id IS NOT NULL
+              AND parent.duplicate_group_id <> chain.group_id
+              AND chain.depth < 64
+        ),
+        roots AS (
+            SELECT DISTINCT ON (id) id, group_id AS root
+            FROM chain
+            ORDER BY id, depth DESC
+        ),
+        canonical AS (
+            SELECT DISTINCT ON (roots.root) roots.root, messages.id AS canonical_id
+            FROM roots
+            JOIN messages ON messages.id = roots.id
+            ORDER BY roots.root, messages.published_at ASC NULLS LAST, messages.id
+        )
+        UPDATE messages
+        SET duplicate_group_id = canonical.canonical_id,
+            is_duplicate = (messages.id <> canonical.canonical_id)
+        FROM roots
+        JOIN canonical ON canonical.root = roots.root
+        WHERE messages.id = roots.id
+          AND (
+              messages.duplicate_group_id IS DISTINCT FROM canonical.canonical_id
+              OR messages.is_duplicate IS DISTINCT FROM (messages.id <> canonical.canonical_id)
+          )
+        """
+    )
+
+    # Backfill from the normalized groups
+    op.execute(
+        """
+        INSERT INTO duplicate_clusters (
+            id, first_channel_id, member_count, channel_count,
+            first_seen_at, last_seen_at, spread_seconds, updated_at
+        )
+        SELECT
+            groups.duplicate_group_id,
+            canonical.channel_id,
+            groups.member_count,
+            groups.channel_count,
+            groups.first_seen_at,
+            groups.last_seen_at,
+            CAST(EXTRACT(EPOCH FROM groups.last_seen_at - groups.first_seen_at) AS INTEGER),
+            NOW()
+        FROM (
+            SELECT
+                duplicate_group_id,
+                COUNT(*) AS member_count,
+                COUNT(DISTINCT channel_id) AS channel_count,
+                MIN(published_at) AS first_seen_at,
+                MAX(published_at) AS last_seen_at
+            FROM messages
+            WHERE duplicate_group_id IS NOT NULL
+            GROUP BY duplicate_group_id
+            HAVING COUNT(*) > 1
+        ) AS groups
+        LEFT JOIN messages AS canonical ON canonical.id = groups.duplicate_group_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_duplicate_clusters_last_seen_at", table_name="duplicate_clusters")
+    op.drop_index("ix_duplicate_clusters_first_seen_at", table_name="duplicate_clusters")
+    op.drop_table("duplicate_clusters")
@@ -0,0 +1,36 @@
+"""Add alert_hits table
+
+Revision ID: a4d6f8b0c2e3
+Revises: 8a3b5d7e9f10
+Create Date: 2026-10-18 18:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "a4d6f8b0c2e3"
+down_revision = "8a3b5d7e9f10"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "alert_hits",
+        sa.Column(
+            "alert_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("alerts.id", ondelete="CASCADE"),
+            primary_key=True,
+            nullable=False,
+        ),
+        sa.Column("message_id", postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column("published_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_alert_hits_alert_published", "alert_hits", ["alert_id", "published_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_alert_hits_alert_published", table_name="alert_hits")
+    op.drop_table("alert_hits")
@@ -11,6 +11,7 @@ from app.models.collection_share import CollectionShare
 from app.models.user import User
 from app.schemas.alert import AlertCreate, AlertResponse, AlertUpdate, AlertTriggerResponse
 from app.auth.users import current_active_user
+from app.services.alert_matcher import alert_matcher
 
 router = APIRouter()
 
@@ -81,6 +82,7 @@ async def create_alert(
     )
     db.add(alert)
     await db.commit()
+    alert_matcher.invalidate()
     await db.refresh(alert)
     return alert
 
@@ -138,6 +140,7 @@ async def update_alert(
         setattr(alert, key, value)
 
     await db.commit()
+    alert_matcher.invalidate()
     await db.refresh(alert)
     return alert
 
@@ -156,6 +159,7 @@ async def delete_alert(
         raise HTTPException(status_code=403, detail="Not authorized")
     await db.delete(alert)
     await db.commit()
+    alert_matcher.invalidate()
     return {"message": "Alert deleted"}
 
 
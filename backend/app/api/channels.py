@@ -11,6 +11,8 @@ from app.schemas.channel import ChannelCreate, ChannelResponse
 from app.services.telegram_collector import TelegramCollector
 from app.auth.users import current_active_user
 from app.services.audit import record_audit_event
+from app.services.alert_matcher import alert_matcher
+from app.services.channel_events import channel_events, ChannelEvent, CHANNEL_ADDED, CHANNEL_REMOVED
 from typing import List
 
 router = APIRouter()
@@ -57,6 +59,7 @@ async def add_channel(
             # Create new channel
             new_channel = Channel(
                 telegram_id=channel_info['id'],
+                access_hash=channel_info.get('access_hash'),
                 username=username,
                 title=channel_info['title'],
                 description=channel_info.get('description', ''),
@@ -98,14 +101,23 @@ async def add_channel(
             )
             await db.commit()
             await db.refresh(new_channel)
-
-            return new_channel
         except HTTPException:
             raise
         except Exception as e:
             await db.rollback()
             raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
+    # Alerts on global collections follow the set of active channels
+    alert_matcher.invalidate()
+    await channel_events.publish(ChannelEvent(
+        action=CHANNEL_ADDED,
+        channel_id=new_channel.id,
+        telegram_id=new_channel.telegram_id,
+        title=new_channel.title,
+        language=new_channel.detected_language,
+    ))
+    return new_channel
+
 
 @router.get("", response_model=List[ChannelResponse])
 async def list_channels(
@@ -149,4 +161,11 @@ async def delete_channel(
     )
     await db.commit()
 
+    # Alerts on global collections follow the set of active channels
+    alert_matcher.invalidate()
+    await channel_events.publish(ChannelEvent(
+        action=CHANNEL_REMOVED,
+        channel_id=channel.id,
+        telegram_id=channel.telegram_id,
+    ))
     return {"message": "Channel deleted successfully"}
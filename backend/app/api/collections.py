@@ -20,7 +20,9 @@ from app.schemas.collection import CollectionCreate, CollectionResponse, Collect
 from app.schemas.collection_share import CollectionShareCreate, CollectionShareResponse
 from app.schemas.summary import SummaryResponse, SummaryListResponse
 from app.auth.users import current_active_user
+from app.services.alert_matcher import alert_matcher
 from app.services.audit import record_audit_event
+from app.services.duplicate_clusters import cluster_totals
 from app.services.summarizer import generate_daily_summary
 
 router = APIRouter()
@@ -241,15 +243,9 @@ async def compare_collections(
             .where(Message.channel_id.in_(channel_ids))
             .where(Message.published_at >= week_ago)
         )
-        duplicates_result = await db.execute(
-            select(func.count())
-            .select_from(Message)
-            .where(Message.channel_id.in_(channel_ids))
-            .where(Message.published_at >= week_ago)
-            .where(Message.is_duplicate == True)
-        )
         total = total_result.scalar() or 0
-        duplicates = duplicates_result.scalar() or 0
+        _, duplicates = await cluster_totals(db, channel_ids=channel_ids, since=week_ago)
+        duplicates = min(duplicates, total)
         results.append(
             {
                 "collection_id": str(collection.id),
@@ -335,6 +331,8 @@ async def update_collection(
         metadata={"channel_ids": [str(channel.id) for channel in collection.channels]},
     )
     await db.commit()
+    # Alerts on this collection now watch different channels
+    alert_matcher.invalidate()
     await db.refresh(collection)
     channel_ids = await _collection_channel_ids(db, collection)
     return _collection_response(collection, channel_ids)
@@ -405,13 +403,6 @@ async def get_collection_stats(
         .where(Message.channel_id.in_(channel_ids))
         .where(Message.published_at >= week_ago)
     )
-    duplicates_result = await db.execute(
-        select(func.count())
-        .select_from(Message)
-        .where(Message.channel_id.in_(channel_ids))
-        .where(Message.is_duplicate == True)
-    )
-
     top_channels_result = await db.execute(
         select(Channel.id, Channel.title, func.count(Message.id).label("count"))
         .join(Message, Message.channel_id == Channel.id)
@@ -444,7 +435,8 @@ async def get_collection_stats(
     )
     languages = {row.source_language: row.count for row in languages_result.all() if row.source_language}
 
-    duplicates = duplicates_result.scalar() or 0
+    _, duplicates = await cluster_totals(db, channel_ids=channel_ids)
+    duplicates = min(duplicates, total)
     duplicate_rate = round(duplicates / total, 3) if total else 0.0
 
     return CollectionStatsResponse(
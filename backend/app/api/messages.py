@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, Query, HTTPException, BackgroundTasks
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, desc, update, or_
+from sqlalchemy import select, desc, update
 from uuid import UUID
 
 from app.database import get_db, AsyncSessionLocal
@@ -11,9 +11,20 @@ from app.models.user import User
 from app.schemas.message import MessageResponse, MessageListResponse
 from app.services.translator import translator
 from app.services.vector_store import vector_store
+from app.services.message_writer import insert_messages
+from app.services.alert_matcher import alert_matcher
 from app.config import get_settings
 from app.services.telegram_collector import TelegramCollector
 from app.auth.users import current_active_user
+from app.services.search_index import apply_text_search
+from app.services.hybrid_search import build_vector_filter, hybrid_search
+from app.utils.pagination import (
+    apply_keyset,
+    count_rows,
+    decode_offset_cursor,
+    encode_cursor,
+    encode_offset_cursor,
+)
 from datetime import datetime, timezone
 from typing import Optional
 import json
@@ -45,12 +56,72 @@ def _apply_message_filters(
     return query
 
 
+async def _paginate(
+    db: AsyncSession,
+    query,
+    limit: int,
+    offset: int,
+    cursor: Optional[str],
+    include_total: bool,
+    rank=None,
+) -> MessageListResponse:
+    """Fetch one page newest-first, or by ``rank`` (highest first) when given.
+
+    With a cursor the page starts right after it (keyset pagination on the
+    date order; ranked pages carry their offset in the cursor instead).
+    ``offset`` is still honoured for older clients. ``total`` is exact when
+    it comes for free or ``include_total`` is set, and an estimate otherwise.
+    Messages without ``published_at`` are left out: they have no place in
+    the keyset order and ``MessageResponse`` requires a date.
+    """
+    query = query.where(Message.published_at.is_not(None))
+    try:
+        if rank is not None:
+            if cursor:
+                offset = decode_offset_cursor(cursor)
+            page_query = query.order_by(desc(rank), desc(Message.published_at), desc(Message.id))
+        else:
+            page_query = apply_keyset(query, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    keyset = rank is None and cursor
+    if not keyset and offset:
+        page_query = page_query.offset(offset)
+
+    # One extra row tells us whether there is a next page
+    result = await db.execute(page_query.limit(limit + 1))
+    messages = list(result.scalars().all())
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+
+    if not has_more and not keyset:
+        total, total_is_exact = offset + len(messages), True
+    else:
+        total, total_is_exact = await count_rows(db, query, exact=include_total)
+
+    next_cursor = None
+    if has_more:
+        next_cursor = encode_offset_cursor(offset + limit) if rank is not None else encode_cursor(messages[-1])
+
+    return MessageListResponse(
+        messages=messages,
+        total=total,
+        total_is_exact=total_is_exact,
+        page=offset // limit + 1,
+        page_size=limit,
+        next_cursor=next_cursor,
+        has_more=has_more,
+    )
+
+
 @router.get("", response_model=MessageListResponse)
 async def list_messages(
     channel_id: Optional[UUID] = None,
     channel_ids: Optional[list[UUID]] = Query(None),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     user: User = Depends(current_active_user),
@@ -58,6 +129,9 @@ async def list_messages(
 ):
     """Get paginated message feed with optional filters.
 
+    Pass the previous page's ``next_cursor`` as ``cursor`` to continue.
+    Set ``include_total`` for an exact total instead of an estimate.
+
     Requires authentication.
     """
     # Build query
@@ -65,22 +139,7 @@ async def list_messages(
 
     query = _apply_message_filters(query, channel_id, channel_ids, start_date, end_date)
 
-    # Get total count
-    count_query = select(func.count()).select_from(query.subquery())
-    total_result = await db.execute(count_query)
-    total = total_result.scalar() or 0
-
-    # Get paginated messages
-    query = query.order_by(desc(Message.published_at)).limit(limit).offset(offset)
-    result = await db.execute(query)
-    messages = result.scalars().all()
-
-    return MessageListResponse(
-        messages=messages,
-        total=total,
-        page=offset // limit + 1,
-        page_size=limit
-    )
+    return await _paginate(db, query, limit, offset, cursor, include_total)
 
 
 @router.get("/search", response_model=MessageListResponse)
@@ -91,31 +150,28 @@ async def search_messages(
     end_date: Optional[datetime] = None,
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    sort: str = Query("relevance", pattern="^(relevance|date)$"),
     user: User = Depends(current_active_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """Search messages via full-text match on original/translated text."""
-    query = select(Message).where(
-        or_(
-            Message.original_text.ilike(f"%{q}%"),
-            Message.translated_text.ilike(f"%{q}%"),
-        )
+    """Full-text search on original/translated text.
+
+    Supports ``"exact phrases"``, ``prefix*`` and ``-excluded`` words.
+    Results are ranked by relevance unless ``sort=date``.
+    """
+    query, rank = apply_text_search(
+        select(Message),
+        db.get_bind().dialect.name,
+        q,
+        language=settings.preferred_language,
     )
     query = _apply_message_filters(query, None, channel_ids, start_date, end_date)
 
-    count_query = select(func.count()).select_from(query.subquery())
-    total_result = await db.execute(count_query)
-    total = total_result.scalar() or 0
-
-    query = query.order_by(desc(Message.published_at)).limit(limit).offset(offset)
-    result = await db.execute(query)
-    messages = result.scalars().all()
-
-    return MessageListResponse(
-        messages=messages,
-        total=total,
-        page=offset // limit + 1,
-        page_size=limit,
+    return await _paginate(
+        db, query, limit, offset, cursor, include_total,
+        rank=rank if sort == "relevance" else None,
     )
 
 
@@ -130,22 +186,11 @@ async def search_messages_semantic(
     db: AsyncSession = Depends(get_db),
 ):
     """Search messages using semantic similarity."""
-    if not vector_store.is_ready:
+    if not await vector_store.ensure_ready():
         return MessageListResponse(messages=[], total=0, page=1, page_size=top_k)
 
-    raw_filter: dict = {}
-    if channel_ids:
-        raw_filter["channel_id"] = {"$in": [str(channel_id) for channel_id in channel_ids]}
-
-    if start_date or end_date:
-        ts_filter: dict = {}
-        if start_date:
-            ts_filter["$gte"] = int(start_date.timestamp())
-        if end_date:
-            ts_filter["$lte"] = int(end_date.timestamp())
-        raw_filter["published_at_ts"] = ts_filter
-
-    matches = vector_store.query_similar(text=q, top_k=top_k, filter=raw_filter or None)
+    raw_filter = build_vector_filter(channel_ids, start_date, end_date)
+    matches = await vector_store.query_similar(text=q, top_k=top_k, filter=raw_filter)
     if not matches:
         return MessageListResponse(messages=[], total=0, page=1, page_size=top_k)
 
@@ -170,6 +215,53 @@ async def search_messages_semantic(
     )
 
 
+@router.get("/search/hybrid", response_model=MessageListResponse)
+async def search_messages_hybrid(
+    q: str = Query(..., min_length=3),
+    channel_ids: Optional[list[UUID]] = Query(None),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    top_k: int = Query(20, ge=1, le=100),
+    user: User = Depends(current_active_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Search with full-text and semantic retrieval fused by reciprocal rank.
+
+    Falls back to full-text results alone when the vector store is unavailable.
+    """
+    fused, similarity = await hybrid_search(
+        db, q, channel_ids=channel_ids, start_date=start_date, end_date=end_date, limit=top_k
+    )
+    if not fused:
+        return MessageListResponse(messages=[], total=0, page=1, page_size=top_k)
+
+    message_ids = []
+    for message_id, _ in fused:
+        try:
+            message_ids.append(UUID(message_id))
+        except ValueError:
+            continue
+    result = await db.execute(
+        select(Message).where(Message.id.in_(message_ids), Message.published_at.is_not(None))
+    )
+    message_map = {str(message.id): message for message in result.scalars().all()}
+
+    ordered_messages = []
+    for message_id, _ in fused:
+        message = message_map.get(message_id)
+        if not message:
+            continue
+        message.similarity_score = similarity.get(message_id)
+        ordered_messages.append(message)
+
+    return MessageListResponse(
+        messages=ordered_messages,
+        total=len(ordered_messages),
+        page=1,
+        page_size=top_k,
+    )
+
+
 @router.post("/fetch-historical/{channel_id}")
 async def fetch_historical_messages(
     channel_id: UUID,
@@ -213,7 +305,7 @@ async def fetch_and_store_messages(channel_id: UUID, username: str, days: int):
             print(f"No messages found for channel {username}")
             return
 
-        # Step 2: Get existing message IDs (short DB session)
+        # Step 2: Get existing message IDs so they are not re-translated (short DB session)
         async with AsyncSessionLocal() as db:
             existing_result = await db.execute(
                 select(Message.telegram_message_id).where(
@@ -231,9 +323,9 @@ async def fetch_and_store_messages(channel_id: UUID, username: str, days: int):
             return
 
         # Step 3: Translate messages (NO DB session - this is slow)
+        translations = await translator.translate_many([m['text'] for m in new_messages])
         translated_messages = []
-        for msg_data in new_messages:
-            translated_text, source_lang = await translator.translate(msg_data['text'])
+        for msg_data, (translated_text, source_lang) in zip(new_messages, translations):
             translated_messages.append({
                 'telegram_message_id': msg_data['message_id'],
                 'original_text': msg_data['text'],
@@ -246,25 +338,19 @@ async def fetch_and_store_messages(channel_id: UUID, username: str, days: int):
                 'translated_at': datetime.now(timezone.utc),
             })
 
-        # Step 4: Save to DB (short DB session)
+        # Step 4: Bulk insert, skipping rows stored meanwhile (short DB session)
         async with AsyncSessionLocal() as db:
-            for msg in translated_messages:
-                message = Message(
-                    channel_id=channel_id,
-                    telegram_message_id=msg['telegram_message_id'],
-                    original_text=msg['original_text'],
-                    translated_text=msg['translated_text'],
-                    source_language=msg['source_language'],
-                    target_language=msg['target_language'],
-                    media_type=msg['media_type'],
-                    media_urls=msg['media_urls'],
-                    published_at=msg['published_at'],
-                    translated_at=msg['translated_at'],
-                )
-                db.add(message)
-
+            inserted_ids = await insert_messages(db, translated_messages, channel_id=channel_id)
             await db.commit()
-            print(f"Stored {len(translated_messages)} historical messages for channel {username}")
+            print(f"Stored {len(inserted_ids)} historical messages for channel {username}")
+
+        # Keyword alerts are only matched at ingest; messages older than an
+        # alert's window are ignored there
+        inserted = set(inserted_ids)
+        await alert_matcher.process(
+            [row for row in translated_messages if row["id"] in inserted],
+            channel_id=channel_id,
+        )
 
     except Exception as e:
         print(f"Error fetching historical messages: {e}")
@@ -300,13 +386,13 @@ async def translate_messages(
         return {"message": "No messages to translate"}
 
     # Step 2: Translate messages (NO DB session - this is slow)
+    translated = await translator.translate_many(
+        [msg['original_text'] for msg in messages_to_translate],
+        source_lang=None,  # Force re-detection
+        target_lang=target_language,
+    )
     translations = []
-    for msg in messages_to_translate:
-        translated_text, detected_lang = await translator.translate(
-            msg['original_text'],
-            source_lang=None,  # Force re-detection
-            target_lang=target_language
-        )
+    for msg, (translated_text, detected_lang) in zip(messages_to_translate, translated):
         translations.append({
             'id': msg['id'],
             'translated_text': translated_text,
@@ -497,8 +583,11 @@ async def get_similar_messages(
     user: User = Depends(current_active_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """Get similar messages based on semantic vectors."""
-    if not vector_store.is_ready:
+    """Get similar messages based on semantic vectors.
+
+    Uses the message's stored vector when it has one, so no embedding is computed.
+    """
+    if not await vector_store.ensure_ready():
         return MessageListResponse(messages=[], total=0, page=1, page_size=top_k)
 
     result = await db.execute(select(Message).where(Message.id == message_id))
@@ -506,12 +595,17 @@ async def get_similar_messages(
     if not message:
         raise HTTPException(status_code=404, detail="Message not found")
 
-    text = message.translated_text or message.original_text or ""
-    if not text:
-        return MessageListResponse(messages=[], total=0, page=1, page_size=top_k)
+    matches = None
+    if message.embedding_id:
+        matches = await vector_store.query_by_id(message.embedding_id, top_k=top_k)
+
+    if matches is None:
+        text = message.translated_text or message.original_text or ""
+        if not text:
+            return MessageListResponse(messages=[], total=0, page=1, page_size=top_k)
+        matches = await vector_store.query_similar(text=text, top_k=top_k + 1)
 
-    matches = vector_store.query_similar(text=text, top_k=top_k + 1)
-    matches = [match for match in matches if str(match.get("id")) != str(message_id)]
+    matches = [match for match in matches if str(match.get("id")) != str(message_id)][:top_k]
 
     ordered_ids = [match["id"] for match in matches]
     if not ordered_ids:
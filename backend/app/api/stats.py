@@ -1,7 +1,7 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, desc, or_
+from sqlalchemy import select, func, desc
 from datetime import datetime, timedelta
 import csv
 from io import StringIO
@@ -10,10 +10,15 @@ from uuid import UUID
 from app.database import get_db
 from app.models.message import Message
 from app.models.channel import Channel
+from app.models.duplicate_cluster import DuplicateCluster
 from app.models.summary import Summary
 from app.models.user import User
 from app.models.api_usage import ApiUsage
 from app.auth.users import current_active_user
+from app.services.translator import translator
+from app.services.duplicate_clusters import cluster_totals
+from app.services.realtime_collector import realtime_collector
+from app.services.vector_store import vector_store
 
 router = APIRouter()
 
@@ -31,10 +36,9 @@ async def get_overview_stats(
     messages_24h = await db.execute(
         select(func.count()).select_from(Message).where(Message.published_at >= day_ago)
     )
-    duplicates_24h = await db.execute(
-        select(func.count()).select_from(Message)
-        .where(Message.published_at >= day_ago)
-        .where(Message.is_duplicate == True)
+    _, reposts_24h = await cluster_totals(db, since=day_ago)
+    clusters_24h = await db.execute(
+        select(func.count()).select_from(DuplicateCluster).where(DuplicateCluster.last_seen_at >= day_ago)
     )
     summaries_total = await db.execute(select(func.count()).select_from(Summary))
 
@@ -42,7 +46,8 @@ async def get_overview_stats(
         "total_messages": total_messages.scalar() or 0,
         "active_channels": total_channels.scalar() or 0,
         "messages_last_24h": messages_24h.scalar() or 0,
-        "duplicates_last_24h": duplicates_24h.scalar() or 0,
+        "duplicates_last_24h": reposts_24h,
+        "duplicate_clusters_last_24h": clusters_24h.scalar() or 0,
         "summaries_total": summaries_total.scalar() or 0,
     }
 
@@ -129,41 +134,91 @@ async def get_trust_stats(
     )
     total_messages = total_result.scalar() or 0
 
-    primary_result = await db.execute(
-        select(func.count())
-        .select_from(Message)
-        .where(*filters)
-        .where(Message.is_duplicate == False)
-        .where(or_(Message.originality_score.is_(None), Message.originality_score >= 90))
-    )
-    propaganda_result = await db.execute(
-        select(func.count())
-        .select_from(Message)
-        .where(*filters)
-        .where(Message.is_duplicate == True)
-        .where(Message.originality_score <= 20)
-    )
     verified_result = await db.execute(
         select(func.count(func.distinct(Message.channel_id)))
         .select_from(Message)
         .where(*filters)
     )
-
-    primary_count = primary_result.scalar() or 0
-    propaganda_count = propaganda_result.scalar() or 0
     verified_channels = verified_result.scalar() or 0
 
-    primary_rate = round((primary_count / total_messages) * 100, 1) if total_messages else 0.0
-    propaganda_rate = round((propaganda_count / total_messages) * 100, 1) if total_messages else 0.0
+    # Reposts come from the cluster aggregates instead of recounting flags
+    clusters, reposts = await cluster_totals(db, channel_ids=channel_ids or None, since=day_ago)
+    reposts = min(reposts, total_messages)
+
+    primary_rate = round(((total_messages - reposts) / total_messages) * 100, 1) if total_messages else 0.0
+    propaganda_rate = round((reposts / total_messages) * 100, 1) if total_messages else 0.0
 
     return {
         "primary_sources_rate": primary_rate,
         "propaganda_rate": propaganda_rate,
         "verified_channels": verified_channels,
         "total_messages_24h": total_messages,
+        "duplicate_clusters_24h": clusters,
     }
 
 
+def _serialize_cluster(cluster: DuplicateCluster, canonical: Message | None, channel_title: str | None) -> dict:
+    text = (canonical.translated_text or canonical.original_text or "") if canonical else ""
+    return {
+        "cluster_id": str(cluster.id),
+        "canonical_message_id": str(cluster.id),
+        "canonical_text": text[:280],
+        "first_channel_id": str(cluster.first_channel_id) if cluster.first_channel_id else None,
+        "first_channel_title": channel_title,
+        "member_count": cluster.member_count,
+        "channel_count": cluster.channel_count,
+        "first_seen_at": cluster.first_seen_at,
+        "last_seen_at": cluster.last_seen_at,
+        "spread_seconds": cluster.spread_seconds,
+    }
+
+
+def _cluster_query():
+    return (
+        select(DuplicateCluster, Message, Channel.title)
+        .outerjoin(Message, Message.id == DuplicateCluster.id)
+        .outerjoin(Channel, Channel.id == DuplicateCluster.first_channel_id)
+    )
+
+
+@router.get("/clusters")
+async def get_duplicate_clusters(
+    hours: int = Query(24, ge=1, le=24 * 30),
+    limit: int = Query(20, ge=1, le=100),
+    sort: str = Query("members", pattern="^(members|channels|recent)$"),
+    user: User = Depends(current_active_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Most repeated stories of the window, read from the cluster table."""
+    since = datetime.utcnow() - timedelta(hours=hours)
+    order = {
+        "members": desc(DuplicateCluster.member_count),
+        "channels": desc(DuplicateCluster.channel_count),
+        "recent": desc(DuplicateCluster.last_seen_at),
+    }[sort]
+    result = await db.execute(
+        _cluster_query()
+        .where(DuplicateCluster.last_seen_at >= since)
+        .order_by(order, desc(DuplicateCluster.last_seen_at))
+        .limit(limit)
+    )
+    return [_serialize_cluster(cluster, canonical, title) for cluster, canonical, title in result.all()]
+
+
+@router.get("/clusters/{cluster_id}")
+async def get_duplicate_cluster(
+    cluster_id: UUID,
+    user: User = Depends(current_active_user),
+    db: AsyncSession = Depends(get_db),
+):
+    result = await db.execute(_cluster_query().where(DuplicateCluster.id == cluster_id))
+    row = result.first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Cluster not found")
+    cluster, canonical, title = row
+    return _serialize_cluster(cluster, canonical, title)
+
+
 @router.get("/api-usage")
 async def get_api_usage_stats(
     days: int = Query(7, ge=1, le=365),
@@ -211,3 +266,21 @@ async def get_api_usage_stats(
         "estimated_cost_usd": float(total_cost or 0),
         "breakdown": breakdown,
     }
+
+
+@router.get("/cache")
+async def get_cache_stats(
+    user: User = Depends(current_active_user),
+):
+    return {
+        "translation": translator.cache.stats(),
+        "language_detection": dict(translator.detection_stats),
+        "query_embeddings": vector_store.query_cache.stats(),
+    }
+
+
+@router.get("/realtime")
+async def get_realtime_stats(
+    user: User = Depends(current_active_user),
+):
+    return realtime_collector.queue_metrics()
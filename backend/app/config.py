@@ -22,6 +22,12 @@ class Settings(BaseSettings):
     openai_api_key: str = ""
     openai_model: str = "gpt-4o-mini"
 
+    # Batched translation (translate_many)
+    translation_concurrency: int = 4  # max concurrent chat-completion calls per batch
+    translation_batch_size: int = 10  # max short messages packed into one call
+    translation_batch_max_chars: int = 4000  # max total characters per packed call
+    translation_batch_item_max_chars: int = 1000  # longer messages are translated alone
+
     # Application
     preferred_language: str = "en"
     summary_time: str = "08:00"
@@ -64,6 +70,20 @@ class Settings(BaseSettings):
     telegram_max_delay: float = 300.0  # 5 minutes max
     telegram_jitter: bool = True
     telegram_concurrent_channels: int = 3  # max parallel channel fetches
+    telegram_bootstrap_messages: int = 20  # messages fetched for a channel with no cursor yet
+    telegram_catchup_max_messages: int = 500  # per-run cap when catching up from a cursor
+
+    # Collection pipeline (fetch -> translate -> write)
+    collector_translate_workers: int = 4
+    collector_write_workers: int = 1
+    collector_queue_size: int = 50  # max channel batches buffered between stages
+
+    # Real-time collector micro-batching
+    realtime_enabled: bool = True  # listen for new messages alongside the polling job
+    realtime_queue_size: int = 1000  # events buffered before the handler blocks
+    realtime_batch_size: int = 50
+    realtime_batch_window_seconds: float = 1.0
+    realtime_workers: int = 2
 
     # Qdrant Vector Store
     qdrant_url: str = ""
@@ -71,18 +91,52 @@ class Settings(BaseSettings):
     qdrant_collection_name: str = "telescope-embeddings"
     qdrant_distance: str = "cosine"
     qdrant_timeout_seconds: float = 5.0
+    qdrant_upsert_batch_size: int = 256
+    qdrant_search_batch_size: int = 64
+    # On-disk NumPy index used when Qdrant is not configured or unreachable
+    local_vector_index_enabled: bool = True
+    local_vector_index_path: str = "./data/vector_index"
 
     # Redis Cache
     redis_url: str = ""
     redis_cache_ttl_seconds: int = 86400
 
+    # In-process translation cache (first tier in front of Redis)
+    translation_cache_max_entries: int = 10000
+    translation_cache_ttl_seconds: int = 3600
+
     # Embeddings
+    # Prefix with "onnx:" or "onnx-int8:" to run on ONNX Runtime instead of PyTorch
     embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+    embedding_onnx_file: str = ""  # override the ONNX file within the model repo
     embedding_dimension: int = 384
+    embedding_batch_size: int = 64
+    embedding_workers: int = 1  # inference threads; the model is shared between them
+    embedding_queue_size: int = 8  # encode jobs queued before callers wait
+    embedding_service_url: str = ""  # e.g. http://127.0.0.1:8100 or unix:///tmp/telescope-embed.sock
+    embedding_service_timeout_seconds: float = 30.0
+    embedding_batch_max_wait_ms: float = 10.0  # embedding worker: wait this long to fill a batch
+    query_embedding_cache_size: int = 1000  # search query texts whose vectors are kept
+    query_embedding_cache_ttl_seconds: int = 3600
+
+    # Hybrid (full-text + semantic) search
+    hybrid_search_candidates: int = 50  # results taken from each retriever before fusion
+    hybrid_search_rrf_k: int = 60  # reciprocal rank fusion damping constant
 
     # Deduplication
     dedup_similarity_threshold: float = 0.85
     dedup_top_k: int = 5
+    # Exact/near-exact fingerprint stage that runs before embeddings
+    dedup_prefilter_enabled: bool = True
+    dedup_minhash_permutations: int = 64
+    dedup_minhash_bands: int = 16
+    dedup_minhash_threshold: float = 0.8  # estimated Jaccard over word 3-grams
+    # Re-scanned behind the incremental cursor: fetched_at is set at insert
+    # time, so concurrent writers can commit rows older than the cursor
+    dedup_cursor_overlap_seconds: int = 300
+
+    # Alerts
+    alert_streaming_enabled: bool = True  # match keyword alerts as messages are inserted
 
     # Audit Logs
     audit_log_retention_days: int = 365
@@ -83,6 +83,10 @@ async def init_db():
     Note: In production with PostgreSQL, prefer using Alembic migrations.
     This function is kept for development and initial setup.
     """
+    # Imported here because it depends on the models, which import Base
+    from app.services.search_index import ensure_search_index
+
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await ensure_search_index(conn)
     logger.info("Database tables initialized")
@@ -1,95 +1,101 @@
-from datetime import datetime, timedelta
-from sqlalchemy import select, func, or_
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, select, insert, update
 from app.database import AsyncSessionLocal
-from app.models.alert import Alert, AlertTrigger
-from app.models.collection import Collection
-from app.models.channel import Channel
+from app.models.alert import Alert, AlertHit, AlertTrigger
 from app.models.message import Message
-from app.models.collection import collection_channels
-
-
-def _should_run(alert: Alert) -> bool:
-    if not alert.last_triggered_at:
-        return True
-    now = datetime.utcnow()
-    if alert.frequency == "hourly":
-        return alert.last_triggered_at <= now - timedelta(hours=1)
-    if alert.frequency == "daily":
-        return alert.last_triggered_at <= now - timedelta(days=1)
-    return alert.last_triggered_at <= now - timedelta(minutes=15)
+from app.services.alert_matcher import (
+    TRIGGER_MESSAGE_LIMIT,
+    CompiledAlerts,
+    alert_matcher,
+    alert_window_minutes,
+    is_due,
+    load_alert_rules,
+)
 
 
 async def evaluate_alerts_job():
+    """
+    Evaluate every due alert in one pass.
+
+    Alerts and their channels are loaded with at most three queries.
+    Messages of the widest window needed are then streamed once and matched
+    against all alerts together (one keyword automaton, per-alert windows),
+    and the resulting triggers are written with a single bulk insert.
+    """
     print(f"[{datetime.utcnow()}] Starting alert evaluation job...")
 
     async with AsyncSessionLocal() as session:
-        result = await session.execute(select(Alert).where(Alert.is_active == True))
-        alerts = result.scalars().all()
-
-        for alert in alerts:
-            if not _should_run(alert):
-                continue
-
-            collection_result = await session.execute(
-                select(Collection).where(Collection.id == alert.collection_id)
+        if alert_matcher.enabled:
+            # Pick up alert and collection changes made by other processes
+            await alert_matcher.reload(session)
+
+        # Ingest-time hits are only needed for the longest alert window
+        hits_cutoff = datetime.now(timezone.utc) - timedelta(minutes=alert_window_minutes("daily"))
+        await session.execute(delete(AlertHit).where(AlertHit.published_at < hits_cutoff))
+
+        # Keyword alerts are matched as messages are inserted
+        rules = [
+            rule
+            for rule in await load_alert_rules(session, include_entities=True)
+            if not alert_matcher.handles(rule) and is_due(rule) and rule.channel_ids
+        ]
+
+        if not rules:
+            await session.commit()
+            print(f"[{datetime.utcnow()}] Alert evaluation job completed (no alerts due)")
+            return
+
+        now = datetime.utcnow()
+        window_starts = {rule.id: now - rule.window for rule in rules}
+        channel_ids = set().union(*(rule.channel_ids for rule in rules))
+        compiled = CompiledAlerts(rules)
+        hits: dict = {rule.id: [] for rule in rules}
+
+        messages = await session.stream(
+            select(
+                Message.id,
+                Message.channel_id,
+                Message.original_text,
+                Message.translated_text,
+                Message.entities,
+                Message.published_at,
             )
-            collection = collection_result.scalar_one_or_none()
-            if not collection:
-                continue
-
-            if collection.is_global:
-                channel_result = await session.execute(select(Channel.id).where(Channel.is_active == True))
-                channel_ids = [row.id for row in channel_result.all()]
-            else:
-                channel_result = await session.execute(
-                    select(collection_channels.c.channel_id)
-                    .where(collection_channels.c.collection_id == collection.id)
-                )
-                channel_ids = [row.channel_id for row in channel_result.all()]
-
-            if not channel_ids:
-                continue
-
-            window_minutes = 15 if alert.frequency == "realtime" else 60 if alert.frequency == "hourly" else 24 * 60
-            window_start = datetime.utcnow() - timedelta(minutes=window_minutes)
-
-            query = select(Message).where(Message.channel_id.in_(channel_ids)).where(Message.published_at >= window_start)
-
-            keyword_filters = []
-            for keyword in alert.keywords or []:
-                like_pattern = f"%{keyword}%"
-                keyword_filters.append(Message.translated_text.ilike(like_pattern))
-                keyword_filters.append(Message.original_text.ilike(like_pattern))
-            if keyword_filters:
-                query = query.where(or_(*keyword_filters))
-
-            if alert.entities:
-                entity_filters = []
-                for entity in alert.entities:
-                    entity_filters.append(Message.entities.contains({"persons": [entity]}))
-                    entity_filters.append(Message.entities.contains({"locations": [entity]}))
-                    entity_filters.append(Message.entities.contains({"organizations": [entity]}))
-                query = query.where(or_(*entity_filters))
-
-            count_result = await session.execute(select(func.count()).select_from(query.subquery()))
-            count = count_result.scalar() or 0
-
-            if count < (alert.min_threshold or 1):
+            .where(Message.channel_id.in_(channel_ids))
+            .where(Message.published_at >= min(window_starts.values()))
+        )
+        async for row in messages:
+            message = row._asdict()
+            published_at = message["published_at"]
+            if published_at.tzinfo is not None:
+                published_at = published_at.astimezone(timezone.utc).replace(tzinfo=None)
+            for alert_id in compiled.match(message):
+                if published_at >= window_starts[alert_id]:
+                    hits[alert_id].append((published_at, message["id"]))
+
+        triggers = []
+        for rule in rules:
+            matches = hits[rule.id]
+            if len(matches) < rule.min_threshold:
                 continue
-
-            messages_result = await session.execute(query.order_by(Message.published_at.desc()).limit(20))
-            messages = messages_result.scalars().all()
-            message_ids = [str(message.id) for message in messages]
-
-            summary = f"{count} matching messages in the last {window_minutes} minutes."
-            trigger = AlertTrigger(
-                alert_id=alert.id,
-                message_ids=message_ids,
-                summary=summary,
+            matches.sort(reverse=True)
+            triggers.append(
+                {
+                    "alert_id": rule.id,
+                    "message_ids": [str(message_id) for _, message_id in matches[:TRIGGER_MESSAGE_LIMIT]],
+                    "summary": (
+                        f"{len(matches)} matching messages in the last "
+                        f"{alert_window_minutes(rule.frequency)} minutes."
+                    ),
+                }
             )
-            session.add(trigger)
-            alert.last_triggered_at = datetime.utcnow()
 
+        if triggers:
+            await session.execute(insert(AlertTrigger), triggers)
+            await session.execute(
+                update(Alert)
+                .where(Alert.id.in_([trigger["alert_id"] for trigger in triggers]))
+                .values(last_triggered_at=now)
+            )
         await session.commit()
 
-    print(f"[{datetime.utcnow()}] Alert evaluation job completed")
+    print(f"[{datetime.utcnow()}] Alert evaluation job completed ({len(triggers)} triggered)")
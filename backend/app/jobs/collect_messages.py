@@ -1,79 +1,232 @@
-from sqlalchemy import select
+from sqlalchemy import or_, select
 from sqlalchemy.orm import selectinload
+from collections import Counter
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
 from app.models.channel import Channel
 from app.models.message import Message
 from app.services.telegram_collector import TelegramCollector
 from app.services.translator import translator
 from app.services.deduplicator import deduplicator
+from app.services.duplicate_clusters import merge_clusters, refresh_clusters
+from app.services.vector_store import vector_store
+from app.services.job_state import get_job_cursor, set_job_cursor
+from app.services.message_writer import insert_messages
+from app.services.alert_matcher import alert_matcher
 from app.database import AsyncSessionLocal
 from app.config import get_settings
+from app.utils.retry import with_rate_limit
+from typing import Optional
+import asyncio
 import json
+import time
+import uuid
 
 
 settings = get_settings()
 
+DEDUP_JOB_NAME = "deduplication"
 
-async def collect_messages_job():
+
+async def run_incremental_deduplication() -> int:
     """
-    Background job to collect messages from all followed channels.
+    Deduplicate only messages fetched since the last run.
 
-    IMPORTANT: This job releases the database lock during slow I/O operations
-    (Telegram API calls, translation) to prevent blocking other database operations.
+    New messages are matched against the existing vector index, so the cost
+    is proportional to the number of new messages rather than the size of
+    the 24h window. The high-water mark is the latest ``fetched_at`` seen,
+    persisted in ``job_states`` and only advanced once the batch is committed.
+    ``fetched_at`` is set at insert rather than commit time, so a short
+    overlap behind the mark is re-scanned and messages an earlier run
+    already handled are skipped. While Qdrant is configured but down,
+    messages are only fingerprinted and the mark holds, so the ones left
+    without a group are embedded once it is back.
+
+    Returns:
+        Number of messages processed
     """
-    print(f"[{datetime.utcnow()}] Starting message collection job...")
+    qdrant_down = await vector_store.uses_fallback()
+    use_embeddings = not qdrant_down and await vector_store.ensure_ready()
+    if not use_embeddings and deduplicator.prefilter is None:
+        return 0
+
+    cutoff_time = datetime.now(timezone.utc) - timedelta(hours=24)
+    overlap = timedelta(seconds=settings.dedup_cursor_overlap_seconds)
 
-    # Step 1: Get all channels (short DB session)
     async with AsyncSessionLocal() as db:
-        result = await db.execute(select(Channel))
-        channels = result.scalars().all()
-        # Extract channel data before closing session
-        channel_data = [(c.id, c.username) for c in channels]
+        high_water_mark = await get_job_cursor(db, DEDUP_JOB_NAME)
+        # Grouped or embedded messages were handled by an earlier run
+        query = select(Message).where(
+            Message.published_at >= cutoff_time,
+            Message.duplicate_group_id.is_(None),
+            Message.embedding_id.is_(None),
+        )
+        if high_water_mark:
+            query = query.where(Message.fetched_at > high_water_mark - overlap)
+        result = await db.execute(query.order_by(Message.fetched_at))
+        candidates = list(result.scalars().all())
 
-    if not channel_data:
-        print("No channels to collect from")
-        return
+        if not candidates:
+            return 0
 
-    collector = TelegramCollector()
-    total_new_messages = 0
+        if not deduplicator.prefilter_warmed:
+            # Fingerprints are kept in memory: re-index the window after a restart.
+            # Unhandled messages in the overlap are left out so they get processed.
+            window = []
+            if high_water_mark and deduplicator.prefilter is not None:
+                window_result = await db.execute(
+                    select(
+                        Message.id,
+                        Message.original_text,
+                        Message.translated_text,
+                        Message.published_at,
+                        Message.fetched_at,
+                    ).where(
+                        Message.published_at >= cutoff_time,
+                        or_(
+                            Message.fetched_at <= high_water_mark - overlap,
+                            Message.duplicate_group_id.is_not(None),
+                            Message.embedding_id.is_not(None),
+                        ),
+                    )
+                )
+                window = window_result.all()
+            deduplicator.warm_prefilter(window)
+
+        new_messages = [msg for msg in candidates if not deduplicator.is_deduplicated(msg)]
+        if not new_messages:
+            return 0
 
-    for channel_id, channel_username in channel_data:
-        print(f"Collecting messages from {channel_username}...")
+        print(f"Running incremental deduplication for {len(new_messages)} new messages...")
+        best_matches = await deduplicator.find_best_matches(
+            new_messages, cutoff_time=cutoff_time, use_embeddings=use_embeddings
+        )
+        if deduplicator.prefilter is not None:
+            print(f"Fingerprint pre-filter: {deduplicator.prefilter.stats}")
 
+        # Load stored messages the new ones matched, and the canonical
+        # messages of their groups, so groups are reused and merged correctly
+        known_messages, first_seen = await deduplicator.load_match_context(db, new_messages, best_matches)
+        merges = deduplicator.union_matches(
+            new_messages, best_matches, known_messages=known_messages, first_seen=first_seen
+        )
+        await merge_clusters(db, merges)
+        await refresh_clusters(
+            db,
+            [msg.duplicate_group_id for msg in new_messages if msg.duplicate_group_id],
+        )
+
+        fetched_times = [msg.fetched_at for msg in new_messages if msg.fetched_at]
+        if fetched_times and not qdrant_down:
+            # Late rows from the overlap must not move the mark backwards
+            if high_water_mark:
+                fetched_times.append(high_water_mark)
+            await set_job_cursor(
+                db,
+                DEDUP_JOB_NAME,
+                max(fetched_times),
+                metadata={"last_batch_size": len(new_messages)},
+            )
+        await db.commit()
+
+    print(f"Deduplication completed for {len(new_messages)} messages")
+    return len(new_messages)
+
+
+@dataclass
+class StageStats:
+    """Throughput counters for one stage of the collection pipeline."""
+
+    name: str
+    items: int = 0
+    messages: int = 0
+    errors: int = 0
+    busy_seconds: float = 0.0
+
+    def record(self, started: float, messages: int = 0) -> None:
+        self.items += 1
+        self.messages += messages
+        self.busy_seconds += time.perf_counter() - started
+
+    def summary(self, elapsed: float) -> str:
+        rate = self.messages / elapsed if elapsed > 0 else 0.0
+        return (
+            f"{self.name}: {self.items} channels, {self.messages} messages, "
+            f"{self.errors} errors, {rate:.1f} msg/s, busy {self.busy_seconds:.1f}s"
+        )
+
+
+@dataclass
+class ChannelBatch:
+    """One channel's messages as they move through the pipeline stages."""
+
+    channel_id: uuid.UUID
+    username: str
+    last_message_id: Optional[int] = None
+    language: Optional[str] = None
+    messages: list = field(default_factory=list)
+
+
+async def _touch_channel(db, batch: ChannelBatch) -> None:
+    result = await db.execute(select(Channel).where(Channel.id == batch.channel_id))
+    channel = result.scalar_one_or_none()
+    if channel:
+        channel.last_fetched_at = datetime.utcnow()
+        if batch.last_message_id and (channel.last_message_id or 0) < batch.last_message_id:
+            channel.last_message_id = batch.last_message_id
+        if batch.language and not channel.detected_language:
+            channel.detected_language = batch.language
+
+
+def _majority_language(translations: list[tuple[str, str]]) -> Optional[str]:
+    languages = Counter(lang for _, lang in translations if lang and lang != "unknown")
+    if not languages:
+        return None
+    return languages.most_common(1)[0][0]
+
+
+async def _fetch_stage(collector, channel_queue, translate_queue, write_queue, stats: StageStats):
+    """Fetch messages newer than each channel's cursor."""
+    while True:
+        batch = await channel_queue.get()
+        if batch is None:
+            return
+        started = time.perf_counter()
         try:
-            # Step 2: Fetch messages from Telegram (NO DB session held)
-            messages = await collector.get_recent_messages(channel_username, limit=20)
+            # Fetch messages from Telegram (NO DB session held)
+            batch.messages, batch.last_message_id = await with_rate_limit(
+                collector.get_messages_after(batch.username, min_id=batch.last_message_id)
+            )
 
-            if not messages:
-                continue
+            stats.record(started, len(batch.messages))
+            if batch.messages:
+                await translate_queue.put(batch)
+            else:
+                # Skip translation but still update last_fetched_at and the cursor
+                await write_queue.put(batch)
+        except Exception as e:
+            stats.errors += 1
+            print(f"Error collecting from {batch.username}: {e}")
 
-            # Step 3: Get existing message IDs (short DB session)
-            async with AsyncSessionLocal() as db:
-                existing_result = await db.execute(
-                    select(Message.telegram_message_id).where(
-                        Message.channel_id == channel_id,
-                        Message.telegram_message_id.in_([m['message_id'] for m in messages])
-                    )
-                )
-                existing_ids = set(existing_result.scalars().all())
-
-            # Filter to only new messages
-            new_msg_data = [m for m in messages if m['message_id'] not in existing_ids]
-
-            if not new_msg_data:
-                # Update last_fetched_at even if no new messages
-                async with AsyncSessionLocal() as db:
-                    result = await db.execute(select(Channel).where(Channel.id == channel_id))
-                    channel = result.scalar_one_or_none()
-                    if channel:
-                        channel.last_fetched_at = datetime.utcnow()
-                        await db.commit()
-                continue
-
-            # Step 4: Translate messages (NO DB session held - this is slow)
+
+async def _translate_stage(translate_queue, write_queue, stats: StageStats):
+    """Translate fetched messages (NO DB session held - this is slow).
+
+    The channel's known language is passed as a prior so messages already
+    in the target language are skipped before any LLM call.
+    """
+    while True:
+        batch = await translate_queue.get()
+        if batch is None:
+            return
+        started = time.perf_counter()
+        try:
+            translations = await translator.translate_many(
+                [m['text'] for m in batch.messages],
+                language_prior=batch.language,
+            )
             translated_messages = []
-            for msg_data in new_msg_data:
-                translated_text, source_lang = await translator.translate(msg_data['text'])
+            for msg_data, (translated_text, source_lang) in zip(batch.messages, translations):
                 translated_messages.append({
                     'telegram_message_id': msg_data['message_id'],
                     'original_text': msg_data['text'],
@@ -85,56 +238,130 @@ async def collect_messages_job():
                     'published_at': msg_data['date'],
                     'translated_at': datetime.now(timezone.utc),
                 })
+            batch.messages = translated_messages
+            batch.language = batch.language or _majority_language(translations)
+            stats.record(started, len(translated_messages))
+            await write_queue.put(batch)
+        except Exception as e:
+            stats.errors += 1
+            print(f"Error translating messages from {batch.username}: {e}")
 
-            # Step 5: Save translated messages to DB (short DB session)
-            async with AsyncSessionLocal() as db:
-                for msg in translated_messages:
-                    message = Message(
-                        channel_id=channel_id,
-                        telegram_message_id=msg['telegram_message_id'],
-                        original_text=msg['original_text'],
-                        translated_text=msg['translated_text'],
-                        source_language=msg['source_language'],
-                        target_language=msg['target_language'],
-                        media_type=msg['media_type'],
-                        media_urls=msg['media_urls'],
-                        published_at=msg['published_at'],
-                        translated_at=msg['translated_at'],
-                    )
-                    db.add(message)
 
-                # Also update channel's last_fetched_at
-                result = await db.execute(select(Channel).where(Channel.id == channel_id))
-                channel = result.scalar_one_or_none()
-                if channel:
-                    channel.last_fetched_at = datetime.utcnow()
+async def _write_stage(write_queue, stats: StageStats):
+    """Bulk-insert translated messages and advance the channel cursor (short DB session).
 
+    The cursor moves in the same transaction as the inserts, so a failed
+    write is simply re-fetched on the next run. Rows already stored (e.g. by
+    the realtime collector) are skipped by the insert itself.
+    """
+    while True:
+        batch = await write_queue.get()
+        if batch is None:
+            return
+        started = time.perf_counter()
+        try:
+            async with AsyncSessionLocal() as db:
+                inserted_ids = await insert_messages(db, batch.messages, channel_id=batch.channel_id)
+                await _touch_channel(db, batch)
                 await db.commit()
-                print(f"Added {len(translated_messages)} new messages from {channel_username}")
-                total_new_messages += len(translated_messages)
-
+            stats.record(started, len(inserted_ids))
+            if inserted_ids:
+                print(f"Added {len(inserted_ids)} new messages from {batch.username}")
+                inserted = set(inserted_ids)
+                await alert_matcher.process(
+                    [row for row in batch.messages if row["id"] in inserted],
+                    channel_id=batch.channel_id,
+                )
         except Exception as e:
-            print(f"Error collecting from {channel_username}: {e}")
-            continue
+            stats.errors += 1
+            print(f"Error saving messages from {batch.username}: {e}")
+
 
-    await collector.disconnect()
+async def collect_messages_job():
+    """
+    Background job to collect messages from all followed channels.
 
-    # Step 6: Run cross-channel deduplication (separate short DB sessions)
-    if total_new_messages > 0:
-        print("Running cross-channel deduplication...")
-        cutoff_time = datetime.now(timezone.utc) - timedelta(hours=24)
+    Channels flow through a bounded producer/consumer pipeline with three
+    stages - Telegram fetch, translation, DB write - each with its own worker
+    pool and queue, so a slow translation never stalls fetching the next
+    channel. Telegram fetches are capped by the global channel semaphore and
+    start from each channel's ``last_message_id`` cursor, so every message
+    is fetched once and no existence check against the DB is needed.
 
-        async with AsyncSessionLocal() as db:
-            all_recent = await db.execute(
-                select(Message)
-                .where(Message.published_at >= cutoff_time)
-                .order_by(Message.published_at.desc())
+    IMPORTANT: This job releases the database lock during slow I/O operations
+    (Telegram API calls, translation) to prevent blocking other database operations.
+    """
+    print(f"[{datetime.utcnow()}] Starting message collection job...")
+
+    # Get all channels (short DB session)
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(Channel))
+        channels = result.scalars().all()
+        # Extract channel data before closing session
+        channel_data = [
+            ChannelBatch(
+                channel_id=c.id,
+                username=c.username,
+                last_message_id=c.last_message_id,
+                language=c.detected_language,
             )
-            recent_messages = list(all_recent.scalars().all())
+            for c in channels
+        ]
 
-            if recent_messages:
-                deduplicator.mark_duplicates(recent_messages, cutoff_time=cutoff_time)
-                await db.commit()
-                print(f"Deduplication completed for {len(recent_messages)} messages")
+    if not channel_data:
+        print("No channels to collect from")
+        return
+
+    collector = TelegramCollector()
+    fetch_workers = max(1, settings.telegram_concurrent_channels)
+    translate_workers = max(1, settings.collector_translate_workers)
+    write_workers = max(1, settings.collector_write_workers)
+
+    channel_queue: asyncio.Queue = asyncio.Queue()
+    translate_queue: asyncio.Queue = asyncio.Queue(maxsize=settings.collector_queue_size)
+    write_queue: asyncio.Queue = asyncio.Queue(maxsize=settings.collector_queue_size)
+    for item in channel_data:
+        channel_queue.put_nowait(item)
+    for _ in range(fetch_workers):
+        channel_queue.put_nowait(None)
+
+    fetch_stats = StageStats("fetch")
+    translate_stats = StageStats("translate")
+    write_stats = StageStats("write")
+    started = time.perf_counter()
+
+    fetchers = [
+        asyncio.create_task(_fetch_stage(collector, channel_queue, translate_queue, write_queue, fetch_stats))
+        for _ in range(fetch_workers)
+    ]
+    translators = [
+        asyncio.create_task(_translate_stage(translate_queue, write_queue, translate_stats))
+        for _ in range(translate_workers)
+    ]
+    writers = [
+        asyncio.create_task(_write_stage(write_queue, write_stats))
+        for _ in range(write_workers)
+    ]
+
+    try:
+        await asyncio.gather(*fetchers)
+        for _ in range(translate_workers):
+            await translate_queue.put(None)
+        await asyncio.gather(*translators)
+        for _ in range(write_workers):
+            await write_queue.put(None)
+        await asyncio.gather(*writers)
+    finally:
+        for task in (*fetchers, *translators, *writers):
+            task.cancel()
+        await collector.disconnect()
+
+    elapsed = time.perf_counter() - started
+    for stats in (fetch_stats, translate_stats, write_stats):
+        print(f"Collection pipeline {stats.summary(elapsed)}")
+
+    # Run incremental cross-channel deduplication (separate short DB session).
+    # Also picks up messages stored by the realtime collector since the last run.
+    await run_incremental_deduplication()
 
     print(f"[{datetime.utcnow()}] Message collection job completed")
@@ -11,6 +11,11 @@ from app.jobs.collect_messages import collect_messages_job
 from app.jobs.generate_summaries import generate_summaries_job
 from app.jobs.purge_audit_logs import purge_audit_logs_job
 from app.jobs.alerts import evaluate_alerts_job
+from app.services.telegram_client import telegram_client_manager
+from app.services.entity_cache import entity_cache
+from app.services.channel_events import channel_events
+from app.services.realtime_collector import realtime_collector
+from app.services.vector_store import vector_store
 
 # Configure logging
 logging.basicConfig(
@@ -28,6 +33,11 @@ async def lifespan(app: FastAPI):
     # Startup: Initialize database
     await init_db()
     print("Database initialized")
+    await entity_cache.load()
+    await vector_store.initialize()
+    await channel_events.start()
+    if settings.realtime_enabled:
+        await realtime_collector.start()
 
     # Start background jobs
     if settings.scheduler_enabled:
@@ -52,6 +62,11 @@ async def lifespan(app: FastAPI):
     # Shutdown
     if settings.scheduler_enabled:
         scheduler.shutdown()
+    if settings.realtime_enabled:
+        await realtime_collector.stop()
+    await channel_events.stop()
+    await vector_store.close()
+    await telegram_client_manager.close()
     print("Shutting down...")
 
 
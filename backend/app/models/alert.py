@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, String, ForeignKey, Boolean, Integer, JSON, Text
+from sqlalchemy import Column, DateTime, String, ForeignKey, Boolean, Integer, JSON, Text, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
@@ -37,3 +37,19 @@ class AlertTrigger(Base):
     summary = Column(Text, nullable=True)
 
     alert = relationship("Alert", back_populates="triggers")
+
+
+class AlertHit(Base):
+    """A message counted towards an alert's threshold.
+
+    Shared by every worker and kept across restarts; rows older than the
+    longest alert window are pruned by the periodic alert job.
+    """
+
+    __tablename__ = "alert_hits"
+
+    alert_id = Column(UUID(as_uuid=True), ForeignKey("alerts.id", ondelete="CASCADE"), primary_key=True)
+    message_id = Column(UUID(as_uuid=True), primary_key=True)
+    published_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (Index("ix_alert_hits_alert_published", "alert_id", "published_at"),)
@@ -15,6 +15,8 @@ class Channel(Base):
 
     # Telegram identifiers - BigInteger for large telegram IDs
     telegram_id = Column(BigInteger, unique=True, index=True, nullable=False)
+    # Cached access hash so fetches can use InputPeerChannel without resolving the username
+    access_hash = Column(BigInteger, nullable=True)
     username = Column(String(255), index=True)
     title = Column(String(500))
     description = Column(Text, nullable=True)
@@ -37,6 +39,9 @@ class Channel(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=lambda: datetime.now(timezone.utc))
     last_fetched_at = Column(DateTime(timezone=True), nullable=True)
 
+    # Incremental fetch cursor: highest telegram_message_id already collected
+    last_message_id = Column(BigInteger, nullable=True)
+
     # Relationships
     messages = relationship("Message", back_populates="channel", cascade="all, delete-orphan")
     collections = relationship("Collection", secondary=collection_channels, back_populates="channels")
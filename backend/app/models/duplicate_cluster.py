@@ -0,0 +1,28 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime, timezone
+from app.database import Base
+
+
+class DuplicateCluster(Base):
+    """A story and its reposts: all messages sharing one ``duplicate_group_id``.
+
+    The cluster ID is the ID of its canonical (earliest) message, which is
+    also the ``duplicate_group_id`` of every member. Aggregates are kept up
+    to date by the deduplication job as clusters grow and merge.
+    """
+
+    __tablename__ = "duplicate_clusters"
+
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    first_channel_id = Column(UUID(as_uuid=True), ForeignKey("channels.id", ondelete="SET NULL"), nullable=True)
+    member_count = Column(Integer, nullable=False, default=1)
+    channel_count = Column(Integer, nullable=False, default=1)
+    first_seen_at = Column(DateTime(timezone=True), nullable=True, index=True)
+    last_seen_at = Column(DateTime(timezone=True), nullable=True, index=True)
+    spread_seconds = Column(Integer, nullable=False, default=0)  # first to last member
+    updated_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, DateTime, String, JSON
+from datetime import datetime, timezone
+from app.database import Base
+
+
+class JobState(Base):
+    """Persisted cursor for background jobs that process data incrementally."""
+
+    __tablename__ = "job_states"
+
+    name = Column(String(100), primary_key=True)
+    cursor_at = Column(DateTime(timezone=True), nullable=True)
+    metadata_json = Column("metadata", JSON, nullable=True)
+    updated_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
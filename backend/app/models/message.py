@@ -45,7 +45,7 @@ class Message(Base):
 
     # Timestamps with timezone
     published_at = Column(DateTime(timezone=True), index=True)
-    fetched_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    fetched_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), index=True)
     translated_at = Column(DateTime(timezone=True), nullable=True)
 
     # Relationships
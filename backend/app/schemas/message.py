@@ -32,3 +32,6 @@ class MessageListResponse(BaseModel):
     total: int
     page: int
     page_size: int
+    total_is_exact: bool = True
+    next_cursor: Optional[str] = None
+    has_more: bool = False
@@ -0,0 +1,386 @@
+"""Streaming keyword alert matching at ingest time.
+
+The keywords of every active alert are compiled into one Aho-Corasick
+automaton, so each inserted message is scanned once whatever the number of
+alerts. Matches are recorded in ``alert_hits``, shared by every worker and
+kept across restarts; an alert fires as soon as its hits within the window
+reach ``min_threshold`` (subject to the same cooldown as the periodic job)
+instead of on the next job run. The cooldown is claimed with a conditional
+UPDATE, so concurrent workers fire an alert once.
+
+Alerts that also filter on named entities stay with the periodic job, since
+entities are not known yet when a message is inserted.
+"""
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+from uuid import UUID
+import asyncio
+import logging
+import time
+
+from sqlalchemy import or_, select, update
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.models.alert import Alert, AlertHit, AlertTrigger
+from app.models.channel import Channel
+from app.models.collection import Collection, collection_channels
+from app.services.message_writer import dialect_insert
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Messages listed on a trigger
+TRIGGER_MESSAGE_LIMIT = 20
+# Alert definitions are reloaded at least this often, to pick up changes
+# made through other workers
+RULES_TTL_SECONDS = 60
+
+
+def alert_window_minutes(frequency: Optional[str]) -> int:
+    if frequency == "realtime":
+        return 15
+    if frequency == "hourly":
+        return 60
+    return 24 * 60
+
+
+def alert_cooldown(frequency: Optional[str]) -> timedelta:
+    if frequency == "hourly":
+        return timedelta(hours=1)
+    if frequency == "daily":
+        return timedelta(days=1)
+    return timedelta(minutes=15)
+
+
+def is_due(alert, now: Optional[datetime] = None) -> bool:
+    """Whether an alert's cooldown since its last trigger has elapsed."""
+    if not alert.last_triggered_at:
+        return True
+    now = now or datetime.utcnow()
+    last_triggered_at = alert.last_triggered_at
+    if last_triggered_at.tzinfo is not None:
+        last_triggered_at = last_triggered_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return last_triggered_at <= now - alert_cooldown(alert.frequency)
+
+
+class AhoCorasick:
+    """Case-insensitive multi-pattern substring matcher."""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns = list(dict.fromkeys(pattern.lower() for pattern in patterns if pattern))
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[list[int]] = [[]]
+
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[state][char] = next_state
+                state = next_state
+            self._output[state].append(index)
+
+        # Breadth-first so every state's failure link is set before its children's
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fallback = self._goto[fail].get(char, 0)
+                self._fail[next_state] = fallback if fallback != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def search(self, text: str) -> set[int]:
+        """Indexes of the patterns occurring anywhere in ``text``."""
+        found: set[int] = set()
+        state = 0
+        goto, fail, output = self._goto, self._fail, self._output
+        for char in text.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+
+@dataclass
+class AlertRule:
+    id: UUID
+    frequency: str
+    min_threshold: int
+    keywords: list[str]
+    channel_ids: frozenset
+    entities: list[str] = field(default_factory=list)
+    last_triggered_at: Optional[datetime] = None
+
+    @property
+    def window(self) -> timedelta:
+        return timedelta(minutes=alert_window_minutes(self.frequency))
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+async def load_alert_rules(session, include_entities: bool = False) -> list[AlertRule]:
+    """Active alerts with their channels: one alert query, one membership query.
+
+    Alerts on a global collection cover every active channel.
+
+    Args:
+        include_entities: Also return alerts that filter on named entities
+    """
+    result = await session.execute(
+        select(Alert, Collection.is_global)
+        .join(Collection, Collection.id == Alert.collection_id)
+        .where(Alert.is_active == True)
+    )
+    rows = [
+        (alert, is_global)
+        for alert, is_global in result.all()
+        if include_entities or not alert.entities
+    ]
+
+    collection_ids = {alert.collection_id for alert, is_global in rows if not is_global}
+    members: dict[UUID, set] = {}
+    if collection_ids:
+        membership_result = await session.execute(
+            select(collection_channels.c.collection_id, collection_channels.c.channel_id)
+            .where(collection_channels.c.collection_id.in_(collection_ids))
+        )
+        for collection_id, channel_id in membership_result.all():
+            members.setdefault(collection_id, set()).add(channel_id)
+
+    active_channel_ids = frozenset()
+    if any(is_global for _, is_global in rows):
+        channel_result = await session.execute(select(Channel.id).where(Channel.is_active == True))
+        active_channel_ids = frozenset(channel_result.scalars().all())
+
+    return [
+        AlertRule(
+            id=alert.id,
+            frequency=alert.frequency or "daily",
+            min_threshold=alert.min_threshold or 1,
+            keywords=[keyword for keyword in alert.keywords or [] if keyword],
+            channel_ids=active_channel_ids if is_global else frozenset(members.get(alert.collection_id, ())),
+            entities=[entity for entity in alert.entities or [] if entity],
+            last_triggered_at=alert.last_triggered_at,
+        )
+        for alert, is_global in rows
+    ]
+
+
+_ENTITY_TYPES = ("persons", "locations", "organizations")
+
+
+class CompiledAlerts:
+    """A set of alert rules with all their keywords in one automaton."""
+
+    def __init__(self, rules: list[AlertRule]):
+        self.rules = {rule.id: rule for rule in rules}
+        keyword_alerts: dict[str, list[UUID]] = {}
+        self._match_all: list[UUID] = []  # alerts without keywords match every message
+        for rule in rules:
+            if not rule.keywords:
+                self._match_all.append(rule.id)
+            for keyword in dict.fromkeys(keyword.lower() for keyword in rule.keywords):
+                keyword_alerts.setdefault(keyword, []).append(rule.id)
+        self._automaton = AhoCorasick(keyword_alerts)
+        self._pattern_alerts = [keyword_alerts[pattern] for pattern in self._automaton.patterns]
+
+    @property
+    def keyword_count(self) -> int:
+        return len(self._pattern_alerts)
+
+    def match(self, message: dict, channel_id: Optional[UUID] = None) -> list[UUID]:
+        """IDs of the alerts a message matches.
+
+        A message matches when it comes from one of the alert's channels,
+        contains any of its keywords in either text and, for alerts with
+        entities, mentions any of them.
+        """
+        channel_id = message.get("channel_id") or channel_id
+        alert_ids = list(self._match_all)
+        if self._pattern_alerts:
+            # Separator keeps keywords from matching across the two texts
+            text = "\n".join(filter(None, [message.get("original_text"), message.get("translated_text")]))
+            for index in self._automaton.search(text):
+                alert_ids.extend(self._pattern_alerts[index])
+
+        matched = []
+        mentioned = None
+        for alert_id in dict.fromkeys(alert_ids):
+            rule = self.rules[alert_id]
+            if channel_id not in rule.channel_ids:
+                continue
+            if rule.entities:
+                if mentioned is None:
+                    entities = message.get("entities") or {}
+                    mentioned = {entity for kind in _ENTITY_TYPES for entity in entities.get(kind) or []}
+                if mentioned.isdisjoint(rule.entities):
+                    continue
+            matched.append(alert_id)
+        return matched
+
+
+class AlertMatcher:
+    def __init__(self):
+        self._rules: dict[UUID, AlertRule] = {}
+        self._compiled = CompiledAlerts([])
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self.stats = {"messages": 0, "matches": 0, "triggers": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return settings.alert_streaming_enabled
+
+    def handles(self, alert) -> bool:
+        """Whether the alert is evaluated here rather than by the periodic job."""
+        return self.enabled and not alert.entities
+
+    def invalidate(self) -> None:
+        """Reload alert definitions before the next batch."""
+        self._loaded_at = None
+
+    async def reload(self, session=None) -> None:
+        async with self._lock:
+            await self._reload(session)
+
+    async def _reload(self, session=None) -> None:
+        if session is None:
+            async with AsyncSessionLocal() as session:
+                await self._reload(session)
+            return
+
+        rules = await load_alert_rules(session)
+        self._rules = {rule.id: rule for rule in rules}
+        self._compiled = CompiledAlerts(rules)
+        self._loaded_at = time.monotonic()
+        logger.info(f"Alert matcher loaded {len(self._rules)} alerts ({self._compiled.keyword_count} keywords)")
+
+    def match(self, message: dict, channel_id: Optional[UUID] = None) -> list[UUID]:
+        return self._compiled.match(message, channel_id)
+
+    def _hits(self, messages: list[dict], channel_id: Optional[UUID], now: datetime) -> list[dict]:
+        hits = []
+        for message in messages:
+            self.stats["messages"] += 1
+            published_at = _as_utc(message.get("published_at")) or now
+            for alert_id in self.match(message, channel_id):
+                if published_at < now - self._rules[alert_id].window:
+                    continue
+                hits.append({"alert_id": alert_id, "message_id": message["id"], "published_at": published_at})
+                self.stats["matches"] += 1
+        return hits
+
+    async def process(self, messages: list[dict], channel_id: Optional[UUID] = None) -> int:
+        """Count newly inserted messages against every alert and fire the ones due.
+
+        Args:
+            messages: Inserted rows, each with ``id``, texts and ``published_at``
+            channel_id: Channel of rows that don't carry their own
+
+        Returns:
+            Number of alerts triggered
+        """
+        if not self.enabled or not messages:
+            return 0
+        try:
+            return await self._process(messages, channel_id)
+        except Exception as e:
+            # Never fail an ingest because of alerting; the periodic job still runs
+            logger.error(f"Alert matching failed: {e}")
+            return 0
+
+    async def _process(self, messages: list[dict], channel_id: Optional[UUID]) -> int:
+        async with self._lock:
+            if self._loaded_at is None or time.monotonic() - self._loaded_at > RULES_TTL_SECONDS:
+                await self._reload()
+            rules = self._rules
+            now = datetime.now(timezone.utc)
+            hits = self._hits(messages, channel_id, now)
+        if not hits:
+            return 0
+
+        # Alerts this worker knows to be cooling down only record their hits
+        due = {hit["alert_id"] for hit in hits if is_due(rules[hit["alert_id"]])}
+        triggers = []
+        async with AsyncSessionLocal() as session:
+            insert = dialect_insert(session)
+            await session.execute(insert(AlertHit).on_conflict_do_nothing(), hits)
+
+            window_starts = {alert_id: now - rules[alert_id].window for alert_id in due}
+            counted: dict[UUID, list[tuple[datetime, UUID]]] = {}
+            if due:
+                result = await session.execute(
+                    select(AlertHit.alert_id, AlertHit.message_id, AlertHit.published_at).where(
+                        AlertHit.alert_id.in_(due),
+                        AlertHit.published_at >= min(window_starts.values()),
+                    )
+                )
+                for alert_id, message_id, published_at in result.all():
+                    published_at = _as_utc(published_at)
+                    if published_at >= window_starts[alert_id]:
+                        counted.setdefault(alert_id, []).append((published_at, message_id))
+
+            for alert_id, matches in counted.items():
+                rule = rules[alert_id]
+                if len(matches) < rule.min_threshold:
+                    continue
+                # Claim the cooldown: only one worker's UPDATE matches
+                triggered_at = datetime.utcnow()
+                claimed = await session.execute(
+                    update(Alert)
+                    .where(Alert.id == alert_id)
+                    .where(
+                        or_(
+                            Alert.last_triggered_at.is_(None),
+                            Alert.last_triggered_at <= triggered_at - alert_cooldown(rule.frequency),
+                        )
+                    )
+                    .values(last_triggered_at=triggered_at)
+                    .execution_options(synchronize_session=False)
+                )
+                # Either this worker fires now or another one just did
+                rule.last_triggered_at = triggered_at
+                if claimed.rowcount != 1:
+                    continue
+                matches.sort(reverse=True)
+                triggers.append(
+                    AlertTrigger(
+                        alert_id=alert_id,
+                        message_ids=[str(message_id) for _, message_id in matches[:TRIGGER_MESSAGE_LIMIT]],
+                        summary=(
+                            f"{len(matches)} matching messages in the last "
+                            f"{alert_window_minutes(rule.frequency)} minutes."
+                        ),
+                    )
+                )
+            session.add_all(triggers)
+            await session.commit()
+
+        if triggers:
+            self.stats["triggers"] += len(triggers)
+            logger.info(f"Triggered {len(triggers)} alerts at ingest")
+        return len(triggers)
+
+
+# Singleton instance
+alert_matcher = AlertMatcher()
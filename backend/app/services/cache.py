@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from typing import Optional
+from collections import OrderedDict
+from typing import Any, Optional, Iterable
+import time
 
 from redis.asyncio import Redis
 
@@ -21,3 +23,141 @@ def get_redis_client() -> Optional[Redis]:
             decode_responses=True,
         )
     return _redis_client
+
+
+class LRUCache:
+    """In-process cache bounded by entry count and per-entry TTL."""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max(1, max_size)
+        self.ttl_seconds = ttl_seconds
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, count=False) is not None
+
+    def get(self, key: str, count: bool = True) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at >= time.monotonic():
+                self._data.move_to_end(key)
+                if count:
+                    self.hits += 1
+                return value
+            del self._data[key]
+            self.expirations += 1
+        if count:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class TieredCache:
+    """Bounded in-process LRU in front of Redis.
+
+    Batch lookups go to Redis as a single MGET and batch writes as one
+    pipelined round trip. Redis hits are promoted into the local tier; when
+    Redis is missing or failing, the local tier still caps memory use.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        max_size: int,
+        ttl_seconds: float,
+        redis_ttl_seconds: int,
+        redis: Optional[Redis] = None,
+    ):
+        self.namespace = namespace
+        self.local = LRUCache(max_size, ttl_seconds)
+        self.redis_ttl_seconds = redis_ttl_seconds
+        self._redis = redis
+        self.redis_hits = 0
+        self.redis_misses = 0
+        self.redis_errors = 0
+
+    def _redis_key(self, key: str) -> str:
+        # Un-namespaced keys keep entries written before the tiered cache readable
+        return f"{self.namespace}:{key}" if self.namespace else key
+
+    async def get(self, key: str) -> Optional[str]:
+        return (await self.get_many([key])).get(key)
+
+    async def get_many(self, keys: Iterable[str]) -> dict[str, str]:
+        found: dict[str, str] = {}
+        missing: list[str] = []
+        for key in dict.fromkeys(keys):
+            value = self.local.get(key)
+            if value is not None:
+                found[key] = value
+            else:
+                missing.append(key)
+
+        if missing and self._redis is not None:
+            try:
+                values = await self._redis.mget([self._redis_key(key) for key in missing])
+            except Exception:
+                self.redis_errors += 1
+                return found
+            for key, value in zip(missing, values):
+                if value:
+                    self.redis_hits += 1
+                    found[key] = value
+                    self.local.set(key, value)
+                else:
+                    self.redis_misses += 1
+        return found
+
+    async def set(self, key: str, value: str) -> None:
+        await self.set_many({key: value})
+
+    async def set_many(self, items: dict[str, str]) -> None:
+        if not items:
+            return
+        for key, value in items.items():
+            self.local.set(key, value)
+
+        if self._redis is None:
+            return
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for key, value in items.items():
+                    pipe.set(self._redis_key(key), value, ex=self.redis_ttl_seconds)
+                await pipe.execute()
+        except Exception:
+            self.redis_errors += 1
+
+    def stats(self) -> dict:
+        return {
+            "local": self.local.stats(),
+            "redis": {
+                "enabled": self._redis is not None,
+                "hits": self.redis_hits,
+                "misses": self.redis_misses,
+                "errors": self.redis_errors,
+            },
+        }
@@ -0,0 +1,115 @@
+"""In-process change notifications for followed channels.
+
+The channels API publishes an event whenever a channel is added or removed,
+and subscribers (e.g. the realtime collector) update their state right away
+instead of polling the database. When Redis is configured, events are also
+relayed over pub/sub so every worker process sees changes made by the others.
+"""
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Optional
+from uuid import UUID, uuid4
+import asyncio
+import json
+import logging
+
+from app.services.cache import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+REDIS_CHANNEL = "telescope:channel-events"
+
+CHANNEL_ADDED = "added"
+CHANNEL_REMOVED = "removed"
+
+
+@dataclass(frozen=True)
+class ChannelEvent:
+    action: str
+    channel_id: UUID
+    telegram_id: int
+    title: Optional[str] = None
+    language: Optional[str] = None
+
+    def to_json(self, origin: str) -> str:
+        payload = asdict(self)
+        payload["channel_id"] = str(self.channel_id)
+        payload["origin"] = origin
+        return json.dumps(payload)
+
+    @classmethod
+    def from_json(cls, data: str) -> tuple["ChannelEvent", Optional[str]]:
+        payload = json.loads(data)
+        origin = payload.pop("origin", None)
+        payload["channel_id"] = UUID(payload["channel_id"])
+        return cls(**payload), origin
+
+
+Subscriber = Callable[[ChannelEvent], Awaitable[None]]
+
+
+class ChannelEventBus:
+    """Fan out channel changes to local subscribers and, optionally, other processes."""
+
+    def __init__(self):
+        self._subscribers: list[Subscriber] = []
+        self._origin = uuid4().hex  # Lets the Redis listener skip our own events
+        self._listener: Optional[asyncio.Task] = None
+
+    def subscribe(self, callback: Subscriber) -> None:
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Subscriber) -> None:
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    async def _dispatch(self, event: ChannelEvent) -> None:
+        for callback in list(self._subscribers):
+            try:
+                await callback(event)
+            except Exception as e:
+                logger.error(f"Channel event subscriber failed on {event.action}: {e}")
+
+    async def publish(self, event: ChannelEvent) -> None:
+        """Deliver an event to local subscribers, then relay it over Redis if enabled."""
+        await self._dispatch(event)
+
+        redis = get_redis_client()
+        if redis is None:
+            return
+        try:
+            await redis.publish(REDIS_CHANNEL, event.to_json(self._origin))
+        except Exception as e:
+            logger.warning(f"Failed to relay channel event over Redis: {e}")
+
+    async def start(self) -> None:
+        """Start relaying events published by other processes (no-op without Redis)."""
+        if self._listener is None and get_redis_client() is not None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+
+    async def _listen(self) -> None:
+        redis = get_redis_client()
+        while True:
+            try:
+                async with redis.pubsub() as pubsub:
+                    await pubsub.subscribe(REDIS_CHANNEL)
+                    async for message in pubsub.listen():
+                        if message.get("type") != "message":
+                            continue
+                        event, origin = ChannelEvent.from_json(message["data"])
+                        if origin != self._origin:
+                            await self._dispatch(event)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Channel event listener error, resubscribing in 5s: {e}")
+                await asyncio.sleep(5)
+
+
+# Singleton instance
+channel_events = ChannelEventBus()
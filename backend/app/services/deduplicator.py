@@ -1,5 +1,7 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
+from sqlalchemy import func, select
 from app.models.message import Message
+from app.services.text_fingerprint import FingerprintIndex
 from app.services.vector_store import vector_store
 from app.config import get_settings
 from datetime import datetime, timezone
@@ -8,6 +10,14 @@ import uuid
 settings = get_settings()
 
 
+def _to_timestamp(value: Optional[datetime]) -> Optional[int]:
+    if not value:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
 class DeduplicationService:
     def __init__(self, similarity_threshold: Optional[float] = None):
         """
@@ -18,117 +28,445 @@ class DeduplicationService:
         """
         self.similarity_threshold = similarity_threshold or settings.dedup_similarity_threshold
         self.top_k = settings.dedup_top_k
+        # Verbatim and lightly edited reposts are resolved here without embeddings
+        self.prefilter = (
+            FingerprintIndex(
+                num_perm=settings.dedup_minhash_permutations,
+                bands=settings.dedup_minhash_bands,
+                threshold=settings.dedup_minhash_threshold,
+            )
+            if settings.dedup_prefilter_enabled
+            else None
+        )
+        self.prefilter_warmed = False
 
     def _get_message_text(self, message: Message) -> str:
         return message.translated_text or message.original_text or ""
 
     def _message_timestamp(self, message: Message) -> Optional[int]:
-        timestamp = message.published_at or message.fetched_at
-        if not timestamp:
-            return None
-        if timestamp.tzinfo is None:
-            timestamp = timestamp.replace(tzinfo=timezone.utc)
-        return int(timestamp.timestamp())
-
-    def mark_duplicates(
+        return _to_timestamp(message.published_at or message.fetched_at)
+
+    def _build_metadata(self, message: Message) -> dict:
+        metadata = {
+            "message_id": str(message.id),
+            "channel_id": str(message.channel_id),
+        }
+        published_at_ts = self._message_timestamp(message)
+        if published_at_ts is not None:
+            metadata["published_at_ts"] = published_at_ts
+        return metadata
+
+    async def _embed_messages(self, messages: List[Message]) -> dict[str, list[float]]:
+        """Return a vector for every message, embedding and upserting only the missing ones.
+
+        Messages that already carry an ``embedding_id`` have their vectors read
+        back from the store; the rest are encoded in one batched call and
+        upserted in chunks.
+        """
+        vectors: dict[str, list[float]] = {}
+
+        embedded = [msg for msg in messages if msg.embedding_id]
+        if embedded:
+            stored = await vector_store.retrieve_vectors([msg.embedding_id for msg in embedded])
+            for msg in embedded:
+                vector = stored.get(str(msg.embedding_id))
+                if vector is not None:
+                    vectors[str(msg.id)] = vector
+
+        pending = [msg for msg in messages if str(msg.id) not in vectors]
+        if not pending:
+            return vectors
+
+        texts = [self._get_message_text(msg) for msg in pending]
+        pending_vectors = await vector_store.embed_texts(texts)
+        await self._store_vectors(pending, pending_vectors, vectors)
+        return vectors
+
+    async def _store_vectors(
+        self,
+        messages: List[Message],
+        message_vectors: List[list[float]],
+        vectors: dict[str, list[float]],
+    ) -> None:
+        """Upsert one vector per message, recording it in ``vectors`` and the embedding IDs."""
+        embedding_ids = await vector_store.upsert_vectors(
+            [
+                {
+                    "id": str(msg.id),
+                    "text": self._get_message_text(msg),
+                    "vector": vector,
+                    "metadata": self._build_metadata(msg),
+                }
+                for msg, vector in zip(messages, message_vectors)
+            ]
+        )
+        for msg, vector, embedding_id in zip(messages, message_vectors, embedding_ids):
+            vectors[str(msg.id)] = vector
+            if embedding_id:
+                msg.embedding_id = embedding_id
+
+    async def _embed_resolved(
+        self,
+        messages: List[Message],
+        best_matches: Dict[str, Optional[dict]],
+        vectors: dict[str, list[float]],
+    ) -> None:
+        """Store vectors for messages the fingerprint pre-filter resolved.
+
+        Semantic search only finds messages with a stored vector, so each
+        repost gets a copy of the vector of the message it repeats; only
+        reposts whose original has no stored vector are encoded.
+        ``messages`` must be sorted by time so an original copied earlier in
+        the loop is available to its own reposts.
+        """
+        messages = [msg for msg in messages if not msg.embedding_id]
+        if not messages:
+            return
+
+        sources = {str(msg.id): best_matches[str(msg.id)]["id"] for msg in messages}
+        missing = [source for source in set(sources.values()) if source not in vectors]
+        if missing:
+            vectors.update(await vector_store.retrieve_vectors(missing))
+
+        copied, copied_vectors, unresolved = [], [], []
+        for msg in messages:
+            vector = vectors.get(sources[str(msg.id)])
+            if vector is None:
+                unresolved.append(msg)
+                continue
+            vectors[str(msg.id)] = vector
+            copied.append(msg)
+            copied_vectors.append(vector)
+
+        if copied:
+            await self._store_vectors(copied, copied_vectors, vectors)
+        if unresolved:
+            await self._embed_messages(unresolved)
+
+    def _sort_key(self, message: Message) -> int:
+        return self._message_timestamp(message) or 0
+
+    def warm_prefilter(self, messages) -> None:
+        """Index already-deduplicated messages so new ones can match them by fingerprint.
+
+        Accepts messages or rows with the text and timestamp columns.
+        """
+        self.prefilter_warmed = True
+        if self.prefilter is None:
+            return
+        for message in messages:
+            self.prefilter.add(str(message.id), self._message_timestamp(message), self._get_message_text(message))
+
+    def is_deduplicated(self, message: Message) -> bool:
+        """Whether an earlier run already handled the message (or there is nothing to do)."""
+        if not self._get_message_text(message):
+            return True
+        return bool(message.duplicate_group_id or message.embedding_id)
+
+    def _prefilter_matches(
+        self,
+        candidates: List[Message],
+        cutoff_ts: Optional[int],
+    ) -> Dict[str, dict]:
+        """Resolve obvious duplicates by fingerprint, indexing every candidate.
+
+        Candidates must be sorted by time so each one only matches earlier ones.
+        """
+        if self.prefilter is None:
+            return {}
+        if cutoff_ts:
+            self.prefilter.prune(cutoff_ts)
+
+        matches: Dict[str, dict] = {}
+        for message in candidates:
+            message_id = str(message.id)
+            message_ts = self._message_timestamp(message)
+            text = self._get_message_text(message)
+            match = self.prefilter.match(message_id, message_ts, text, cutoff_ts=cutoff_ts)
+            if match:
+                matches[message_id] = match
+            self.prefilter.add(message_id, message_ts, text)
+        return matches
+
+    async def find_best_matches(
         self,
         messages: List[Message],
         cutoff_time: Optional[datetime] = None,
-    ) -> List[Message]:
+        use_embeddings: bool = True,
+    ) -> Dict[str, Optional[dict]]:
         """
-        Mark messages as duplicates and assign group IDs
+        Find the best earlier match above the threshold for each message
+
+        Exact and near-exact reposts are first resolved by text fingerprint
+        and stored with a copy of their original's vector.
+        The rest go through embeddings, batched: one encode call for all
+        messages lacking an embedding, chunked upserts, then one batch search
+        over every vector. A message can only be matched against messages
+        published before it. With ``use_embeddings`` False only the
+        fingerprint stage runs.
 
         Returns:
-            Updated list of messages
+            Mapping of message ID to ``{"id", "score", "related"}`` (or None
+            when unique) for every message that was searched
         """
-        if len(messages) <= 1:
-            return messages
+        candidates = sorted(
+            (msg for msg in messages if self._get_message_text(msg)),
+            key=self._sort_key,
+        )
+        if not candidates:
+            return {}
 
-        if not vector_store.is_ready:
-            return messages
+        positions = {str(msg.id): index for index, msg in enumerate(candidates)}
+        cutoff_ts = int(cutoff_time.timestamp()) if cutoff_time else None
 
-        def _sort_key(msg: Message) -> int:
-            ts = msg.published_at or msg.fetched_at
-            if not ts:
-                return 0
-            if ts.tzinfo is None:
-                ts = ts.replace(tzinfo=timezone.utc)
-            return int(ts.timestamp())
+        best_matches: Dict[str, Optional[dict]] = dict(self._prefilter_matches(candidates, cutoff_ts))
+        if not use_embeddings or not await vector_store.ensure_ready():
+            return best_matches
 
-        messages_sorted = sorted(messages, key=_sort_key)
-        message_lookup = {str(msg.id): msg for msg in messages_sorted}
-        cutoff_ts = int(cutoff_time.timestamp()) if cutoff_time else None
+        resolved = [msg for msg in candidates if str(msg.id) in best_matches]
+        pending = [msg for msg in candidates if str(msg.id) not in best_matches]
+        vectors = await self._embed_messages(pending) if pending else {}
+        if resolved:
+            await self._embed_resolved(resolved, best_matches, vectors)
+        if not pending:
+            return best_matches
 
-        for message in messages_sorted:
-            text = self._get_message_text(message)
-            if not text:
-                continue
+        searchable = [msg for msg in pending if str(msg.id) in vectors]
 
-            if not message.embedding_id:
-                published_at_ts = self._message_timestamp(message)
-                metadata = {
-                    "message_id": str(message.id),
-                    "channel_id": str(message.channel_id),
-                }
-                if published_at_ts is not None:
-                    metadata["published_at_ts"] = published_at_ts
-
-                embedding_id = vector_store.upsert_texts(
-                    [
-                        {
-                            "id": str(message.id),
-                            "text": text,
-                            "metadata": metadata,
-                        }
-                    ]
-                )[0]
-                if embedding_id:
-                    message.embedding_id = embedding_id
-
-            query_filter = {"published_at_ts": {"$gte": cutoff_ts}} if cutoff_ts else None
-            matches = vector_store.query_similar(
-                text,
-                top_k=self.top_k,
-                filter=query_filter,
-            )
+        query_filters = []
+        for message in searchable:
+            ts_filter = {}
+            if cutoff_ts:
+                ts_filter["$gte"] = cutoff_ts
+            message_ts = self._message_timestamp(message)
+            if message_ts is not None:
+                ts_filter["$lte"] = message_ts
+            query_filters.append({"published_at_ts": ts_filter} if ts_filter else None)
+
+        all_matches = await vector_store.query_similar_batch(
+            [vectors[str(msg.id)] for msg in searchable],
+            top_k=self.top_k,
+            filters=query_filters,
+        )
 
-            best_match = None
+        for message, matches in zip(searchable, all_matches):
+            message_id = str(message.id)
+            accepted = []
             for match in matches:
                 match_id = str(match.get("id"))
                 score = match.get("score")
-                if match_id == str(message.id):
+                if match_id == message_id:
+                    continue
+                # Same-second messages from this batch: only the earlier one may be the original
+                if match_id in positions and positions[match_id] > positions[message_id]:
                     continue
                 if score is None or score < self.similarity_threshold:
                     continue
-                if best_match is None or score > best_match["score"]:
-                    best_match = {"id": match_id, "score": score}
+                accepted.append((score, match_id))
+
+            if not accepted:
+                best_matches[message_id] = None
+                continue
+            accepted.sort(reverse=True)
+            best_score, best_id = accepted[0]
+            best_matches[message_id] = {
+                "id": best_id,
+                "score": best_score,
+                # Other matches above the threshold; their clusters are merged too
+                "related": [match_id for _, match_id in accepted[1:]],
+            }
+        return best_matches
 
+    def apply_matches(
+        self,
+        messages: List[Message],
+        best_matches: Dict[str, Optional[dict]],
+        known_messages: Optional[Dict[str, Message]] = None,
+    ) -> List[Message]:
+        """
+        Assign duplicate flags and group IDs from ``find_best_matches`` output
+
+        Args:
+            known_messages: Already-stored messages that matches may point at,
+                keyed by ID, so their group can be reused or initialised
+
+        Returns:
+            Updated list of messages
+        """
+        self.union_matches(messages, best_matches, known_messages)
+        return messages
+
+    async def load_match_context(
+        self,
+        db,
+        messages: List[Message],
+        best_matches: Dict[str, Optional[dict]],
+    ) -> tuple[Dict[str, Message], Dict[uuid.UUID, Optional[int]]]:
+        """
+        Load what ``union_matches`` needs to resolve groups: the stored
+        messages the batch matched and the canonical messages of every group
+        involved. Groups whose canonical message is gone get the timestamp of
+        their earliest member instead.
+
+        Returns:
+            (known_messages keyed by ID, first-seen timestamp per group ID)
+        """
+        batch_ids = {str(msg.id) for msg in messages}
+        matched_uuids = set()
+        for match in best_matches.values():
+            if not match:
+                continue
+            for match_id in [match["id"], *(match.get("related") or [])]:
+                if match_id in batch_ids:
+                    continue
+                try:
+                    matched_uuids.add(uuid.UUID(match_id))
+                except ValueError:
+                    continue
+
+        known_messages: Dict[str, Message] = {}
+        if matched_uuids:
+            result = await db.execute(select(Message).where(Message.id.in_(matched_uuids)))
+            known_messages = {str(msg.id): msg for msg in result.scalars().all()}
+
+        group_ids = {
+            msg.duplicate_group_id
+            for msg in [*known_messages.values(), *messages]
+            if msg.duplicate_group_id
+            and str(msg.duplicate_group_id) not in known_messages
+            and str(msg.duplicate_group_id) not in batch_ids
+        }
+        if group_ids:
+            result = await db.execute(select(Message).where(Message.id.in_(group_ids)))
+            known_messages.update({str(msg.id): msg for msg in result.scalars().all()})
+
+        first_seen: Dict[uuid.UUID, Optional[int]] = {}
+        orphaned = {group_id for group_id in group_ids if str(group_id) not in known_messages}
+        if orphaned:
+            result = await db.execute(
+                select(
+                    Message.duplicate_group_id,
+                    func.min(Message.published_at),
+                    func.min(Message.fetched_at),
+                )
+                .where(Message.duplicate_group_id.in_(orphaned))
+                .group_by(Message.duplicate_group_id)
+            )
+            for group_id, published_at, fetched_at in result.all():
+                first_seen[group_id] = _to_timestamp(published_at or fetched_at)
+        return known_messages, first_seen
+
+    def union_matches(
+        self,
+        messages: List[Message],
+        best_matches: Dict[str, Optional[dict]],
+        known_messages: Optional[Dict[str, Message]] = None,
+        first_seen: Optional[Dict[uuid.UUID, Optional[int]]] = None,
+    ) -> Dict[uuid.UUID, uuid.UUID]:
+        """
+        Union-find over duplicate groups: each match joins the message's group
+        with the group of every message it matched
+
+        A group's ID is the ID of its canonical message. When two groups are
+        joined, the one whose canonical message was published first survives
+        and every loaded member is relabelled, so group IDs never chain.
+        Matches must be in ``messages`` or ``known_messages`` (see
+        ``load_match_context``); others, e.g. messages deleted since they
+        were indexed, are ignored.
+
+        Args:
+            first_seen: Timestamp of groups whose canonical message is not
+                loaded, used to pick the surviving group
+
+        Returns:
+            Mapping of each absorbed group ID to its surviving group ID
+        """
+        message_lookup = dict(known_messages or {})
+        message_lookup.update({str(msg.id): msg for msg in messages})
+        first_seen = first_seen or {}
+        parent: Dict[uuid.UUID, uuid.UUID] = {}
+
+        def find(root: uuid.UUID) -> uuid.UUID:
+            path = []
+            while parent.get(root, root) != root:
+                path.append(root)
+                root = parent[root]
+            for node in path:
+                parent[node] = root
+            return root
+
+        def canonical_key(root: uuid.UUID) -> tuple:
+            canonical = message_lookup.get(str(root))
+            timestamp = self._message_timestamp(canonical) if canonical else first_seen.get(root)
+            # Unknown age: assume older than the batch; ties go to the ID
+            return (timestamp or 0, str(root))
+
+        def union(left: uuid.UUID, right: uuid.UUID) -> uuid.UUID:
+            left, right = find(left), find(right)
+            if left == right:
+                return left
+            winner, loser = sorted((left, right), key=canonical_key)
+            parent[loser] = winner
+            return winner
+
+        def group_of(match_id: str) -> Optional[uuid.UUID]:
+            matched_message = message_lookup.get(match_id)
+            if matched_message is None:
+                return None
+            if matched_message.duplicate_group_id is None:
+                matched_message.duplicate_group_id = matched_message.id
+                matched_message.is_duplicate = False
+                matched_message.originality_score = 100
+            return find(matched_message.duplicate_group_id)
+
+        for message in sorted(messages, key=self._sort_key):
+            message_id = str(message.id)
+            if message_id not in best_matches:
+                continue
+
+            best_match = best_matches[message_id]
+            root = None
             if best_match:
-                match_id = best_match["id"]
-                matched_message = message_lookup.get(match_id)
-
-                if matched_message and matched_message.duplicate_group_id:
-                    group_id = matched_message.duplicate_group_id
-                elif matched_message:
-                    group_id = matched_message.id
-                    matched_message.duplicate_group_id = group_id
-                    matched_message.is_duplicate = False
-                    matched_message.originality_score = 100
-                else:
-                    try:
-                        group_id = uuid.UUID(match_id)
-                    except ValueError:
-                        group_id = uuid.uuid4()
+                for match_id in [best_match["id"], *(best_match.get("related") or [])]:
+                    group = group_of(match_id)
+                    if group is not None:
+                        root = group if root is None else union(root, group)
+            if root is not None:
+                if message.duplicate_group_id is not None:
+                    root = union(root, message.duplicate_group_id)
 
                 message.is_duplicate = True
-                message.duplicate_group_id = group_id
+                message.duplicate_group_id = root
                 message.originality_score = max(0, min(100, int((1 - best_match["score"]) * 100)))
             else:
                 message.is_duplicate = False
-                message.duplicate_group_id = None
+                # Keep the group of a message that is already the original of a group
+                if message.duplicate_group_id != message.id:
+                    message.duplicate_group_id = None
                 message.originality_score = 100
 
-        return messages
+        merges = {loser: find(loser) for loser in parent}
+        for message in message_lookup.values():
+            if message.duplicate_group_id is not None:
+                message.duplicate_group_id = find(message.duplicate_group_id)
+        return merges
+
+    async def mark_duplicates(
+        self,
+        messages: List[Message],
+        cutoff_time: Optional[datetime] = None,
+    ) -> List[Message]:
+        """
+        Mark messages as duplicates and assign group IDs
+
+        Returns:
+            Updated list of messages
+        """
+        if len(messages) <= 1:
+            return messages
+
+        best_matches = await self.find_best_matches(messages, cutoff_time=cutoff_time)
+        return self.apply_matches(messages, best_matches)
 
 
 # Singleton instance
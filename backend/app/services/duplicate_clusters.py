@@ -0,0 +1,105 @@
+from datetime import datetime
+from typing import Iterable, Optional
+import uuid
+
+from sqlalchemy import delete, func, select, update
+
+from app.models.duplicate_cluster import DuplicateCluster
+from app.models.message import Message
+
+
+async def merge_clusters(db, merges: dict[uuid.UUID, uuid.UUID]) -> None:
+    """Relabel members of absorbed clusters and drop their cluster rows."""
+    for loser, winner in merges.items():
+        await db.execute(
+            update(Message)
+            .where(Message.duplicate_group_id == loser)
+            .values(duplicate_group_id=winner)
+            .execution_options(synchronize_session=False)
+        )
+    if merges:
+        await db.execute(delete(DuplicateCluster).where(DuplicateCluster.id.in_(list(merges))))
+
+
+async def refresh_clusters(db, cluster_ids: Iterable[uuid.UUID]) -> None:
+    """Update the aggregates of the clusters touched by a deduplication batch.
+
+    Members are read through the ``duplicate_group_id`` index in one grouped
+    query, so the cost depends on the touched clusters only. Clusters with a
+    single member (an original nobody repeated) get no row.
+    """
+    cluster_ids = list(set(cluster_ids))
+    if not cluster_ids:
+        return
+
+    await db.flush()
+    aggregates_result = await db.execute(
+        select(
+            Message.duplicate_group_id,
+            func.count().label("member_count"),
+            func.count(func.distinct(Message.channel_id)).label("channel_count"),
+            func.min(Message.published_at).label("first_seen_at"),
+            func.max(Message.published_at).label("last_seen_at"),
+        )
+        .where(Message.duplicate_group_id.in_(cluster_ids))
+        .group_by(Message.duplicate_group_id)
+    )
+    aggregates = {row.duplicate_group_id: row for row in aggregates_result.all()}
+
+    canonical_result = await db.execute(
+        select(Message.id, Message.channel_id).where(Message.id.in_(cluster_ids))
+    )
+    canonical_channels = {row.id: row.channel_id for row in canonical_result.all()}
+
+    existing_result = await db.execute(
+        select(DuplicateCluster).where(DuplicateCluster.id.in_(cluster_ids))
+    )
+    existing = {cluster.id: cluster for cluster in existing_result.scalars().all()}
+
+    for cluster_id in cluster_ids:
+        row = aggregates.get(cluster_id)
+        cluster = existing.get(cluster_id)
+        if row is None or row.member_count < 2:
+            if cluster is not None:
+                await db.delete(cluster)
+            continue
+
+        if cluster is None:
+            cluster = DuplicateCluster(id=cluster_id)
+            db.add(cluster)
+        cluster.first_channel_id = canonical_channels.get(cluster_id, cluster.first_channel_id)
+        cluster.member_count = row.member_count
+        cluster.channel_count = row.channel_count
+        cluster.first_seen_at = row.first_seen_at
+        cluster.last_seen_at = row.last_seen_at
+        if row.first_seen_at and row.last_seen_at:
+            cluster.spread_seconds = int((row.last_seen_at - row.first_seen_at).total_seconds())
+        else:
+            cluster.spread_seconds = 0
+
+
+async def cluster_totals(
+    db,
+    channel_ids: Optional[list[uuid.UUID]] = None,
+    since: Optional[datetime] = None,
+) -> tuple[int, int]:
+    """Count clusters and their reposts (members beyond the canonical one).
+
+    Reads the cluster table rather than recounting flagged messages.
+    Clusters are attributed to the channel of their canonical message and
+    to the time it was first seen.
+
+    Returns:
+        (cluster_count, repost_count)
+    """
+    query = select(
+        func.count(DuplicateCluster.id),
+        func.coalesce(func.sum(DuplicateCluster.member_count - 1), 0),
+    )
+    if channel_ids is not None:
+        query = query.where(DuplicateCluster.first_channel_id.in_(channel_ids))
+    if since is not None:
+        query = query.where(DuplicateCluster.first_seen_at >= since)
+    result = await db.execute(query)
+    clusters, reposts = result.one()
+    return clusters or 0, int(reposts or 0)
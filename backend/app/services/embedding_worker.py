@@ -0,0 +1,87 @@
+"""Standalone embedding worker.
+
+Loads the embedding model once and serves ``POST /embed`` over HTTP or a
+Unix socket, batching concurrent requests dynamically. Point the API and
+jobs at it with ``EMBEDDING_SERVICE_URL`` and run it with:
+
+    python -m app.services.embedding_worker
+"""
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+import logging
+import os
+
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+from app.config import get_settings
+from app.services.embeddings import DynamicBatcher, create_backend
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+backend = create_backend(
+    settings.embedding_model,
+    settings.embedding_batch_size,
+    onnx_file=settings.embedding_onnx_file or None,
+)
+batcher = DynamicBatcher(
+    backend.encode,
+    max_batch_size=settings.embedding_batch_size,
+    max_wait_seconds=settings.embedding_batch_max_wait_ms / 1000,
+    # One inference thread: the model is already parallel internally
+    executor=ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding"),
+)
+
+
+class EmbedRequest(BaseModel):
+    texts: list[str]
+
+
+class EmbedResponse(BaseModel):
+    vectors: list[list[float]]
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the model before accepting requests
+    backend.encode(["warmup"])
+    await batcher.start()
+    logger.info(f"Embedding worker ready ({settings.embedding_model})")
+    yield
+    await batcher.stop()
+
+
+app = FastAPI(title="TeleScope embedding worker", lifespan=lifespan)
+
+
+@app.post("/embed", response_model=EmbedResponse)
+async def embed(request: EmbedRequest):
+    return EmbedResponse(vectors=await batcher.embed(request.texts))
+
+
+@app.get("/health")
+async def health():
+    return {
+        "status": "ok",
+        "model": settings.embedding_model,
+        "batching": dict(batcher.stats),
+    }
+
+
+def main() -> None:
+    import uvicorn
+
+    url = settings.embedding_service_url or "http://127.0.0.1:8100"
+    parsed = urlparse(url)
+    if parsed.scheme == "unix":
+        if os.path.exists(parsed.path):
+            os.remove(parsed.path)
+        uvicorn.run(app, uds=parsed.path)
+    else:
+        uvicorn.run(app, host=parsed.hostname or "127.0.0.1", port=parsed.port or 8100)
+
+
+if __name__ == "__main__":
+    main()
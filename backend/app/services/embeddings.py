@@ -0,0 +1,305 @@
+"""Embedding backends, request batching and the embedding service client.
+
+The model can run in-process or in the standalone embedding worker
+(``app.services.embedding_worker``), which loads it once and serves every
+API worker, collector and job through ``EmbeddingServiceClient``.
+
+``Settings.embedding_model`` selects the backend: a plain model name runs
+SentenceTransformer on PyTorch, ``onnx:<model>`` runs the model's ONNX
+export on ONNX Runtime and ``onnx-int8:<model>`` its int8-quantized export.
+"""
+from typing import Any, Callable, Optional
+from urllib.parse import urlparse
+import asyncio
+import json
+import logging
+import threading
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class SentenceTransformerBackend:
+    """Lazily loaded SentenceTransformer model; thread-safe to call from executors."""
+
+    def __init__(self, model_name: str, batch_size: int = 64):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _get_model(self) -> Any:
+        with self._lock:
+            if self._model is None:
+                from sentence_transformers import SentenceTransformer
+                self._model = SentenceTransformer(self.model_name)
+        return self._model
+
+    def encode(self, texts: list[str]) -> list[list[float]]:
+        embeddings = self._get_model().encode(
+            texts,
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+        )
+        return embeddings.tolist()
+
+
+class OnnxBackend:
+    """Sentence embeddings on ONNX Runtime, without PyTorch.
+
+    Loads ``onnx/model.onnx`` (or the int8-quantized export) and the
+    tokenizer from the model's Hugging Face repository, then applies the
+    same pooling and L2 normalization as SentenceTransformer. Requires the
+    optional ``onnxruntime``, ``tokenizers`` and ``huggingface_hub`` packages.
+    """
+
+    DEFAULT_FILE = "onnx/model.onnx"
+    DEFAULT_INT8_FILE = "onnx/model_quint8_avx2.onnx"
+
+    def __init__(
+        self,
+        model_name: str,
+        batch_size: int = 64,
+        quantized: bool = False,
+        onnx_file: Optional[str] = None,
+    ):
+        self.model_name = model_name
+        self.batch_size = max(1, batch_size)
+        self.onnx_file = onnx_file or (self.DEFAULT_INT8_FILE if quantized else self.DEFAULT_FILE)
+        self._session = None
+        self._tokenizer = None
+        self._input_names: set[str] = set()
+        self._pooling = "mean"
+        self._lock = threading.Lock()
+
+    def _download(self, filename: str) -> Optional[str]:
+        from huggingface_hub import hf_hub_download
+
+        try:
+            return hf_hub_download(self.model_name, filename)
+        except Exception:
+            return None
+
+    def _load(self) -> None:
+        with self._lock:
+            if self._session is not None:
+                return
+
+            import onnxruntime
+            from tokenizers import Tokenizer
+
+            model_path = self._download(self.onnx_file)
+            tokenizer_path = self._download("tokenizer.json")
+            if not model_path or not tokenizer_path:
+                raise RuntimeError(f"{self.model_name} has no {self.onnx_file} or tokenizer.json")
+
+            max_length = 256
+            config_path = self._download("sentence_bert_config.json")
+            if config_path:
+                with open(config_path) as f:
+                    max_length = json.load(f).get("max_seq_length", max_length)
+            pooling_path = self._download("1_Pooling/config.json")
+            if pooling_path:
+                with open(pooling_path) as f:
+                    if json.load(f).get("pooling_mode_cls_token"):
+                        self._pooling = "cls"
+
+            tokenizer = Tokenizer.from_file(tokenizer_path)
+            tokenizer.enable_truncation(max_length=max_length)
+            tokenizer.enable_padding()
+
+            options = onnxruntime.SessionOptions()
+            options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+            session = onnxruntime.InferenceSession(
+                model_path,
+                sess_options=options,
+                providers=["CPUExecutionProvider"],
+            )
+            self._input_names = {model_input.name for model_input in session.get_inputs()}
+            self._tokenizer = tokenizer
+            self._session = session
+
+    def _encode_batch(self, texts: list[str]):
+        import numpy as np
+
+        encodings = self._tokenizer.encode_batch(texts)
+        input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+        attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.array([encoding.type_ids for encoding in encodings], dtype=np.int64)
+
+        token_embeddings = self._session.run(None, feeds)[0]
+        if self._pooling == "cls":
+            pooled = token_embeddings[:, 0]
+        else:
+            mask = attention_mask[..., None].astype(token_embeddings.dtype)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return pooled / np.clip(norms, 1e-12, None)
+
+    def encode(self, texts: list[str]) -> list[list[float]]:
+        self._load()
+        # Batch texts of similar length together to minimise padding
+        order = sorted(range(len(texts)), key=lambda index: len(texts[index]))
+        vectors: list[Optional[list[float]]] = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            indexes = order[start:start + self.batch_size]
+            embeddings = self._encode_batch([texts[index] for index in indexes])
+            for index, embedding in zip(indexes, embeddings.tolist()):
+                vectors[index] = embedding
+        return vectors
+
+
+def create_backend(model_spec: str, batch_size: int = 64, onnx_file: Optional[str] = None):
+    """Build the embedding backend named by ``Settings.embedding_model``."""
+    backend_name, _, model_name = model_spec.partition(":")
+    if backend_name == "onnx" and model_name:
+        return OnnxBackend(model_name, batch_size, onnx_file=onnx_file)
+    if backend_name == "onnx-int8" and model_name:
+        return OnnxBackend(model_name, batch_size, quantized=True, onnx_file=onnx_file)
+    return SentenceTransformerBackend(model_spec, batch_size)
+
+
+class DynamicBatcher:
+    """Coalesce concurrent embedding requests into model-sized batches.
+
+    A batch is dispatched once it holds ``max_batch_size`` texts or
+    ``max_wait_seconds`` after its first request arrived, whichever is first.
+    """
+
+    def __init__(
+        self,
+        encode: Callable[[list[str]], list[list[float]]],
+        max_batch_size: int = 64,
+        max_wait_seconds: float = 0.01,
+        executor=None,
+    ):
+        self._encode = encode
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_seconds = max_wait_seconds
+        self._executor = executor
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"requests": 0, "texts": 0, "batches": 0, "errors": 0}
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        await self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((texts, future))
+        self.stats["requests"] += 1
+        return await future
+
+    async def _next_batch(self) -> list[tuple[list[str], asyncio.Future]]:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        size = len(batch[0][0])
+        deadline = loop.time() + self.max_wait_seconds
+        while size < self.max_batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            texts = [text for item_texts, _ in batch for text in item_texts]
+            try:
+                vectors = await loop.run_in_executor(self._executor, self._encode, texts)
+            except Exception as e:
+                self.stats["errors"] += 1
+                if len(batch) == 1:
+                    self._fail(batch, e)
+                    continue
+                # One bad request must not fail the others: retry each alone
+                for item in batch:
+                    try:
+                        item_vectors = await loop.run_in_executor(self._executor, self._encode, item[0])
+                    except Exception as item_error:
+                        self._fail([item], item_error)
+                        continue
+                    self._resolve([item], item_vectors)
+                continue
+
+            self._resolve(batch, vectors)
+
+    def _resolve(self, batch: list[tuple[list[str], asyncio.Future]], vectors: list[list[float]]) -> None:
+        self.stats["batches"] += 1
+        start = 0
+        for item_texts, future in batch:
+            end = start + len(item_texts)
+            self.stats["texts"] += len(item_texts)
+            if not future.done():
+                future.set_result(vectors[start:end])
+            start = end
+
+    @staticmethod
+    def _fail(batch: list[tuple[list[str], asyncio.Future]], error: Exception) -> None:
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+
+def parse_service_url(url: str) -> tuple[Optional[str], str]:
+    """Split an embedding service URL into (unix socket path, HTTP base URL).
+
+    ``unix:///run/telescope/embed.sock`` talks HTTP over a Unix socket;
+    ``http://127.0.0.1:8100`` over TCP.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme == "unix":
+        return parsed.path, "http://embedding-worker"
+    return None, url.rstrip("/")
+
+
+class EmbeddingServiceClient:
+    """Async client for the standalone embedding worker."""
+
+    def __init__(self, url: str, timeout_seconds: float = 30.0):
+        self.url = url
+        self.timeout_seconds = timeout_seconds
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            socket_path, base_url = parse_service_url(self.url)
+            transport = httpx.AsyncHTTPTransport(uds=socket_path) if socket_path else None
+            self._client = httpx.AsyncClient(
+                base_url=base_url,
+                transport=transport,
+                timeout=self.timeout_seconds,
+            )
+        return self._client
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        response = await self._get_client().post("/embed", json={"texts": texts})
+        response.raise_for_status()
+        return response.json()["vectors"]
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -0,0 +1,86 @@
+"""Persistent cache of resolved Telegram channel entities.
+
+Resolving a username (``client.get_entity``) is a network RPC and the main
+source of FloodWaits when done every polling cycle. The channel ID and
+access hash never change for a given channel, so they are stored on
+``Channel.access_hash``, loaded at startup, and turned into an
+``InputPeerChannel`` in the hot path. Hashes are keyed by Telegram channel
+ID, like the rows they are persisted to; usernames, which can change or
+move to another channel, only point at an ID.
+"""
+from telethon.tl.types import InputPeerChannel
+from sqlalchemy import select, update
+from typing import Optional
+import logging
+
+from app.database import AsyncSessionLocal
+from app.models.channel import Channel
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(username: str) -> str:
+    return username.lstrip("@").lower()
+
+
+class EntityCache:
+    def __init__(self):
+        self._access_hashes: dict[int, int] = {}  # telegram_id -> access_hash
+        self._ids: dict[str, int] = {}  # normalized username -> telegram_id
+
+    def __len__(self) -> int:
+        return len(self._access_hashes)
+
+    async def load(self) -> None:
+        """Load every known (telegram_id, access_hash) pair from the database."""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Channel.username, Channel.telegram_id, Channel.access_hash)
+                .where(Channel.access_hash.isnot(None))
+            )
+            rows = result.all()
+        self._access_hashes = {row.telegram_id: row.access_hash for row in rows}
+        self._ids = {_normalize(row.username): row.telegram_id for row in rows if row.username}
+        logger.info(f"Loaded {len(self._access_hashes)} cached Telegram entities")
+
+    def get_input_peer(self, username: str) -> Optional[InputPeerChannel]:
+        channel_id = self._ids.get(_normalize(username))
+        access_hash = self._access_hashes.get(channel_id) if channel_id is not None else None
+        if access_hash is None:
+            return None
+        return InputPeerChannel(channel_id=channel_id, access_hash=access_hash)
+
+    async def remember(self, username: str, entity, persist: bool = True) -> None:
+        """Cache a resolved entity and store its access hash on the channel row."""
+        access_hash = getattr(entity, "access_hash", None)
+        if access_hash is None:
+            return
+
+        key = _normalize(username)
+        self._ids[key] = entity.id
+        if self._access_hashes.get(entity.id) == access_hash:
+            return
+        self._access_hashes[entity.id] = access_hash
+
+        if not persist:
+            return
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(Channel)
+                    .where(Channel.telegram_id == entity.id)
+                    .values(access_hash=access_hash)
+                )
+                await db.commit()
+        except Exception as e:
+            logger.warning(f"Failed to persist access hash for {key}: {e}")
+
+    def forget(self, username: str) -> None:
+        """Drop a cached entry, e.g. after Telegram rejects a stale access hash."""
+        channel_id = self._ids.pop(_normalize(username), None)
+        if channel_id is not None:
+            self._access_hashes.pop(channel_id, None)
+
+
+# Singleton instance
+entity_cache = EntityCache()
@@ -0,0 +1,111 @@
+"""Hybrid retrieval: full-text and semantic search fused by reciprocal rank.
+
+Both retrievers return message IDs only; the caller hydrates the fused
+top results with a single query.
+"""
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+import asyncio
+
+from sqlalchemy import desc, select
+
+from app.config import get_settings
+from app.models.message import Message
+from app.services.search_index import apply_text_search
+from app.services.vector_store import vector_store
+
+settings = get_settings()
+
+
+def build_vector_filter(
+    channel_ids: Optional[list[UUID]],
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+) -> Optional[dict]:
+    """Translate message filters into a vector store metadata filter."""
+    raw_filter: dict = {}
+    if channel_ids:
+        raw_filter["channel_id"] = {"$in": [str(channel_id) for channel_id in channel_ids]}
+
+    if start_date or end_date:
+        ts_filter: dict = {}
+        if start_date:
+            ts_filter["$gte"] = int(start_date.timestamp())
+        if end_date:
+            ts_filter["$lte"] = int(end_date.timestamp())
+        raw_filter["published_at_ts"] = ts_filter
+
+    return raw_filter or None
+
+
+def reciprocal_rank_fusion(rankings: list[list[str]], k: int = 60) -> list[tuple[str, float]]:
+    """Fuse ranked ID lists; each list adds ``1 / (k + rank)`` per ID.
+
+    Returns:
+        (id, score) pairs, best first
+    """
+    scores: dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking, start=1):
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+async def _lexical_ids(db, query, dialect: str, q: str, limit: int) -> list[str]:
+    query, rank = apply_text_search(query, dialect, q, language=settings.preferred_language)
+    order = [desc(rank)] if rank is not None else []
+    result = await db.execute(query.order_by(*order, desc(Message.published_at)).limit(limit))
+    return [str(message_id) for message_id in result.scalars().all()]
+
+
+async def hybrid_search(
+    db,
+    q: str,
+    channel_ids: Optional[list[UUID]] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    limit: int = 20,
+) -> tuple[list[tuple[str, float]], dict[str, float]]:
+    """Run both retrievers concurrently and fuse their rankings.
+
+    Args:
+        db: Open AsyncSession (used by the full-text retriever only)
+        q: User search input
+        channel_ids: Restrict to these channels
+        start_date: Restrict to messages published at or after this time
+        end_date: Restrict to messages published at or before this time
+        limit: Number of fused results to return
+
+    Returns:
+        (fused, similarity) - fused (id, score) pairs best first, and the
+        semantic similarity of each ID the vector retriever returned
+    """
+    candidates = max(limit, settings.hybrid_search_candidates)
+
+    # Undated messages can't be returned (MessageResponse requires a date)
+    query = select(Message.id).where(Message.published_at.is_not(None))
+    if channel_ids:
+        query = query.where(Message.channel_id.in_(channel_ids))
+    if start_date:
+        query = query.where(Message.published_at >= start_date)
+    if end_date:
+        query = query.where(Message.published_at <= end_date)
+
+    lexical_task = _lexical_ids(db, query, db.get_bind().dialect.name, q, candidates)
+    if await vector_store.ensure_ready():
+        semantic_task = vector_store.query_similar(
+            text=q,
+            top_k=candidates,
+            filter=build_vector_filter(channel_ids, start_date, end_date),
+        )
+        lexical, semantic = await asyncio.gather(lexical_task, semantic_task)
+    else:
+        lexical, semantic = await lexical_task, []
+
+    similarity = {str(match["id"]): match["score"] for match in semantic}
+    fused = reciprocal_rank_fusion(
+        [lexical, [str(match["id"]) for match in semantic]],
+        k=settings.hybrid_search_rrf_k,
+    )
+    return fused[:limit], similarity
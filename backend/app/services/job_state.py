@@ -0,0 +1,26 @@
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+from sqlalchemy import select
+
+from app.models.job_state import JobState
+
+
+async def get_job_cursor(db, name: str) -> Optional[datetime]:
+    result = await db.execute(select(JobState.cursor_at).where(JobState.name == name))
+    return result.scalar_one_or_none()
+
+
+async def set_job_cursor(
+    db,
+    name: str,
+    cursor_at: datetime,
+    metadata: Optional[Dict[str, Any]] = None,
+) -> None:
+    state = await db.get(JobState, name)
+    if state is None:
+        state = JobState(name=name)
+        db.add(state)
+    state.cursor_at = cursor_at
+    if metadata is not None:
+        state.metadata_json = metadata
@@ -0,0 +1,147 @@
+"""Fast, deterministic language identification.
+
+Most channel text can be classified without a statistical model: the
+Unicode script settles non-Latin languages outright, and a handful of
+stopwords separate the common Latin-script languages. ``detect`` returns
+None when neither is conclusive so callers can fall back to langdetect.
+"""
+from collections import Counter
+from typing import Optional
+import re
+
+# (first code point, last code point, script)
+_SCRIPT_RANGES = [
+    (0x0041, 0x024F, "latin"),
+    (0x0370, 0x03FF, "greek"),
+    (0x0400, 0x052F, "cyrillic"),
+    (0x0530, 0x058F, "armenian"),
+    (0x0590, 0x05FF, "hebrew"),
+    (0x0600, 0x06FF, "arabic"),
+    (0x0750, 0x077F, "arabic"),
+    (0x0900, 0x097F, "devanagari"),
+    (0x0E00, 0x0E7F, "thai"),
+    (0x10A0, 0x10FF, "georgian"),
+    (0x3040, 0x30FF, "kana"),
+    (0x4E00, 0x9FFF, "han"),
+    (0xAC00, 0xD7AF, "hangul"),
+]
+
+# Scripts used by a single language (langdetect codes)
+_SINGLE_LANGUAGE_SCRIPTS = {
+    "greek": "el",
+    "armenian": "hy",
+    "hebrew": "he",
+    "devanagari": "hi",
+    "thai": "th",
+    "georgian": "ka",
+    "hangul": "ko",
+    "kana": "ja",
+}
+
+_UKRAINIAN_LETTERS = set("іїєґІЇЄҐ")
+# ъ is left out: it is common in Bulgarian
+_RUSSIAN_LETTERS = set("ыэёЫЭЁ")
+_PERSIAN_LETTERS = set("پچژگ")
+
+_STOPWORDS = {
+    "en": {"the", "and", "of", "to", "in", "is", "that", "for", "on", "with", "was", "are", "this", "by", "from", "have", "has", "it"},
+    "fr": {"le", "la", "les", "des", "et", "est", "une", "dans", "pour", "que", "qui", "sur", "pas", "du", "au", "avec", "sont", "ce"},
+    "es": {"el", "los", "las", "del", "y", "es", "una", "en", "por", "que", "con", "para", "como", "pero", "su", "al", "lo", "se"},
+    "de": {"der", "die", "das", "und", "ist", "nicht", "ein", "eine", "mit", "auf", "den", "von", "zu", "sich", "des", "dem", "im", "auch"},
+    "it": {"il", "di", "che", "e", "la", "per", "una", "sono", "non", "con", "gli", "del", "della", "nel", "alla", "anche", "come", "più"},
+    "pt": {"o", "os", "as", "de", "que", "não", "uma", "com", "para", "em", "por", "mais", "dos", "das", "foi", "ao", "se", "na"},
+    "nl": {"de", "het", "een", "en", "van", "is", "niet", "dat", "op", "te", "met", "voor", "zijn", "ook", "maar", "bij", "er", "aan"},
+    "pl": {"i", "w", "nie", "na", "się", "z", "jest", "do", "że", "to", "o", "jak", "ale", "po", "co", "tak", "przez", "od"},
+    "tr": {"ve", "bir", "bu", "da", "de", "için", "ile", "çok", "olarak", "daha", "gibi", "ama", "olan", "en", "mi", "ne", "var", "kadar"},
+}
+
+_LATIN_LANGUAGES = set(_STOPWORDS)
+_CYRILLIC_LANGUAGES = {"ru", "uk", "bg", "sr", "mk", "be"}
+_ARABIC_LANGUAGES = {"ar", "fa", "ur"}
+
+_WORD_RE = re.compile(r"[^\W\d_]+", re.UNICODE)
+
+# Minimum stopword hits, and lead over the runner-up, to trust a Latin guess
+_MIN_STOPWORD_HITS = 2
+_MIN_STOPWORD_MARGIN = 2
+
+
+def _script_of(char: str) -> Optional[str]:
+    if not char.isalpha():
+        return None
+    code = ord(char)
+    for start, end, script in _SCRIPT_RANGES:
+        if start <= code <= end:
+            return script
+    return None
+
+
+def dominant_script(text: str) -> Optional[str]:
+    counts = Counter(script for script in map(_script_of, text) if script)
+    if not counts:
+        return None
+    script, _ = counts.most_common(1)[0]
+    # Japanese mixes kana with han; any kana makes it Japanese
+    if script == "han" and counts.get("kana"):
+        return "kana"
+    return script
+
+
+def _detect_latin(text: str, prior: Optional[str]) -> Optional[str]:
+    words = [word.lower() for word in _WORD_RE.findall(text)]
+    scores = Counter()
+    for word in words:
+        for lang, stopwords in _STOPWORDS.items():
+            if word in stopwords:
+                scores[lang] += 1
+
+    ranked = scores.most_common(2)
+    if ranked:
+        best_lang, best_hits = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0
+        if best_hits >= _MIN_STOPWORD_HITS and best_hits - runner_up >= _MIN_STOPWORD_MARGIN:
+            return best_lang
+        # Ambiguous between languages the prior agrees with; without any
+        # stopword evidence the prior alone is not enough
+        if prior in _LATIN_LANGUAGES and scores.get(prior, 0) == best_hits:
+            return prior
+    return None
+
+
+def detect(text: str, prior: Optional[str] = None) -> Optional[str]:
+    """Return a language code, or None when the fast path is not conclusive.
+
+    Args:
+        text: Text to classify
+        prior: Expected language, e.g. ``Channel.detected_language``; used
+            to break ties only when it is consistent with the script
+    """
+    script = dominant_script(text)
+    if script is None:
+        return None
+
+    if script in _SINGLE_LANGUAGE_SCRIPTS:
+        return _SINGLE_LANGUAGE_SCRIPTS[script]
+
+    if script == "han":
+        return "zh-cn"
+
+    if script == "cyrillic":
+        letters = set(text)
+        if letters & _UKRAINIAN_LETTERS and not letters & _RUSSIAN_LETTERS:
+            return "uk"
+        if letters & _RUSSIAN_LETTERS and not letters & _UKRAINIAN_LETTERS:
+            return "ru"
+        return prior if prior in _CYRILLIC_LANGUAGES else None
+
+    if script == "arabic":
+        if set(text) & _PERSIAN_LETTERS:
+            return prior if prior in {"fa", "ur"} else "fa"
+        return prior if prior in _ARABIC_LANGUAGES else "ar"
+
+    return _detect_latin(text, prior)
+
+
+def detect_many(texts: list[str], prior: Optional[str] = None) -> list[Optional[str]]:
+    """Classify a batch of texts sharing the same prior (e.g. one channel)."""
+    return [detect(text, prior) for text in texts]
@@ -1,24 +1,38 @@
 from deep_translator import GoogleTranslator
-from langdetect import detect, LangDetectException
+from langdetect import detect, DetectorFactory, LangDetectException
 from openai import AsyncOpenAI
 from app.config import get_settings
 from app.services.usage import record_api_usage
-from app.services.cache import get_redis_client
+from app.services.cache import get_redis_client, TieredCache
+from app.services import language_id
 from typing import Optional
 import asyncio
 import hashlib
+import json
 
 settings = get_settings()
 
+# langdetect is randomized unless seeded; keep fallback detection deterministic
+DetectorFactory.seed = 0
+
 
 class LLMTranslator:
     def __init__(self):
         self.target_language = settings.preferred_language
         self.api_key = settings.openai_api_key
         self.model = settings.openai_model
-        self.cache = {}
         self._client = None
         self._redis = get_redis_client()
+        # Keys are not namespaced so existing Redis entries stay valid
+        self.cache = TieredCache(
+            namespace="",
+            max_size=settings.translation_cache_max_entries,
+            ttl_seconds=settings.translation_cache_ttl_seconds,
+            redis_ttl_seconds=settings.redis_cache_ttl_seconds,
+            redis=self._redis,
+        )
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.detection_stats = {"fast": 0, "fallback": 0, "skipped_target_language": 0}
 
     @property
     def client(self) -> Optional[AsyncOpenAI]:
@@ -28,14 +42,32 @@ class LLMTranslator:
             self._client = AsyncOpenAI(api_key=self.api_key, timeout=30.0)
         return self._client
 
-    def detect_language(self, text: str) -> str:
-        """Detect the language of given text."""
-        try:
+    def detect_language(self, text: str, prior: Optional[str] = None) -> str:
+        """Detect the language of given text.
+
+        Tries the script/stopword fast path first (optionally guided by a
+        channel's known language) and only falls back to langdetect when it
+        is inconclusive.
+        """
+        return self.detect_languages([text], prior=prior)[0]
+
+    def detect_languages(self, texts: list[str], prior: Optional[str] = None) -> list[str]:
+        """Detect the language of a batch of texts sharing the same prior."""
+        detected = []
+        for text, fast in zip(texts, language_id.detect_many(texts, prior=prior)):
             if not text or len(text.strip()) < 10:
-                return "unknown"
-            return detect(text)
-        except LangDetectException:
-            return "unknown"
+                detected.append("unknown")
+                continue
+            if fast:
+                self.detection_stats["fast"] += 1
+                detected.append(fast)
+                continue
+            self.detection_stats["fallback"] += 1
+            try:
+                detected.append(detect(text))
+            except LangDetectException:
+                detected.append("unknown")
+        return detected
 
     def _cache_key(self, text: str, source_lang: str, target_lang: str) -> str:
         text_hash = hashlib.md5(text.encode()).hexdigest()
@@ -92,14 +124,133 @@ class LLMTranslator:
 
         return "".join(translated_chunks)
 
+    async def _translate_pack_with_llm(
+        self,
+        items: list[tuple[str, str]],
+        target_lang: str,
+    ) -> list[Optional[str]]:
+        """Translate several short texts in one chat completion.
+
+        ``items`` are ``(text, source_lang)`` pairs. The model answers with a
+        JSON object keyed by item id; items it drops come back as None.
+        """
+        client = self.client
+        if client is None:
+            raise RuntimeError("OpenAI API key is not configured")
+
+        payload = [
+            {"id": index, "source_language": source_lang, "text": text}
+            for index, (text, source_lang) in enumerate(items)
+        ]
+        response = await client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": (
+                        "You are a professional OSINT translator. "
+                        "Preserve names, dates, numbers, URLs, and tone. "
+                        "You receive a JSON array of items, each with an id, a source_language and a text. "
+                        'Respond with a JSON object {"translations": [{"id": <id>, "text": <translation>}]} '
+                        "containing one entry per item and no extra commentary."
+                    ),
+                },
+                {
+                    "role": "user",
+                    "content": (
+                        f"Target language: {target_lang}\n\n"
+                        f"Items:\n{json.dumps(payload, ensure_ascii=False)}"
+                    ),
+                },
+            ],
+            temperature=0.2,
+            response_format={"type": "json_object"},
+        )
+        if response.usage:
+            await record_api_usage(
+                provider="openai",
+                model=self.model,
+                purpose="translation",
+                prompt_tokens=response.usage.prompt_tokens or 0,
+                completion_tokens=response.usage.completion_tokens or 0,
+                metadata={"batch_size": len(items)},
+            )
+
+        translated: list[Optional[str]] = [None] * len(items)
+        try:
+            data = json.loads(response.choices[0].message.content or "{}")
+        except json.JSONDecodeError:
+            return translated
+        for entry in data.get("translations") or []:
+            if not isinstance(entry, dict):
+                continue
+            index = entry.get("id")
+            text = entry.get("text")
+            if isinstance(index, int) and 0 <= index < len(items) and isinstance(text, str) and text.strip():
+                translated[index] = text.strip()
+        return translated
+
+    async def _translate_uncached(self, text: str, source_lang: str, target_lang: str) -> Optional[str]:
+        """Translate with the LLM, falling back to Google. Returns None if both fail."""
+        try:
+            return await self._translate_with_llm(text, source_lang, target_lang)
+        except Exception as e:
+            print(f"LLM translation failed: {e}")
+            try:
+                return await self._translate_with_google(text, source_lang, target_lang)
+            except Exception as fallback_error:
+                print(f"Fallback translation failed: {fallback_error}")
+                return None
+
+    def _claim(self, cache_key: str) -> tuple[asyncio.Future, bool]:
+        """Return the in-flight future for a key and whether the caller owns it.
+
+        The owner must resolve the future; everyone else just awaits it, so
+        identical texts requested concurrently are translated once.
+        """
+        future = self._inflight.get(cache_key)
+        if future is not None:
+            return future, False
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[cache_key] = future
+        return future, True
+
+    async def _resolve(
+        self,
+        cache_key: str,
+        future: asyncio.Future,
+        translated: Optional[str],
+        store: bool = True,
+    ) -> None:
+        if translated is not None and store:
+            await self.cache.set(cache_key, translated)
+        self._inflight.pop(cache_key, None)
+        if not future.done():
+            future.set_result(translated)
+
+    def _abandon(self, claims: dict[str, asyncio.Future]) -> None:
+        """Release claims whose owner stopped before resolving them.
+
+        Waiters get ``None`` (and fall back to the source text) instead of
+        awaiting a future nobody will complete.
+        """
+        for cache_key, future in claims.items():
+            if future.done():
+                continue
+            if self._inflight.get(cache_key) is future:
+                del self._inflight[cache_key]
+            future.set_result(None)
+
     async def translate(
         self,
         text: str,
         source_lang: Optional[str] = None,
         target_lang: Optional[str] = None,
+        language_prior: Optional[str] = None,
     ) -> tuple[str, str]:
         """
         Translate text to target language (async).
+        ``language_prior`` is the expected source language (e.g. the channel's).
         Returns (translated_text, source_language).
         """
         if not text or len(text.strip()) == 0:
@@ -109,44 +260,165 @@ class LLMTranslator:
             target_lang = self.target_language
 
         if not source_lang or source_lang == "unknown":
-            source_lang = self.detect_language(text)
+            source_lang = self.detect_language(text, prior=language_prior)
 
         if source_lang == target_lang or source_lang == "unknown":
+            if source_lang == target_lang:
+                self.detection_stats["skipped_target_language"] += 1
             return text, source_lang
 
         cache_key = self._cache_key(text, source_lang, target_lang)
-        if self._redis is not None:
-            try:
-                cached = await self._redis.get(cache_key)
-                if cached:
-                    return cached, source_lang
-            except Exception:
-                pass
-        if cache_key in self.cache:
-            return self.cache[cache_key], source_lang
+        cached = await self.cache.get(cache_key)
+        if cached:
+            return cached, source_lang
 
+        future, owner = self._claim(cache_key)
+        if not owner:
+            translated_text = await asyncio.shield(future)
+            return (translated_text or text), source_lang
+
+        translated_text = None
         try:
-            translated_text = await self._translate_with_llm(text, source_lang, target_lang)
-        except Exception as e:
-            print(f"LLM translation failed: {e}")
+            translated_text = await self._translate_uncached(text, source_lang, target_lang)
+        finally:
+            await self._resolve(cache_key, future, translated_text)
+        return (translated_text or text), source_lang
+
+    async def translate_many(
+        self,
+        texts: list[str],
+        source_lang: Optional[str] = None,
+        target_lang: Optional[str] = None,
+        language_prior: Optional[str] = None,
+    ) -> list[tuple[str, str]]:
+        """
+        Translate a batch of texts with bounded concurrency (async).
+
+        Languages are detected for the whole batch up front and texts already
+        in the target language are returned before any hashing or LLM call.
+        Identical texts - within the batch or already being translated by
+        another caller - are translated once. Short texts are packed several
+        per chat completion; long ones go through ``translate``.
+        Returns one (translated_text, source_language) tuple per input text.
+        """
+        if not target_lang:
+            target_lang = self.target_language
+
+        results: list[Optional[tuple[str, str]]] = [None] * len(texts)
+        # cache_key -> (text, source_lang, positions in ``texts``)
+        pending: dict[str, tuple[str, str, list[int]]] = {}
+
+        if source_lang and source_lang != "unknown":
+            languages = [source_lang] * len(texts)
+        else:
+            languages = self.detect_languages(texts, prior=language_prior)
+
+        for index, (text, lang) in enumerate(zip(texts, languages)):
+            if not text or len(text.strip()) == 0:
+                results[index] = (text, "unknown")
+                continue
+            if lang == target_lang or lang == "unknown":
+                if lang == target_lang:
+                    self.detection_stats["skipped_target_language"] += 1
+                results[index] = (text, lang)
+                continue
+            cache_key = self._cache_key(text, lang, target_lang)
+            if cache_key in pending:
+                pending[cache_key][2].append(index)
+            else:
+                pending[cache_key] = (text, lang, [index])
+
+        # One round trip for the whole batch (local tier, then a single Redis MGET)
+        cached_values = await self.cache.get_many(pending.keys())
+
+        owned: dict[str, asyncio.Future] = {}
+        waiting: dict[str, asyncio.Future] = {}
+        for cache_key, (text, lang, positions) in pending.items():
+            cached = cached_values.get(cache_key)
+            if cached:
+                for position in positions:
+                    results[position] = (cached, lang)
+                continue
+            future, owner = self._claim(cache_key)
+            (owned if owner else waiting)[cache_key] = future
+
+        packs: list[list[str]] = []
+        singles: list[str] = []
+        current: list[str] = []
+        current_chars = 0
+        for cache_key in owned:
+            text = pending[cache_key][0]
+            if len(text) > settings.translation_batch_item_max_chars:
+                singles.append(cache_key)
+                continue
+            if current and (
+                len(current) >= settings.translation_batch_size
+                or current_chars + len(text) > settings.translation_batch_max_chars
+            ):
+                packs.append(current)
+                current, current_chars = [], 0
+            current.append(cache_key)
+            current_chars += len(text)
+        if current:
+            packs.append(current)
+
+        semaphore = asyncio.Semaphore(max(1, settings.translation_concurrency))
+
+        async def run_single(cache_key: str) -> None:
+            text, lang, _ = pending[cache_key]
+            translated = None
             try:
-                translated_text = await self._translate_with_google(text, source_lang, target_lang)
-            except Exception as fallback_error:
-                print(f"Fallback translation failed: {fallback_error}")
-                return text, source_lang
+                async with semaphore:
+                    translated = await self._translate_uncached(text, lang, target_lang)
+            finally:
+                await self._resolve(cache_key, owned[cache_key], translated)
 
-        if self._redis is not None:
+        async def run_pack(pack: list[str]) -> None:
+            if len(pack) == 1:
+                await run_single(pack[0])
+                return
+            translations: list[Optional[str]] = [None] * len(pack)
             try:
-                await self._redis.set(
-                    cache_key,
-                    translated_text,
-                    ex=settings.redis_cache_ttl_seconds,
+                try:
+                    async with semaphore:
+                        translations = await self._translate_pack_with_llm(
+                            [(pending[key][0], pending[key][1]) for key in pack],
+                            target_lang,
+                        )
+                except Exception as e:
+                    print(f"Batched LLM translation failed: {e}")
+                # Store the whole pack with one pipelined write
+                await self.cache.set_many(
+                    {key: translated for key, translated in zip(pack, translations) if translated is not None}
                 )
-            except Exception:
-                self.cache[cache_key] = translated_text
-        else:
-            self.cache[cache_key] = translated_text
-        return translated_text, source_lang
+                retries = []
+                for cache_key, translated in zip(pack, translations):
+                    if translated is None:
+                        retries.append(run_single(cache_key))
+                    else:
+                        await self._resolve(cache_key, owned[cache_key], translated, store=False)
+                if retries:
+                    await asyncio.gather(*retries)
+            finally:
+                # Cancelled or failed part way: don't leave the pack's keys claimed
+                self._abandon({key: owned[key] for key in pack})
+
+        try:
+            await asyncio.gather(
+                *(run_pack(pack) for pack in packs),
+                *(run_single(cache_key) for cache_key in singles),
+            )
+        finally:
+            # Covers packs and singles that never started
+            self._abandon(owned)
+
+        for cache_key, future in {**owned, **waiting}.items():
+            text, lang, positions = pending[cache_key]
+            translated = await asyncio.shield(future)
+            for position in positions:
+                results[position] = (translated or text, lang)
+
+        return results
 
 
 # Singleton instance
@@ -0,0 +1,434 @@
+"""In-process vector index used when Qdrant is not configured or unreachable.
+
+Vectors are L2-normalized float32 rows partitioned by UTC day of
+``published_at_ts`` (plus an ``undated`` partition). Each partition is a
+compacted ``.npy`` matrix, memory-mapped on load, followed by an append
+log: upserts only append the new rows (and tombstones for replaced or moved
+points), and the partition is compacted once dead or logged rows outgrow
+the live ones, so writes cost O(new points) amortized.
+Search is a dot product over the partitions a time filter can match,
+followed by a partial sort for the top k. Payload filters use the same
+``$eq``/``$in``/range syntax as ``VectorStore._build_filter``.
+"""
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+
+UNDATED = "undated"
+_DAY_SECONDS = 86400
+_RANGE_OPS = {
+    "$gte": np.greater_equal,
+    "$gt": np.greater,
+    "$lte": np.less_equal,
+    "$lt": np.less,
+}
+# Slack before dead or logged rows trigger a compaction
+_COMPACT_MIN_ROWS = 1024
+
+
+def _partition_key(metadata: dict) -> str:
+    published_at_ts = metadata.get("published_at_ts")
+    if published_at_ts is None:
+        return UNDATED
+    return datetime.fromtimestamp(int(published_at_ts), tz=timezone.utc).strftime("%Y%m%d")
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.clip(norms, 1e-12, None)
+
+
+def _reserve(array: np.ndarray, size: int) -> np.ndarray:
+    """Return ``array`` with room for ``size`` rows, doubling its capacity."""
+    if size <= len(array):
+        return array
+    grown = np.empty((max(size, 2 * len(array), 16),) + array.shape[1:], dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class _Partition:
+    """Compacted base matrix plus an append log.
+
+    Rows are never rewritten in place: replacing or removing a point marks
+    its row dead, and ``rows`` maps each live point ID to its current row.
+    """
+
+    def __init__(self, path: str, dimension: int):
+        self.path = path
+        self.dimension = dimension
+        self._reset()
+        self._load()
+
+    def _reset(self) -> None:
+        self.ids: list[str] = []  # per row, dead rows included
+        self.payloads: list[dict] = []
+        self.rows: dict[str, int] = {}  # live point ID -> row
+        self.size = 0
+        self._base: Optional[np.ndarray] = None
+        self._tail = np.empty((0, self.dimension), dtype=np.float32)
+        self._alive = np.empty(0, dtype=bool)
+        self._timestamps = np.empty(0, dtype=np.float64)
+
+    @property
+    def _base_size(self) -> int:
+        return 0 if self._base is None else len(self._base)
+
+    @property
+    def alive(self) -> np.ndarray:
+        return self._alive[:self.size]
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self._timestamps[:self.size]
+
+    def _file(self, *names: str) -> str:
+        return os.path.join(self.path, *names)
+
+    def _current_generation(self) -> Optional[str]:
+        try:
+            with open(self._file("CURRENT")) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _load(self) -> None:
+        generation = self._current_generation()
+        if os.path.isdir(self.path):
+            # Bases of superseded or interrupted compactions
+            for name in os.listdir(self.path):
+                if name.startswith("base-") and name != generation:
+                    shutil.rmtree(self._file(name), ignore_errors=True)
+        if generation:
+            with open(self._file(generation, "points.json")) as f:
+                points = json.load(f)
+            self._base = np.load(self._file(generation, "vectors.npy"), mmap_mode="r")
+            self._add_rows(points["ids"], points["payloads"])
+
+        log_path = self._file("log.jsonl")
+        if not os.path.exists(log_path):
+            # Vectors appended without any record are from a torn write
+            if os.path.exists(self._file("log.f32")):
+                os.remove(self._file("log.f32"))
+            return
+        vectors = np.empty((0, self.dimension), dtype=np.float32)
+        if os.path.exists(self._file("log.f32")):
+            vectors = np.fromfile(self._file("log.f32"), dtype=np.float32)
+            vectors = vectors[:len(vectors) - len(vectors) % self.dimension].reshape(-1, self.dimension)
+
+        consistent = True
+        logged = 0
+        with open(log_path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    consistent = False  # torn write
+                    break
+                if record.get("deleted"):
+                    self._remove([record["id"]])
+                    continue
+                if logged >= len(vectors):
+                    consistent = False
+                    break
+                self._add_rows([record["id"]], [record["payload"]], vectors[logged:logged + 1])
+                logged += 1
+        if not consistent or logged != len(vectors):
+            # Interrupted append: keep what was read and start a clean log
+            self.compact()
+
+    def _add_rows(self, ids: list[str], payloads: list[dict], vectors: Optional[np.ndarray] = None) -> None:
+        """Append rows in memory; ``vectors`` None means they are already in the base."""
+        start, end = self.size, self.size + len(ids)
+        if vectors is not None:
+            tail_end = end - self._base_size
+            self._tail = _reserve(self._tail, tail_end)
+            self._tail[tail_end - len(ids):tail_end] = vectors
+        self._alive = _reserve(self._alive, end)
+        self._timestamps = _reserve(self._timestamps, end)
+        self._alive[start:end] = True
+        # Missing timestamps are NaN so range comparisons exclude them
+        self._timestamps[start:end] = [payload.get("published_at_ts", np.nan) for payload in payloads]
+        for row, point_id in enumerate(ids, start):
+            previous = self.rows.get(point_id)
+            if previous is not None:
+                self._alive[previous] = False
+            self.rows[point_id] = row
+        self.ids.extend(ids)
+        self.payloads.extend(payloads)
+        self.size = end
+
+    def _remove(self, ids: Iterable[str]) -> None:
+        for point_id in ids:
+            row = self.rows.pop(point_id, None)
+            if row is not None:
+                self._alive[row] = False
+
+    def vector(self, row: int) -> np.ndarray:
+        if row < self._base_size:
+            return self._base[row]
+        return self._tail[row - self._base_size]
+
+    def scores(self, queries: np.ndarray) -> np.ndarray:
+        """Dot products of every row (dead ones included) with each query."""
+        parts = []
+        if self._base is not None:
+            parts.append(np.asarray(self._base) @ queries.T)
+        tail_size = self.size - self._base_size
+        if tail_size:
+            parts.append(self._tail[:tail_size] @ queries.T)
+        if not parts:
+            return np.empty((0, len(queries)), dtype=np.float32)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def apply(self, points: dict[str, tuple[np.ndarray, dict]], removed: Iterable[str] = ()) -> None:
+        """Record new or replaced points and removals, appending to the log."""
+        removed = [point_id for point_id in removed if point_id in self.rows and point_id not in points]
+        if not points and not removed:
+            return
+
+        os.makedirs(self.path, exist_ok=True)
+        ids = list(points)
+        payloads = [payload for _, payload in points.values()]
+        vectors = np.array([vector for vector, _ in points.values()], dtype=np.float32).reshape(-1, self.dimension)
+        # Vectors first: a record without its vector is detected as torn on load
+        with open(self._file("log.f32"), "ab") as f:
+            f.write(vectors.tobytes())
+        with open(self._file("log.jsonl"), "a") as f:
+            for point_id in removed:
+                f.write(json.dumps({"id": point_id, "deleted": True}) + "\n")
+            for point_id, payload in zip(ids, payloads):
+                f.write(json.dumps({"id": point_id, "payload": payload}) + "\n")
+
+        self._remove(removed)
+        self._add_rows(ids, payloads, vectors)
+
+        live = len(self.rows)
+        dead = self.size - live
+        logged = self.size - self._base_size
+        if dead > live // 2 + _COMPACT_MIN_ROWS or logged > self._base_size + _COMPACT_MIN_ROWS or not live:
+            self.compact()
+
+    def compact(self) -> None:
+        """Rewrite the live rows as the base matrix and drop the log."""
+        live_rows = sorted(self.rows.values())
+        if not live_rows:
+            self._reset()
+            shutil.rmtree(self.path, ignore_errors=True)
+            return
+
+        ids = [self.ids[row] for row in live_rows]
+        payloads = [self.payloads[row] for row in live_rows]
+        vectors = np.empty((len(live_rows), self.dimension), dtype=np.float32)
+        for position, row in enumerate(live_rows):
+            vectors[position] = self.vector(row)
+
+        previous = self._current_generation()
+        number = int(previous.split("-")[1]) + 1 if previous else 1
+        generation = f"base-{number:06d}"
+        os.makedirs(self._file(generation), exist_ok=True)
+        np.save(self._file(generation, "vectors.npy"), vectors)
+        with open(self._file(generation, "points.json"), "w") as f:
+            json.dump({"ids": ids, "payloads": payloads}, f)
+        # Switching the pointer is the single atomic step of the compaction
+        with open(self._file("CURRENT.tmp"), "w") as f:
+            f.write(generation)
+        os.replace(self._file("CURRENT.tmp"), self._file("CURRENT"))
+
+        # Replaying a leftover log over the new base is harmless: it only
+        # re-applies the same replacements
+        self._reset()
+        for name in ("log.f32", "log.jsonl"):
+            if os.path.exists(self._file(name)):
+                os.remove(self._file(name))
+        if previous:
+            shutil.rmtree(self._file(previous), ignore_errors=True)
+        self._load()
+
+    def mask(self, raw_filter: Optional[dict]) -> np.ndarray:
+        mask = self.alive.copy()
+        for key, condition in (raw_filter or {}).items():
+            if key == "published_at_ts" and isinstance(condition, dict):
+                for op, compare in _RANGE_OPS.items():
+                    if op in condition:
+                        mask &= compare(self.timestamps, condition[op])
+                if "$eq" not in condition and "$in" not in condition:
+                    continue
+
+            if isinstance(condition, dict) and "$in" in condition:
+                allowed = set(condition["$in"])
+                values = np.array([payload.get(key) in allowed for payload in self.payloads], dtype=bool)
+            elif isinstance(condition, dict) and "$eq" in condition:
+                values = np.array([payload.get(key) == condition["$eq"] for payload in self.payloads], dtype=bool)
+            elif isinstance(condition, dict):
+                values = np.ones(self.size, dtype=bool)
+                for op, compare in _RANGE_OPS.items():
+                    if op in condition:
+                        column = np.array(
+                            [payload.get(key, np.nan) for payload in self.payloads], dtype=np.float64
+                        )
+                        values &= compare(column, condition[op])
+            else:
+                values = np.array([payload.get(key) == condition for payload in self.payloads], dtype=bool)
+            mask &= values
+        return mask
+
+
+class LocalVectorIndex:
+    """Persistent, time-partitioned brute-force vector index."""
+
+    def __init__(self, path: str, dimension: int):
+        self.path = path
+        self.dimension = dimension
+        self._lock = threading.Lock()
+        self._partitions: dict[str, _Partition] = {}
+        self._locations: dict[str, str] = {}  # point ID -> partition key
+        os.makedirs(path, exist_ok=True)
+        for key in sorted(os.listdir(path)):
+            partition = _Partition(os.path.join(path, key), dimension)
+            if partition.rows:
+                self._partitions[key] = partition
+                for point_id in partition.rows:
+                    self._locations[point_id] = key
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def _get_partition(self, key: str) -> _Partition:
+        if key not in self._partitions:
+            self._partitions[key] = _Partition(os.path.join(self.path, key), self.dimension)
+        return self._partitions[key]
+
+    def upsert(self, points: list[tuple[str, list[float], dict]]) -> None:
+        """Insert or replace ``(id, vector, payload)`` points."""
+        if not points:
+            return
+
+        with self._lock:
+            incoming: dict[str, dict[str, tuple[list[float], dict]]] = {}
+            for point_id, vector, payload in points:
+                if len(vector) != self.dimension:
+                    raise ValueError(f"Expected {self.dimension}-dimensional vectors, got {len(vector)}")
+                incoming.setdefault(_partition_key(payload), {})[str(point_id)] = (vector, payload)
+
+            # Points whose timestamp moved them to another partition leave the old one
+            moved: dict[str, set[str]] = {}
+            for key, new_points in incoming.items():
+                for point_id in new_points:
+                    old_key = self._locations.get(point_id)
+                    if old_key is not None and old_key != key:
+                        moved.setdefault(old_key, set()).add(point_id)
+
+            for key in set(incoming) | set(moved):
+                partition = self._get_partition(key)
+                new_points = incoming.get(key, {})
+                if new_points:
+                    vectors = _normalize(np.array([vector for vector, _ in new_points.values()], dtype=np.float32))
+                    new_points = {
+                        point_id: (vector, payload)
+                        for (point_id, (_, payload)), vector in zip(new_points.items(), vectors)
+                    }
+                partition.apply(new_points, moved.get(key, ()))
+
+                for point_id in moved.get(key, set()):
+                    if self._locations.get(point_id) == key:
+                        del self._locations[point_id]
+                for point_id in new_points:
+                    self._locations[point_id] = key
+                if not partition.rows:
+                    del self._partitions[key]
+
+    def retrieve(self, ids: list[str]) -> dict[str, list[float]]:
+        with self._lock:
+            vectors = {}
+            for point_id in ids:
+                key = self._locations.get(str(point_id))
+                if key is None:
+                    continue
+                partition = self._partitions[key]
+                vectors[str(point_id)] = partition.vector(partition.rows[str(point_id)]).tolist()
+            return vectors
+
+    @staticmethod
+    def _partition_matches(key: str, raw_filter: Optional[dict]) -> bool:
+        """Whether a time filter can match any point of the partition."""
+        ts_filter = (raw_filter or {}).get("published_at_ts")
+        if not isinstance(ts_filter, dict):
+            return True
+        if key == UNDATED:
+            return False
+
+        low = ts_filter.get("$gte", ts_filter.get("$gt"))
+        high = ts_filter.get("$lte", ts_filter.get("$lt"))
+        day_start = int(datetime.strptime(key, "%Y%m%d").replace(tzinfo=timezone.utc).timestamp())
+        if low is not None and day_start + _DAY_SECONDS <= low:
+            return False
+        if high is not None and day_start > high:
+            return False
+        return True
+
+    def search_batch(
+        self,
+        vectors: list[list[float]],
+        top_k: int = 5,
+        filters: Optional[list[Optional[dict]]] = None,
+        exclude_ids: Optional[list[Optional[str]]] = None,
+    ) -> list[list[dict]]:
+        """Top-k dot-product search, one result list per query vector."""
+        if not vectors:
+            return []
+        filters = filters or [None] * len(vectors)
+        exclude_ids = exclude_ids or [None] * len(vectors)
+        queries = _normalize(np.array(vectors, dtype=np.float32))
+        scored: list[list[tuple[float, _Partition, int]]] = [[] for _ in vectors]
+
+        with self._lock:
+            for key, partition in self._partitions.items():
+                members = [
+                    index for index, raw_filter in enumerate(filters)
+                    if self._partition_matches(key, raw_filter)
+                ]
+                if not members:
+                    continue
+
+                # One matrix product scores every query against the partition
+                scores = partition.scores(queries[members])
+                masks: dict[str, np.ndarray] = {}
+                for position, index in enumerate(members):
+                    # Also drops replaced and removed rows
+                    filter_key = json.dumps(filters[index], sort_keys=True, default=str)
+                    if filter_key not in masks:
+                        masks[filter_key] = partition.mask(filters[index])
+                    mask = masks[filter_key]
+                    exclude_id = exclude_ids[index]
+                    if exclude_id is not None and self._locations.get(exclude_id) == key:
+                        mask = mask.copy()
+                        mask[partition.rows[exclude_id]] = False
+
+                    candidates = int(mask.sum())
+                    if not candidates:
+                        continue
+                    column = np.where(mask, scores[:, position], -np.inf)
+                    k = min(top_k, candidates)
+                    best = np.argpartition(-column, k - 1)[:k]
+                    scored[index].extend((float(column[row]), partition, int(row)) for row in best)
+
+            results = []
+            for matches in scored:
+                matches.sort(key=lambda item: item[0], reverse=True)
+                results.append(
+                    [
+                        {
+                            "id": partition.ids[row],
+                            "score": score,
+                            "metadata": partition.payloads[row],
+                        }
+                        for score, partition, row in matches[:top_k]
+                    ]
+                )
+            return results
@@ -0,0 +1,57 @@
+"""Bulk message writer shared by every ingest path.
+
+Rows go in as one multi-row ``INSERT ... ON CONFLICT (channel_id,
+telegram_message_id) DO NOTHING RETURNING id`` against the unique index
+``ix_messages_channel_telegram_id``, so callers don't need to SELECT for
+existing IDs first and no ORM objects are built or flushed.
+"""
+from typing import Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.models.message import Message
+
+_CONFLICT_COLUMNS = ["channel_id", "telegram_message_id"]
+
+
+def dialect_insert(db):
+    """``insert`` construct with ``on_conflict_do_nothing`` for the session's database."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql_insert
+    if dialect == "sqlite":
+        return sqlite_insert
+    raise NotImplementedError(f"Bulk insert is not supported on {dialect}")
+
+
+async def insert_messages(db, rows: list[dict], channel_id: Optional[UUID] = None) -> list[UUID]:
+    """Insert message rows, skipping ones already stored.
+
+    Args:
+        db: Open AsyncSession; the caller commits
+        rows: Column values for ``Message``. Rows without an ``id`` get one
+            assigned in place, so callers can tell which rows were inserted;
+            other missing defaults such as ``fetched_at`` come from the model
+        channel_id: Applied to rows that don't carry their own
+
+    Returns:
+        IDs of the rows actually inserted
+    """
+    if not rows:
+        return []
+
+    for row in rows:
+        row.setdefault("id", uuid4())
+    if channel_id is not None:
+        rows = [{"channel_id": channel_id, **row} for row in rows]
+
+    insert = dialect_insert(db)
+    statement = (
+        insert(Message)
+        .on_conflict_do_nothing(index_elements=_CONFLICT_COLUMNS)
+        .returning(Message.id)
+    )
+    result = await db.execute(statement, rows)
+    return list(result.scalars().all())
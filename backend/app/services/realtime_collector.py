@@ -3,26 +3,40 @@ Real-time Telegram message collector using Telethon event handlers.
 
 This service listens for new messages from followed channels in real-time,
 rather than polling every few minutes. Includes auto-reconnect on errors.
+Events are queued and stored by worker tasks in micro-batches so bursts
+don't stall Telethon's update loop.
 """
-from telethon import TelegramClient, events
-from telethon.tl.types import Channel
-from telethon.errors import FloodWaitError, ConnectionError as TelethonConnectionError
+from telethon import events, utils
+from telethon.tl.types import PeerChannel
+from telethon.errors import FloodWaitError
 from app.config import get_settings
 from app.database import AsyncSessionLocal
 from app.models.channel import Channel as ChannelModel
-from app.models.message import Message
 from app.services.translator import translator
-from app.services.telegram_collector import _telegram_lock
-from sqlalchemy import select
+from app.services.message_writer import insert_messages
+from app.services.alert_matcher import alert_matcher
+from app.services.telegram_client import telegram_client_manager
+from app.services.telegram_collector import TelegramCollector
+from app.services.channel_events import channel_events, ChannelEvent, CHANNEL_ADDED, CHANNEL_REMOVED
+from sqlalchemy import or_, select, update
 from datetime import datetime, timezone
+from typing import NamedTuple, Optional
+from uuid import UUID
 import asyncio
-import os
-import json
 import logging
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+
+class MonitoredChannel(NamedTuple):
+    """What the hot path needs to know about a monitored channel."""
+
+    id: UUID
+    title: Optional[str]
+    language: Optional[str]
+
+
 # Reconnection settings
 RECONNECT_BASE_DELAY = 5  # seconds
 RECONNECT_MAX_DELAY = 300  # 5 minutes
@@ -37,13 +51,20 @@ class RealtimeCollector:
     """
 
     def __init__(self):
-        self.api_id = settings.telegram_api_id
-        self.api_hash = settings.telegram_api_hash
-        self.phone = settings.telegram_phone
         self.client = None
         self.running = False
-        self._channel_ids = set()  # Telegram channel IDs we're monitoring
+        self._channels: dict[int, MonitoredChannel] = {}  # Telegram channel ID -> channel
         self._reconnect_attempts = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: list[asyncio.Task] = []
+        self.queue_stats = {
+            "enqueued": 0,
+            "processed": 0,
+            "batches": 0,
+            "blocked": 0,
+            "errors": 0,
+            "max_depth": 0,
+        }
 
     async def start(self):
         """Start the real-time collector with auto-reconnect loop."""
@@ -53,6 +74,16 @@ class RealtimeCollector:
         self.running = True
         logger.info("Starting real-time collector...")
 
+        # Bounded ingest queue drained by micro-batch workers
+        self._queue = asyncio.Queue(maxsize=settings.realtime_queue_size)
+        self._workers = [
+            asyncio.create_task(self._batch_worker())
+            for _ in range(max(1, settings.realtime_workers))
+        ]
+
+        # Apply channel additions/removals as soon as they happen
+        channel_events.subscribe(self._on_channel_event)
+
         # Start the main loop with auto-reconnect
         asyncio.create_task(self._run_with_reconnect())
 
@@ -68,7 +99,7 @@ class RealtimeCollector:
                 )
                 await asyncio.sleep(wait_time)
                 self._reconnect_attempts = 0  # Reset after successful wait
-            except (ConnectionError, TelethonConnectionError, OSError) as e:
+            except (ConnectionError, OSError) as e:
                 delay = min(
                     RECONNECT_BASE_DELAY * (2 ** self._reconnect_attempts),
                     RECONNECT_MAX_DELAY
@@ -86,132 +117,89 @@ class RealtimeCollector:
         logger.info("Real-time collector stopped")
 
     async def _connect_and_listen(self):
-        """Connect to Telegram and start listening for messages."""
-        os.makedirs("data", exist_ok=True)
-
-        # Use the same session file as the regular collector
-        async with _telegram_lock:
-            self.client = TelegramClient(
-                "data/telegram_session",
-                self.api_id,
-                self.api_hash
-            )
-            await self.client.start(phone=self.phone)
+        """Attach to the shared Telegram client and start listening for messages."""
+        self.client = await telegram_client_manager.get_client()
 
         self._reconnect_attempts = 0  # Reset on successful connection
         logger.info("Real-time collector connected to Telegram")
 
-        # Load channels we're following
+        # Load channels we're following; later changes arrive as channel events,
+        # and reloading on every (re)connect covers any missed while offline
         await self.refresh_channels()
 
-        # Register event handler for new messages
-        @self.client.on(events.NewMessage())
-        async def handle_new_message(event):
-            await self._process_message(event)
+        # Register event handler for new messages (once per client)
+        self.client.remove_event_handler(self._process_message)
+        self.client.add_event_handler(self._process_message, events.NewMessage())
 
         logger.info("Real-time collector listening for messages")
 
-        # Keep the client running and periodically refresh channels
+        # Keep the client running
         await self._keep_alive()
 
     async def _keep_alive(self):
-        """Keep the client connection alive and refresh channel list."""
+        """Wait until the client disconnects or the collector is stopped."""
         while self.running and self.client and self.client.is_connected():
             await asyncio.sleep(60)
-            # Periodically refresh channel list
-            try:
-                await self.refresh_channels()
-            except Exception as e:
-                logger.warning(f"Error refreshing channels: {e}")
 
     async def refresh_channels(self):
-        """Refresh the list of channels we're monitoring."""
+        """Refresh the map of channels we're monitoring."""
         async with AsyncSessionLocal() as db:
             result = await db.execute(
-                select(ChannelModel.telegram_id).where(ChannelModel.is_active == True)
+                select(
+                    ChannelModel.telegram_id,
+                    ChannelModel.id,
+                    ChannelModel.title,
+                    ChannelModel.detected_language,
+                ).where(ChannelModel.is_active == True)
             )
-            channel_ids = {row[0] for row in result.all()}
-            self._channel_ids = channel_ids
-            logger.debug(f"Monitoring {len(channel_ids)} channels")
+            channels = {
+                row.telegram_id: MonitoredChannel(row.id, row.title, row.detected_language)
+                for row in result.all()
+            }
+            # Swap in one assignment so event handlers never see a partial map
+            self._channels = channels
+            logger.debug(f"Monitoring {len(channels)} channels")
+
+    async def _on_channel_event(self, event: ChannelEvent) -> None:
+        """Update the monitored map in place of polling the database."""
+        channels = dict(self._channels)
+        if event.action == CHANNEL_ADDED:
+            channels[event.telegram_id] = MonitoredChannel(event.channel_id, event.title, event.language)
+        elif event.action == CHANNEL_REMOVED:
+            channels.pop(event.telegram_id, None)
+        else:
+            return
+        self._channels = channels
+        logger.info(f"Channel {event.telegram_id} {event.action}; monitoring {len(channels)} channels")
 
     async def _process_message(self, event):
-        """Process an incoming message with error handling."""
+        """Accept an incoming message and enqueue it for the batch workers.
+
+        Nothing slow happens here (no translation, no DB write) so Telethon's
+        update loop keeps up during bursts. When the queue is full the
+        handler waits, which applies backpressure to the update loop.
+        """
         try:
-            # Check if message is from a channel we're following
-            if not event.is_channel:
+            # Check if message is from a channel we're following, using only
+            # the peer ID carried by the update (no DB or network lookup)
+            if not event.is_channel or event.chat_id is None:
                 return
 
-            chat = await event.get_chat()
-            if not isinstance(chat, Channel):
+            telegram_id, peer_type = utils.resolve_id(event.chat_id)
+            if peer_type is not PeerChannel:
                 return
 
-            telegram_id = chat.id
-            if telegram_id not in self._channel_ids:
+            channel = self._channels.get(telegram_id)
+            if channel is None:
                 return
 
             # Skip messages without text
-            if not event.message.text:
+            msg_data = TelegramCollector._extract_message_data(event.message)
+            if not msg_data:
                 return
 
-            logger.info(f"New real-time message from {chat.title}")
-
-            # Get channel from database
-            async with AsyncSessionLocal() as db:
-                result = await db.execute(
-                    select(ChannelModel).where(ChannelModel.telegram_id == telegram_id)
-                )
-                channel = result.scalar_one_or_none()
-
-                if not channel:
-                    return
-
-                # Check if message already exists
-                existing = await db.execute(
-                    select(Message).where(
-                        Message.channel_id == channel.id,
-                        Message.telegram_message_id == event.message.id
-                    )
-                )
-                if existing.scalar_one_or_none():
-                    return
-
-                channel_id = channel.id
-
-            # Translate message (outside DB session - this is slow)
-            translated_text, source_lang = await translator.translate(event.message.text)
-
-            # Determine media type
-            media_type = None
-            media_urls = []
-            if event.message.media:
-                if hasattr(event.message.media, 'photo'):
-                    media_type = 'photo'
-                elif hasattr(event.message.media, 'document'):
-                    media_type = 'document'
-                elif hasattr(event.message.media, 'video'):
-                    media_type = 'video'
-
-            # Save to database
-            async with AsyncSessionLocal() as db:
-                message = Message(
-                    channel_id=channel_id,
-                    telegram_message_id=event.message.id,
-                    original_text=event.message.text,
-                    translated_text=translated_text,
-                    source_language=source_lang,
-                    target_language=settings.preferred_language,
-                    media_type=media_type,
-                    media_urls=media_urls,
-                    published_at=event.message.date,
-                    translated_at=datetime.now(timezone.utc),
-                )
-                db.add(message)
-                await db.commit()
-
-            logger.info(
-                f"Saved real-time message from {chat.title}: "
-                f"{event.message.text[:50]}..."
-            )
+            msg_data['channel'] = channel
+            await self._enqueue(msg_data)
 
         except FloodWaitError as e:
             logger.warning(f"FloodWaitError processing message: {e.seconds}s wait required")
@@ -220,16 +208,125 @@ class RealtimeCollector:
         except Exception as e:
             logger.error(f"Error processing real-time message: {e}")
 
+    async def _enqueue(self, msg_data: dict) -> None:
+        if self._queue.full():
+            self.queue_stats["blocked"] += 1
+        await self._queue.put(msg_data)
+        self.queue_stats["enqueued"] += 1
+        self.queue_stats["max_depth"] = max(self.queue_stats["max_depth"], self._queue.qsize())
+
+    async def _next_batch(self) -> list[dict]:
+        """Wait for one message, then gather more until the batch is full or the window closes."""
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.realtime_batch_window_seconds
+        while len(batch) < settings.realtime_batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _batch_worker(self):
+        """Drain the queue in micro-batches: translate concurrently, then bulk insert."""
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._store_batch(batch)
+                self.queue_stats["processed"] += len(batch)
+                self.queue_stats["batches"] += 1
+            except Exception as e:
+                self.queue_stats["errors"] += 1
+                logger.error(f"Error storing real-time batch of {len(batch)} messages: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _store_batch(self, batch: list[dict]) -> None:
+        # Translate outside any DB session - this is slow. Messages are grouped
+        # by their channel's language so it can serve as the detection prior.
+        by_language: dict[Optional[str], list[dict]] = {}
+        for msg in batch:
+            by_language.setdefault(msg['channel'].language, []).append(msg)
+        groups = list(by_language.items())
+        results = await asyncio.gather(*(
+            translator.translate_many([msg['text'] for msg in messages], language_prior=language)
+            for language, messages in groups
+        ))
+        batch = [msg for _, messages in groups for msg in messages]
+        translations = [translation for group in results for translation in group]
+
+        rows = []
+        for msg, (translated_text, source_lang) in zip(batch, translations):
+            rows.append({
+                'channel_id': msg['channel'].id,
+                'telegram_message_id': msg['message_id'],
+                'original_text': msg['text'],
+                'translated_text': translated_text,
+                'source_language': source_lang,
+                'target_language': settings.preferred_language,
+                'media_type': msg.get('media_type'),
+                'media_urls': msg.get('media_urls', []),
+                'published_at': msg['date'],
+                'translated_at': datetime.now(timezone.utc),
+            })
+
+        # Highest message seen per channel, so the polling job starts after it
+        cursors: dict[UUID, int] = {}
+        for row in rows:
+            cursors[row['channel_id']] = max(cursors.get(row['channel_id'], 0), row['telegram_message_id'])
+
+        # Save to database (rows the polling job already stored are skipped)
+        async with AsyncSessionLocal() as db:
+            inserted_ids = await insert_messages(db, rows)
+            for channel_id, last_message_id in cursors.items():
+                await db.execute(
+                    update(ChannelModel)
+                    .where(
+                        ChannelModel.id == channel_id,
+                        or_(
+                            ChannelModel.last_message_id.is_(None),
+                            ChannelModel.last_message_id < last_message_id,
+                        ),
+                    )
+                    .values(last_message_id=last_message_id)
+                )
+            await db.commit()
+
+        logger.info(f"Saved {len(inserted_ids)} real-time messages (batch of {len(batch)})")
+        inserted = set(inserted_ids)
+        await alert_matcher.process([row for row in rows if row['id'] in inserted])
+
+    def queue_metrics(self) -> dict:
+        """Backpressure metrics for the ingest queue."""
+        return {
+            **self.queue_stats,
+            "depth": self._queue.qsize() if self._queue else 0,
+            "capacity": settings.realtime_queue_size,
+            "workers": len(self._workers),
+        }
+
     async def stop(self):
         """Stop the real-time collector."""
         logger.info("Stopping real-time collector...")
         self.running = False
+        channel_events.unsubscribe(self._on_channel_event)
         if self.client:
-            try:
-                await self.client.disconnect()
-            except Exception as e:
-                logger.warning(f"Error disconnecting client: {e}")
+            # The client is shared; only detach our handler
+            self.client.remove_event_handler(self._process_message)
             self.client = None
+        # Let queued messages be stored before stopping the workers
+        if self._queue is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=settings.realtime_batch_window_seconds * 5)
+            except asyncio.TimeoutError:
+                logger.warning(f"Dropping {self._queue.qsize()} queued real-time messages")
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
         logger.info("Real-time collector stopped")
 
 
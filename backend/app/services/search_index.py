@@ -0,0 +1,214 @@
+"""Full-text search over message text.
+
+PostgreSQL keeps a generated ``messages.search_vector`` tsvector (GIN
+indexed) with exact word forms plus stems in each message's own language,
+created by migration ``7f2a4c9d1e68``. SQLite keeps an FTS5 table filled
+by triggers, created at startup. Both are maintained by the
+database on insert/update, so every ingest path is covered.
+
+Queries use a small syntax shared by both backends: bare words must all
+match, ``"quoted phrases"`` match in order, ``word*`` matches a prefix and
+``-word`` excludes.
+"""
+from dataclasses import dataclass, field
+from typing import Optional
+import logging
+import re
+
+from sqlalchemy import false, func, literal_column, or_, table, column
+
+from app.models.message import Message
+
+logger = logging.getLogger(__name__)
+
+# langdetect code -> PostgreSQL text search configuration (PostgreSQL 12+).
+# The generated column uses the copy frozen in migration 7f2a4c9d1e68:
+# changing this mapping needs a migration that redefines the column.
+TEXT_SEARCH_CONFIGS = {
+    "ar": "arabic",
+    "da": "danish",
+    "de": "german",
+    "en": "english",
+    "es": "spanish",
+    "fi": "finnish",
+    "fr": "french",
+    "hu": "hungarian",
+    "it": "italian",
+    "nl": "dutch",
+    "no": "norwegian",
+    "pt": "portuguese",
+    "ro": "romanian",
+    "ru": "russian",
+    "sv": "swedish",
+    "tr": "turkish",
+}
+
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5("
+    "message_id UNINDEXED, original_text, translated_text, "
+    "tokenize = 'unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN "
+    "INSERT INTO messages_fts (message_id, original_text, translated_text) "
+    "VALUES (new.id, new.original_text, new.translated_text); END",
+    "CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF original_text, translated_text ON messages BEGIN "
+    "DELETE FROM messages_fts WHERE message_id = old.id; "
+    "INSERT INTO messages_fts (message_id, original_text, translated_text) "
+    "VALUES (new.id, new.original_text, new.translated_text); END",
+    "CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN "
+    "DELETE FROM messages_fts WHERE message_id = old.id; END",
+]
+
+# BM25 column weights for (message_id, original_text, translated_text)
+_SQLITE_BM25_WEIGHTS = (0.0, 2.0, 1.0)
+
+_messages_fts = table("messages_fts", column("message_id"))
+_search_vector = literal_column("messages.search_vector")
+
+_TOKEN_RE = re.compile(r'(-?)"([^"]*)"|(\S+)')
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+@dataclass
+class SearchQuery:
+    terms: list[str] = field(default_factory=list)
+    prefixes: list[str] = field(default_factory=list)
+    phrases: list[list[str]] = field(default_factory=list)
+    excluded: list[str] = field(default_factory=list)
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.terms or self.prefixes or self.phrases)
+
+
+def parse_search_query(q: str) -> SearchQuery:
+    """Split user input into terms, prefixes, phrases and exclusions."""
+    parsed = SearchQuery()
+    for negated, phrase, token in _TOKEN_RE.findall(q):
+        if phrase or negated:
+            words = _WORD_RE.findall(phrase.lower())
+            if negated:
+                parsed.excluded.extend(words)
+            elif len(words) > 1:
+                parsed.phrases.append(words)
+            else:
+                parsed.terms.extend(words)
+            continue
+
+        excluded = token.startswith("-")
+        prefix = token.endswith("*")
+        words = _WORD_RE.findall(token.lower())
+        if not words:
+            continue
+        if excluded:
+            parsed.excluded.extend(words)
+        elif prefix:
+            parsed.terms.extend(words[:-1])
+            parsed.prefixes.append(words[-1])
+        else:
+            parsed.terms.extend(words)
+    return parsed
+
+
+def _quote_lexeme(word: str) -> str:
+    return "'" + word.replace("'", "''") + "'"
+
+
+def to_tsquery_text(parsed: SearchQuery) -> str:
+    parts = [_quote_lexeme(word) for word in parsed.terms]
+    parts += [f"{_quote_lexeme(word)}:*" for word in parsed.prefixes]
+    parts += ["(" + " <-> ".join(map(_quote_lexeme, words)) + ")" for words in parsed.phrases]
+    parts += [f"!{_quote_lexeme(word)}" for word in parsed.excluded]
+    return " & ".join(parts)
+
+
+def _quote_fts5(text: str) -> str:
+    return '"' + text.replace('"', '""') + '"'
+
+
+def to_fts5_query(parsed: SearchQuery) -> str:
+    parts = [_quote_fts5(word) for word in parsed.terms]
+    parts += [f"{_quote_fts5(word)}*" for word in parsed.prefixes]
+    parts += [_quote_fts5(" ".join(words)) for words in parsed.phrases]
+    query = " AND ".join(parts)
+    for word in parsed.excluded:
+        query += f" NOT {_quote_fts5(word)}"
+    return query
+
+
+def _to_tsquery(config: str, tsquery_text: str):
+    # Inline the config so the statement can be rendered for EXPLAIN estimates
+    return func.to_tsquery(literal_column(f"'{config}'::regconfig"), tsquery_text)
+
+
+def apply_text_search(query, dialect: str, q: str, language: Optional[str] = None):
+    """Restrict a ``select(Message)`` to messages matching ``q``.
+
+    Args:
+        query: Select over ``Message``
+        dialect: Database dialect name
+        q: User search input
+        language: Language whose stemming is applied to the query on
+            PostgreSQL, in addition to exact word forms
+
+    Returns:
+        (query, rank) where rank is a relevance expression, higher is
+        better, or None when the backend has no index
+    """
+    parsed = parse_search_query(q)
+    if parsed.is_empty:
+        return query.where(false()), None
+
+    if dialect == "postgresql":
+        tsquery_text = to_tsquery_text(parsed)
+        ts_query = _to_tsquery("simple", tsquery_text)
+        config = TEXT_SEARCH_CONFIGS.get(language or "")
+        if config:
+            ts_query = ts_query.op("||")(_to_tsquery(config, tsquery_text))
+        rank = func.ts_rank_cd(_search_vector, ts_query)
+        return query.where(_search_vector.op("@@")(ts_query)), rank
+
+    if dialect == "sqlite":
+        fts_table = literal_column("messages_fts")
+        query = query.join(_messages_fts, _messages_fts.c.message_id == Message.id).where(
+            fts_table.op("MATCH")(to_fts5_query(parsed))
+        )
+        # bm25() is lower-is-better
+        rank = -func.bm25(fts_table, *_SQLITE_BM25_WEIGHTS)
+        return query, rank
+
+    words = parsed.terms + parsed.prefixes + [" ".join(words) for words in parsed.phrases]
+    for word in words:
+        query = query.where(
+            or_(
+                Message.original_text.ilike(f"%{word}%"),
+                Message.translated_text.ilike(f"%{word}%"),
+            )
+        )
+    return query, None
+
+
+async def ensure_search_index(conn) -> None:
+    """Create the SQLite full-text index if missing; check the PostgreSQL one exists."""
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        # Adding the STORED column rewrites the table under an exclusive
+        # lock, so it is left to the migration rather than done at startup
+        existing = await conn.exec_driver_sql(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_name = 'messages' AND column_name = 'search_vector'"
+        )
+        if existing.scalar() is None:
+            logger.warning("messages.search_vector is missing; run `alembic upgrade head` to enable search")
+    elif dialect == "sqlite":
+        existing = await conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages_fts'"
+        )
+        created = existing.scalar() is None
+        for statement in SQLITE_DDL:
+            await conn.exec_driver_sql(statement)
+        if created:
+            # Index messages stored before the FTS table existed
+            await conn.exec_driver_sql(
+                "INSERT INTO messages_fts (message_id, original_text, translated_text) "
+                "SELECT id, original_text, translated_text FROM messages"
+            )
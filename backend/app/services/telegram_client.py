@@ -0,0 +1,76 @@
+"""Process-wide Telegram client manager.
+
+Telethon multiplexes concurrent requests over one connection, so the API,
+the polling job and the real-time collector can share a single long-lived
+client instead of each opening (and handshaking) their own against the same
+SQLite session file. Only connection setup is serialized; read-only calls
+such as ``iter_messages`` and ``get_entity`` run concurrently.
+"""
+from telethon import TelegramClient
+from typing import Optional
+import os
+import asyncio
+import logging
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+SESSION_PATH = "data/telegram_session"
+
+
+class TelegramClientManager:
+    """Owns the shared, lazily connected TelegramClient.
+
+    Example:
+        client = await telegram_client_manager.get_client()
+        entity = await client.get_entity("durov")
+    """
+
+    def __init__(self):
+        self.api_id = settings.telegram_api_id
+        self.api_hash = settings.telegram_api_hash
+        self.phone = settings.telegram_phone
+        self._client: Optional[TelegramClient] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def is_connected(self) -> bool:
+        return self._client is not None and self._client.is_connected()
+
+    def _get_connect_lock(self) -> asyncio.Lock:
+        # Created lazily so the lock binds to the running event loop
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        return self._connect_lock
+
+    async def get_client(self) -> TelegramClient:
+        """Return the connected shared client, (re)connecting if needed."""
+        if self.is_connected:
+            return self._client
+
+        async with self._get_connect_lock():
+            if self.is_connected:
+                return self._client
+
+            if self._client is None:
+                os.makedirs("data", exist_ok=True)
+                self._client = TelegramClient(SESSION_PATH, self.api_id, self.api_hash)
+            await self._client.start(phone=self.phone)
+            logger.info("Shared Telegram client connected")
+            return self._client
+
+    async def close(self) -> None:
+        """Disconnect the shared client (application shutdown only)."""
+        async with self._get_connect_lock():
+            if self._client is not None:
+                try:
+                    await self._client.disconnect()
+                finally:
+                    self._client = None
+                logger.info("Shared Telegram client disconnected")
+
+
+# Singleton instance
+telegram_client_manager = TelegramClientManager()
@@ -6,22 +6,22 @@ for handling FloodWaitErrors.
 """
 from telethon import TelegramClient
 from telethon.tl.functions.channels import GetFullChannelRequest
-from telethon.errors import FloodWaitError, SlowModeWaitError
+from telethon.errors import FloodWaitError, SlowModeWaitError, ChannelInvalidError, ChannelPrivateError
 from datetime import datetime, timedelta, timezone
 from typing import Optional
-import os
-import asyncio
 import logging
 
 from app.config import get_settings
+from app.services.telegram_client import telegram_client_manager
+from app.services.entity_cache import entity_cache
 from app.utils.retry import telegram_retry
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
-# Global lock to prevent concurrent Telegram session access
-# Telethon uses SQLite for session storage, which doesn't handle concurrent writes well
-_telegram_lock = asyncio.Lock()
+# Raised when a cached access hash no longer works (ValueError is Telethon's
+# "Could not find the input entity")
+_STALE_ENTITY_ERRORS = (ChannelInvalidError, ChannelPrivateError, ValueError)
 
 
 class TelegramCollector:
@@ -29,7 +29,8 @@ class TelegramCollector:
 
     This class provides methods to fetch channel metadata and messages from
     Telegram channels. All methods use the @telegram_retry decorator to handle
-    FloodWaitErrors with exponential backoff.
+    FloodWaitErrors with exponential backoff. Calls go through the shared
+    client from ``telegram_client_manager`` and may run concurrently.
 
     Example:
         collector = TelegramCollector()
@@ -41,9 +42,6 @@ class TelegramCollector:
     """
 
     def __init__(self):
-        self.api_id = settings.telegram_api_id
-        self.api_hash = settings.telegram_api_hash
-        self.phone = settings.telegram_phone
         self.client: Optional[TelegramClient] = None
 
     @staticmethod
@@ -75,67 +73,93 @@ class TelegramCollector:
         }
 
     async def connect(self):
-        """Initialize and connect Telegram client."""
-        if not self.client:
-            # Store session files in data directory
-            os.makedirs("data", exist_ok=True)
-            self.client = TelegramClient("data/telegram_session", self.api_id, self.api_hash)
-            await self.client.start(phone=self.phone)
-            logger.info("Telegram client connected")
+        """Get the shared, already-connected Telegram client."""
+        self.client = await telegram_client_manager.get_client()
         return self.client
 
     async def disconnect(self):
-        """Disconnect Telegram client."""
-        if self.client:
-            await self.client.disconnect()
-            self.client = None
-            logger.info("Telegram client disconnected")
+        """Release this collector's reference to the shared client.
+
+        The connection itself stays open for other callers; it is closed by
+        ``telegram_client_manager.close()`` at application shutdown.
+        """
+        self.client = None
+
+    async def _resolve_peer(self, client: TelegramClient, username: str):
+        """Return a cached InputPeerChannel, resolving the username only on a miss."""
+        peer = entity_cache.get_input_peer(username)
+        if peer is not None:
+            return peer
+
+        entity = await client.get_entity(username)
+        await entity_cache.remember(username, entity)
+        return entity
+
+    async def _iter_channel_messages(self, client: TelegramClient, username: str, **kwargs):
+        """Iterate a channel's messages, re-resolving a rejected cached entity once."""
+        cached = entity_cache.get_input_peer(username) is not None
+        peer = await self._resolve_peer(client, username)
+        yielded = False
+        try:
+            async for message in client.iter_messages(peer, **kwargs):
+                yielded = True
+                yield message
+            return
+        except _STALE_ENTITY_ERRORS:
+            entity_cache.forget(username)
+            # Restarting after some messages were yielded would repeat them
+            if not cached or yielded:
+                raise
+
+        logger.info(f"Cached entity for {username} was rejected, resolving again")
+        peer = await self._resolve_peer(client, username)
+        async for message in client.iter_messages(peer, **kwargs):
+            yield message
 
     @telegram_retry
     async def get_channel_info(self, username: str) -> dict:
         """Fetch channel metadata from Telegram.
 
-        Uses global lock to prevent concurrent session access.
         Automatically retries on FloodWaitError with exponential backoff.
 
         Args:
             username: Channel username (with or without @)
 
         Returns:
-            Dict with channel info (id, title, username, description, participants_count)
+            Dict with channel info (id, access_hash, title, username, description, participants_count)
 
         Raises:
             Exception: If channel cannot be fetched after retries
         """
-        async with _telegram_lock:
-            await self.connect()
+        client = await self.connect()
 
-            # Remove @ if present
-            username = username.lstrip('@')
+        # Remove @ if present
+        username = username.lstrip('@')
 
-            logger.info(f"Fetching channel info for: {username}")
+        logger.info(f"Fetching channel info for: {username}")
 
-            # Get channel entity
-            entity = await self.client.get_entity(username)
+        # Get channel entity (always resolved here: new channels are not cached yet)
+        entity = await client.get_entity(username)
+        await entity_cache.remember(username, entity)
 
-            # Get full channel info
-            full_channel = await self.client(GetFullChannelRequest(entity))
+        # Get full channel info
+        full_channel = await client(GetFullChannelRequest(entity))
 
-            logger.info(f"Successfully fetched channel info for: {username}")
+        logger.info(f"Successfully fetched channel info for: {username}")
 
-            return {
-                'id': entity.id,
-                'title': entity.title,
-                'username': entity.username or username,
-                'description': full_channel.full_chat.about or '',
-                'participants_count': full_channel.full_chat.participants_count or 0,
-            }
+        return {
+            'id': entity.id,
+            'access_hash': entity.access_hash,
+            'title': entity.title,
+            'username': entity.username or username,
+            'description': full_channel.full_chat.about or '',
+            'participants_count': full_channel.full_chat.participants_count or 0,
+        }
 
     @telegram_retry
     async def get_recent_messages(self, username: str, limit: int = 50, offset_date=None) -> list:
         """Fetch recent messages from a channel.
 
-        Uses global lock to prevent concurrent session access.
         Automatically retries on FloodWaitError with exponential backoff.
 
         Args:
@@ -146,28 +170,78 @@ class TelegramCollector:
         Returns:
             List of message dicts with id, text, date, media_type, media_urls
         """
-        async with _telegram_lock:
-            await self.connect()
+        client = await self.connect()
 
-            username = username.lstrip('@')
-            logger.info(f"Fetching {limit} recent messages from: {username}")
+        username = username.lstrip('@')
+        logger.info(f"Fetching {limit} recent messages from: {username}")
 
-            entity = await self.client.get_entity(username)
+        messages = []
+        async for message in self._iter_channel_messages(
+            client, username, limit=limit, offset_date=offset_date
+        ):
+            msg_data = self._extract_message_data(message)
+            if msg_data:
+                messages.append(msg_data)
 
-            messages = []
-            async for message in self.client.iter_messages(entity, limit=limit, offset_date=offset_date):
-                msg_data = self._extract_message_data(message)
-                if msg_data:
-                    messages.append(msg_data)
+        logger.info(f"Fetched {len(messages)} messages from: {username}")
+        return messages
 
-            logger.info(f"Fetched {len(messages)} messages from: {username}")
-            return messages
+    @telegram_retry
+    async def get_messages_after(
+        self,
+        username: str,
+        min_id: Optional[int],
+        max_messages: Optional[int] = None,
+    ) -> tuple[list, Optional[int]]:
+        """Fetch every message newer than ``min_id``, oldest first.
+
+        Telethon pages through ``iter_messages(min_id=...)`` until it catches
+        up, so each message is fetched exactly once. Without a cursor only the
+        latest ``telegram_bootstrap_messages`` are fetched. When more than
+        ``max_messages`` are pending, the oldest ones are returned and the
+        next call continues from there.
+
+        Args:
+            username: Channel username (with or without @)
+            min_id: Highest message ID already collected, or None
+            max_messages: Cap on messages fetched in this call
+
+        Returns:
+            Tuple of (message dicts, highest message ID seen including
+            messages without text, or ``min_id`` if nothing new)
+        """
+        client = await self.connect()
+
+        username = username.lstrip('@')
+        max_messages = max_messages or settings.telegram_catchup_max_messages
+
+        if min_id:
+            logger.info(f"Fetching messages after id {min_id} from: {username}")
+            iterator = self._iter_channel_messages(
+                client, username, min_id=min_id, limit=max_messages, reverse=True
+            )
+        else:
+            logger.info(f"Bootstrapping cursor with latest messages from: {username}")
+            iterator = self._iter_channel_messages(
+                client, username, limit=settings.telegram_bootstrap_messages
+            )
+
+        messages = []
+        last_seen_id = min_id
+        async for message in iterator:
+            if last_seen_id is None or message.id > last_seen_id:
+                last_seen_id = message.id
+            msg_data = self._extract_message_data(message)
+            if msg_data:
+                messages.append(msg_data)
+
+        logger.info(f"Fetched {len(messages)} new messages from: {username}")
+        return messages, last_seen_id
 
     @telegram_retry
     async def get_messages_since(self, username: str, days: int = 7, max_messages: int = 500) -> list:
         """Fetch messages from the last N days.
 
-        Uses global lock to prevent concurrent session access.
         Automatically retries on FloodWaitError with exponential backoff.
 
         Args:
@@ -178,28 +252,25 @@ class TelegramCollector:
         Returns:
             List of message dicts with id, text, date, media_type, media_urls
         """
-        async with _telegram_lock:
-            await self.connect()
-
-            username = username.lstrip('@')
-            logger.info(f"Fetching messages from last {days} days for: {username}")
+        client = await self.connect()
 
-            entity = await self.client.get_entity(username)
+        username = username.lstrip('@')
+        logger.info(f"Fetching messages from last {days} days for: {username}")
 
-            cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
-            messages = []
+        cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
+        messages = []
 
-            async for message in self.client.iter_messages(entity, limit=max_messages):
-                # Stop if message is older than cutoff
-                msg_date = message.date
-                if msg_date.tzinfo is None:
-                    msg_date = msg_date.replace(tzinfo=timezone.utc)
-                if msg_date < cutoff_date:
-                    break
+        async for message in self._iter_channel_messages(client, username, limit=max_messages):
+            # Stop if message is older than cutoff
+            msg_date = message.date
+            if msg_date.tzinfo is None:
+                msg_date = msg_date.replace(tzinfo=timezone.utc)
+            if msg_date < cutoff_date:
+                break
 
-                msg_data = self._extract_message_data(message)
-                if msg_data:
-                    messages.append(msg_data)
+            msg_data = self._extract_message_data(message)
+            if msg_data:
+                messages.append(msg_data)
 
-            logger.info(f"Fetched {len(messages)} messages from last {days} days for: {username}")
-            return messages
+        logger.info(f"Fetched {len(messages)} messages from last {days} days for: {username}")
+        return messages
@@ -0,0 +1,204 @@
+"""Cheap exact and near-exact duplicate detection ahead of embeddings.
+
+Texts are normalized (case, Unicode form, links, @mentions, punctuation)
+and hashed for exact matches; reposts with small edits such as an appended
+channel signature are caught with MinHash signatures over word shingles,
+bucketed by LSH bands so a lookup only compares a handful of candidates.
+The index lives in memory and only keeps the deduplication window.
+"""
+from typing import NamedTuple, Optional
+import hashlib
+import heapq
+import re
+import unicodedata
+import zlib
+
+import numpy as np
+
+_URL_RE = re.compile(r"(https?://|www\.|t\.me/)\S+", re.IGNORECASE)
+_MENTION_RE = re.compile(r"[@#]\w+")
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Universal hashing h(x) = (a * x + b) mod p over 32-bit shingle hashes
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def normalize_text(text: str) -> str:
+    """Lowercased words of ``text`` without links, mentions or punctuation."""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = _URL_RE.sub(" ", text)
+    text = _MENTION_RE.sub(" ", text)
+    return " ".join(_WORD_RE.findall(text))
+
+
+def exact_hash(normalized: str) -> str:
+    return hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
+
+
+class _Entry(NamedTuple):
+    message_id: str
+    timestamp: Optional[int]
+    signature: Optional[np.ndarray]
+    exact_key: str
+
+
+class FingerprintIndex:
+    """Exact-hash and MinHash-LSH index of recent messages.
+
+    Args:
+        num_perm: MinHash signature length
+        bands: LSH bands; ``num_perm`` must be a multiple. More bands catch
+            lower similarities at the cost of more candidate comparisons
+        threshold: Minimum estimated Jaccard similarity for a near duplicate
+        shingle_size: Words per shingle
+        min_shingles: Texts with fewer shingles only get exact matching
+    """
+
+    def __init__(
+        self,
+        num_perm: int = 64,
+        bands: int = 16,
+        threshold: float = 0.8,
+        shingle_size: int = 3,
+        min_shingles: int = 5,
+        seed: int = 1,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.min_shingles = min_shingles
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._exact: dict[str, dict[str, _Entry]] = {}
+        self._buckets: dict[tuple[int, bytes], dict[str, _Entry]] = {}
+        self._entries: dict[str, _Entry] = {}
+        # (timestamp, message ID) min-heap, so pruning pops only expired entries
+        self._by_time: list[tuple[float, str]] = []
+        self.stats = {"exact": 0, "near": 0, "misses": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, message_id) -> bool:
+        return str(message_id) in self._entries
+
+    def signature(self, normalized: str) -> Optional[np.ndarray]:
+        words = normalized.split()
+        size = self.shingle_size
+        shingles = {" ".join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))}
+        if len(shingles) < self.min_shingles:
+            return None
+
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode()) for shingle in shingles),
+            dtype=np.uint64,
+            count=len(shingles),
+        )
+        # Multiply modulo 2^64 then fold into 32 bits, as in datasketch's MinHash
+        permuted = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % _MERSENNE_PRIME
+        return np.min(permuted & _MAX_HASH, axis=1)
+
+    def _band_keys(self, signature: np.ndarray) -> list[tuple[int, bytes]]:
+        return [
+            (band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+            for band in range(self.bands)
+        ]
+
+    def add(self, message_id: str, timestamp: Optional[int], text: str) -> None:
+        message_id = str(message_id)
+        if message_id in self._entries:
+            return
+        normalized = normalize_text(text)
+        if not normalized:
+            return
+
+        signature = self.signature(normalized)
+        entry = _Entry(message_id, timestamp, signature, exact_hash(normalized))
+        self._entries[message_id] = entry
+        # Undated entries sort first and go with the next prune
+        heapq.heappush(self._by_time, (float("-inf") if timestamp is None else timestamp, message_id))
+        self._exact.setdefault(entry.exact_key, {})[message_id] = entry
+        if signature is not None:
+            for key in self._band_keys(signature):
+                self._buckets.setdefault(key, {})[message_id] = entry
+
+    def match(
+        self,
+        message_id: str,
+        timestamp: Optional[int],
+        text: str,
+        cutoff_ts: Optional[int] = None,
+    ) -> Optional[dict]:
+        """Best earlier indexed message that ``text`` duplicates, if obvious.
+
+        Returns ``{"id", "score"}`` with the estimated similarity (1.0 for
+        identical normalized text), or None when the message needs the
+        embedding stage.
+        """
+        message_id = str(message_id)
+        normalized = normalize_text(text)
+        if not normalized:
+            return None
+
+        def eligible(entry: _Entry) -> bool:
+            if entry.message_id == message_id:
+                return False
+            if cutoff_ts is not None and (entry.timestamp is None or entry.timestamp < cutoff_ts):
+                return False
+            if timestamp is not None and entry.timestamp is not None and entry.timestamp > timestamp:
+                return False
+            return True
+
+        exact = [entry for entry in self._exact.get(exact_hash(normalized), {}).values() if eligible(entry)]
+        if exact:
+            self.stats["exact"] += 1
+            original = min(exact, key=lambda entry: entry.timestamp or 0)
+            return {"id": original.message_id, "score": 1.0}
+
+        signature = self.signature(normalized)
+        if signature is None:
+            self.stats["misses"] += 1
+            return None
+
+        candidates: dict[str, _Entry] = {}
+        for key in self._band_keys(signature):
+            for entry in self._buckets.get(key, {}).values():
+                if eligible(entry):
+                    candidates[entry.message_id] = entry
+
+        best = None
+        for entry in candidates.values():
+            score = float(np.mean(entry.signature == signature))
+            if score < self.threshold:
+                continue
+            if best is None or (score, -(entry.timestamp or 0)) > (best["score"], -best["timestamp"]):
+                best = {"id": entry.message_id, "score": score, "timestamp": entry.timestamp or 0}
+
+        if best is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["near"] += 1
+        return {"id": best["id"], "score": best["score"]}
+
+    def prune(self, cutoff_ts: int) -> None:
+        """Drop messages published before ``cutoff_ts``, in time order."""
+        while self._by_time and self._by_time[0][0] < cutoff_ts:
+            _, message_id = heapq.heappop(self._by_time)
+            entry = self._entries.pop(message_id)
+            self._discard(self._exact, entry.exact_key, message_id)
+            if entry.signature is not None:
+                for key in self._band_keys(entry.signature):
+                    self._discard(self._buckets, key, message_id)
+
+    @staticmethod
+    def _discard(index: dict, key, message_id: str) -> None:
+        entries = index[key]
+        del entries[message_id]
+        if not entries:
+            del index[key]
@@ -1,10 +1,22 @@
 from app.config import get_settings
-from typing import Optional, Any
+from app.services.cache import LRUCache
+from app.services.embeddings import EmbeddingServiceClient, create_backend
+from app.services.local_vector_index import LocalVectorIndex
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Optional, Any, TypeVar
+import asyncio
 import uuid
 import hashlib
+import time
 
 settings = get_settings()
 
+T = TypeVar("T")
+
+# After a failed Qdrant call, requests go to the local index for this long
+# before Qdrant is tried again
+QDRANT_RETRY_SECONDS = 30.0
+
 
 class VectorStore:
     def __init__(self):
@@ -15,10 +27,46 @@ class VectorStore:
         self.timeout_seconds = settings.qdrant_timeout_seconds
         self.model_name = settings.embedding_model
         self.dimension = settings.embedding_dimension
-        self._embedder = None
+        self.embedding_batch_size = settings.embedding_batch_size
+        self.upsert_batch_size = settings.qdrant_upsert_batch_size
+        self.search_batch_size = settings.qdrant_search_batch_size
+        # With an embedding worker configured the model never loads in this
+        # process; otherwise inference runs on dedicated threads, never on the
+        # event loop, and the semaphore bounds how many encode jobs may queue
+        self._remote = (
+            EmbeddingServiceClient(
+                settings.embedding_service_url,
+                timeout_seconds=settings.embedding_service_timeout_seconds,
+            )
+            if settings.embedding_service_url
+            else None
+        )
+        self._backend = create_backend(
+            self.model_name,
+            self.embedding_batch_size,
+            onnx_file=settings.embedding_onnx_file or None,
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.embedding_workers),
+            thread_name_prefix="embedding",
+        )
+        self._queue_slots: Optional[asyncio.Semaphore] = None
+        self._queue_loop = None
+        # Vectors of recent search queries, so repeated queries skip inference
+        self.query_cache = LRUCache(
+            settings.query_embedding_cache_size,
+            settings.query_embedding_cache_ttl_seconds,
+        )
         self._client = None
+        self._local: Optional[LocalVectorIndex] = None
         self._ready = False
-        self._init_collection()
+        self._qdrant_retry_at = 0.0
+        self._init_lock: Optional[asyncio.Lock] = None
+        self._init_loop = None
+
+    @property
+    def _qdrant_configured(self) -> bool:
+        return bool(self.url and self.collection_name)
 
     def _resolve_distance(self, qmodels: Any) -> Any:
         distance = (self.distance or "").lower()
@@ -28,27 +76,79 @@ class VectorStore:
             return qmodels.Distance.EUCLID
         return qmodels.Distance.COSINE
 
-    def _init_collection(self) -> None:
-        if not self.url or not self.collection_name:
+    async def initialize(self) -> None:
+        """Connect to Qdrant, or open the local index when Qdrant is unavailable."""
+        if self._ready:
             return
+        if self._qdrant_configured:
+            await self._connect_qdrant()
+        if not self._ready and await self._open_local() is not None:
+            self._ready = True
+            print(
+                f"Using local vector index at {settings.local_vector_index_path} "
+                f"({len(self._local)} vectors)"
+            )
+
+    async def _open_local(self) -> Optional[LocalVectorIndex]:
+        if self._local is None and settings.local_vector_index_enabled:
+            self._local = await asyncio.to_thread(
+                LocalVectorIndex,
+                settings.local_vector_index_path,
+                self.dimension,
+            )
+        return self._local
+
+    async def _qdrant(self) -> Any:
+        """The Qdrant client, or None while Qdrant is unconfigured or down.
+
+        A client that failed at startup is reconnected, and one that failed
+        mid-run is retried, after ``QDRANT_RETRY_SECONDS``.
+        """
+        if not self._qdrant_configured or time.monotonic() < self._qdrant_retry_at:
+            return None
+        if self._client is None:
+            await self._connect_qdrant()
+        return self._client
+
+    async def _with_fallback(
+        self,
+        remote: Callable[[Any], Awaitable[T]],
+        local: Callable[[LocalVectorIndex], T],
+    ) -> T:
+        """Run ``remote`` on Qdrant, or ``local`` on the local index while Qdrant is down."""
+        client = await self._qdrant()
+        if client is not None:
+            try:
+                return await remote(client)
+            except Exception as e:
+                if not settings.local_vector_index_enabled:
+                    raise
+                print(f"Qdrant request failed, using the local vector index: {e}")
+                self._qdrant_retry_at = time.monotonic() + QDRANT_RETRY_SECONDS
+        index = await self._open_local()
+        if index is None:
+            raise RuntimeError("Qdrant is unavailable and the local vector index is disabled")
+        return await asyncio.to_thread(local, index)
 
+    async def _connect_qdrant(self) -> None:
+        """Connect to Qdrant and create the collection if needed."""
         try:
-            from qdrant_client import QdrantClient
+            from qdrant_client import AsyncQdrantClient
             from qdrant_client.http import models as qmodels
         except Exception as e:
             print(f"Vector store init failed: {e}")
             return
 
         try:
-            client = QdrantClient(
+            client = AsyncQdrantClient(
                 url=self.url,
                 api_key=self.api_key or None,
                 timeout=self.timeout_seconds,
             )
-            collections = client.get_collections().collections
+            collections = (await client.get_collections()).collections
             existing_names = {collection.name for collection in collections}
             if self.collection_name not in existing_names:
-                client.create_collection(
+                await client.create_collection(
                     collection_name=self.collection_name,
                     vectors_config=qmodels.VectorParams(
                         size=self.dimension,
@@ -60,52 +160,135 @@ class VectorStore:
             self._ready = True
         except Exception as e:
             print(f"Vector store init failed: {e}")
+            self._qdrant_retry_at = time.monotonic() + QDRANT_RETRY_SECONDS
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+        self._local = None
+        self._ready = False
+        if self._remote is not None:
+            await self._remote.close()
+        self._executor.shutdown(wait=False)
 
     @property
     def is_ready(self) -> bool:
-        return self._ready and self._client is not None
+        return self._ready and (self._client is not None or self._local is not None)
+
+    async def uses_fallback(self) -> bool:
+        """Whether Qdrant is configured but unreachable, so calls go to the local index."""
+        return self._qdrant_configured and await self._qdrant() is None
 
-    def _get_embedder(self) -> Any:
-        if self._embedder is None:
-            from sentence_transformers import SentenceTransformer
-            self._embedder = SentenceTransformer(self.model_name)
-        return self._embedder
+    async def ensure_ready(self) -> bool:
+        """Initialize on first use, so jobs, scripts and workers need no setup call.
 
-    def embed_texts(self, texts: list[str]) -> list[list[float]]:
-        embedder = self._get_embedder()
-        embeddings = embedder.encode(texts, normalize_embeddings=True)
-        return embeddings.tolist()
+        A store that could not be initialized is retried after
+        ``QDRANT_RETRY_SECONDS``.
+        """
+        if self.is_ready or time.monotonic() < self._qdrant_retry_at:
+            return self.is_ready
+        loop = asyncio.get_running_loop()
+        if self._init_lock is None or self._init_loop is not loop:
+            self._init_lock = asyncio.Lock()
+            self._init_loop = loop
+        async with self._init_lock:
+            if not self.is_ready:
+                await self.initialize()
+        return self.is_ready
 
-    def upsert_texts(self, items: list[dict]) -> list[Optional[str]]:
-        if not self.is_ready or not items:
+    def _get_queue_slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._queue_slots is None or self._queue_loop is not loop:
+            self._queue_slots = asyncio.Semaphore(max(1, settings.embedding_queue_size))
+            self._queue_loop = loop
+        return self._queue_slots
+
+    async def embed_texts(self, texts: list[str]) -> list[list[float]]:
+        """Embed texts on the inference executor; waits while the queue is full."""
+        if not texts:
+            return []
+        if self._remote is not None:
+            return await self._remote.embed(texts)
+        async with self._get_queue_slots():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._backend.encode, texts)
+
+    async def embed_query(self, text: str) -> list[float]:
+        """Embed a search query, reusing the vector of a recent identical query."""
+        vector = self.query_cache.get(text)
+        if vector is None:
+            vector = (await self.embed_texts([text]))[0]
+            self.query_cache.set(text, vector)
+        return vector
+
+    async def upsert_texts(self, items: list[dict]) -> list[Optional[str]]:
+        if not await self.ensure_ready() or not items:
             return [None] * len(items)
 
-        from qdrant_client.http import models as qmodels
-        texts = [item["text"] for item in items]
-        vectors = self.embed_texts(texts)
-        records: list[qmodels.PointStruct] = []
-        ids = []
+        vectors = await self.embed_texts([item["text"] for item in items])
+        return await self.upsert_vectors(
+            [{**item, "vector": vector} for item, vector in zip(items, vectors)]
+        )
+
+    async def upsert_vectors(self, items: list[dict]) -> list[Optional[str]]:
+        """Upsert pre-computed vectors in chunks of ``qdrant_upsert_batch_size``."""
+        if not await self.ensure_ready() or not items:
+            return [None] * len(items)
 
-        for item, vector in zip(items, vectors):
+        points = []
+        for item in items:
             vector_id = item.get("id") or str(uuid.uuid4())
             metadata = item.get("metadata") or {}
-            text_hash = hashlib.md5(item["text"].encode()).hexdigest()
-            metadata.setdefault("text_hash", text_hash)
-            records.append(
-                qmodels.PointStruct(
-                    id=str(vector_id),
-                    vector=vector,
-                    payload=metadata,
+            if item.get("text"):
+                text_hash = hashlib.md5(item["text"].encode()).hexdigest()
+                metadata.setdefault("text_hash", text_hash)
+            points.append((str(vector_id), item["vector"], metadata))
+        ids = [point_id for point_id, _, _ in points]
+
+        async def upsert_remote(client) -> list[Optional[str]]:
+            from qdrant_client.http import models as qmodels
+            records = [
+                qmodels.PointStruct(id=point_id, vector=vector, payload=metadata)
+                for point_id, vector, metadata in points
+            ]
+            batch_size = max(1, self.upsert_batch_size)
+            for start in range(0, len(records), batch_size):
+                await client.upsert(
+                    collection_name=self.collection_name,
+                    points=records[start:start + batch_size],
+                    wait=True,
                 )
+            return ids
+
+        def upsert_local(index: LocalVectorIndex) -> list[Optional[str]]:
+            index.upsert(points)
+            # Points held only by the fallback index get no embedding ID, so
+            # they are embedded into Qdrant again once it is back
+            return [None] * len(ids) if self._qdrant_configured else ids
+
+        return await self._with_fallback(upsert_remote, upsert_local)
+
+    async def retrieve_vectors(self, ids: list[str]) -> dict[str, list[float]]:
+        """Fetch stored vectors by point ID in a single round trip."""
+        if not await self.ensure_ready() or not ids:
+            return {}
+        ids = [str(point_id) for point_id in ids]
+
+        async def retrieve_remote(client) -> dict[str, list[float]]:
+            records = await client.retrieve(
+                collection_name=self.collection_name,
+                ids=ids,
+                with_payload=False,
+                with_vectors=True,
             )
-            ids.append(str(vector_id))
+            return {
+                str(record.id): record.vector
+                for record in records
+                if record.vector is not None
+            }
 
-        self._client.upsert(
-            collection_name=self.collection_name,
-            points=records,
-            wait=True,
-        )
-        return ids
+        return await self._with_fallback(retrieve_remote, lambda index: index.retrieve(ids))
 
     def _build_filter(self, raw_filter: Optional[dict], qmodels: Any) -> Optional[Any]:
         if not raw_filter:
@@ -159,36 +342,141 @@ class VectorStore:
             return None
         return qmodels.Filter(must=conditions)
 
-    def query_similar(
+    async def query_similar(
         self,
         text: str,
         top_k: int = 5,
         filter: Optional[dict] = None,
     ) -> list[dict]:
-        if not self.is_ready or not text:
+        if not await self.ensure_ready() or not text:
             return []
 
-        from qdrant_client.http import models as qmodels
+        vector = await self.embed_query(text)
 
-        vector = self.embed_texts([text])[0]
-        result = self._client.search(
-            collection_name=self.collection_name,
-            query_vector=vector,
-            limit=top_k,
-            with_payload=True,
-            query_filter=self._build_filter(filter, qmodels),
+        async def query_remote(client) -> list[dict]:
+            from qdrant_client.http import models as qmodels
+
+            result = await client.query_points(
+                collection_name=self.collection_name,
+                query=vector,
+                limit=top_k,
+                with_payload=True,
+                query_filter=self._build_filter(filter, qmodels),
+            )
+            return [
+                {
+                    "id": str(match.id),
+                    "score": match.score,
+                    "metadata": match.payload or {},
+                }
+                for match in result.points
+            ]
+
+        return await self._with_fallback(
+            query_remote,
+            lambda index: index.search_batch([vector], top_k, [filter])[0],
         )
 
-        normalized = []
-        for match in result:
-            normalized.append(
+    async def query_by_id(
+        self,
+        point_id: str,
+        top_k: int = 5,
+        filter: Optional[dict] = None,
+    ) -> Optional[list[dict]]:
+        """Find neighbours of a stored point using its stored vector (no inference).
+
+        The point itself is not returned. Returns None when the point is not
+        in the collection so callers can fall back to embedding its text.
+        """
+        if not await self.ensure_ready() or not point_id:
+            return None
+        point_id = str(point_id)
+
+        async def query_remote(client) -> Optional[list[dict]]:
+            from qdrant_client.http import models as qmodels
+
+            try:
+                result = await client.query_points(
+                    collection_name=self.collection_name,
+                    query=point_id,
+                    limit=top_k,
+                    with_payload=True,
+                    query_filter=self._build_filter(filter, qmodels),
+                )
+            except Exception as e:
+                # An unknown ID is reported as an error; the collection
+                # itself being unreachable is not
+                await client.get_collection(self.collection_name)
+                print(f"Vector lookup by id {point_id} failed: {e}")
+                return None
+            return [
                 {
                     "id": str(match.id),
                     "score": match.score,
                     "metadata": match.payload or {},
                 }
-            )
-        return normalized
+                for match in result.points
+            ]
+
+        def query_local(index: LocalVectorIndex) -> Optional[list[dict]]:
+            stored = index.retrieve([point_id])
+            if point_id not in stored:
+                return None
+            return index.search_batch([stored[point_id]], top_k, [filter], [point_id])[0]
+
+        return await self._with_fallback(query_remote, query_local)
+
+    async def query_similar_batch(
+        self,
+        vectors: list[list[float]],
+        top_k: int = 5,
+        filters: Optional[list[Optional[dict]]] = None,
+    ) -> list[list[dict]]:
+        """Run one similarity search per vector (Qdrant batch query API or the local index).
+
+        ``filters`` is aligned with ``vectors``; requests are sent in chunks of
+        ``qdrant_search_batch_size``.
+        """
+        if not await self.ensure_ready() or not vectors:
+            return [[] for _ in vectors]
+
+        async def query_remote(client) -> list[list[dict]]:
+            from qdrant_client.http import models as qmodels
+
+            requests = [
+                qmodels.QueryRequest(
+                    query=vector,
+                    limit=top_k,
+                    with_payload=True,
+                    filter=self._build_filter(raw_filter, qmodels),
+                )
+                for vector, raw_filter in zip(vectors, filters or [None] * len(vectors))
+            ]
+
+            results: list[list[dict]] = []
+            batch_size = max(1, self.search_batch_size)
+            for start in range(0, len(requests), batch_size):
+                responses = await client.query_batch_points(
+                    collection_name=self.collection_name,
+                    requests=requests[start:start + batch_size],
+                )
+                for response in responses:
+                    results.append(
+                        [
+                            {
+                                "id": str(point.id),
+                                "score": point.score,
+                                "metadata": point.payload or {},
+                            }
+                            for point in response.points
+                        ]
+                    )
+            return results
+
+        return await self._with_fallback(
+            query_remote,
+            lambda index: index.search_batch(vectors, top_k, filters),
+        )
 
 
 # Singleton instance
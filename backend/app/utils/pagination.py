@@ -0,0 +1,118 @@
+"""Keyset pagination and cheap row-count estimates for message listings.
+
+Pages are ordered by ``(published_at DESC, id DESC)`` and continued with an
+opaque cursor holding the last row's sort key, so each page is a single
+index range scan no matter how deep the client scrolls. Relevance-ranked
+results have no such key and use an offset cursor.
+"""
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+import json
+import logging
+
+from sqlalchemy import desc, func, literal_column, select, tuple_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.models.message import Message
+
+logger = logging.getLogger(__name__)
+
+
+def encode_cursor(message: Message) -> str:
+    payload = json.dumps([message.published_at.isoformat(), str(message.id)])
+    return urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """Decode a cursor produced by ``encode_cursor``.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        published_at, message_id = json.loads(urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(published_at), UUID(message_id)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def encode_offset_cursor(offset: int) -> str:
+    """Cursor for orders with no stable keyset, such as search relevance."""
+    return urlsafe_b64encode(json.dumps({"offset": offset}).encode()).decode().rstrip("=")
+
+
+def decode_offset_cursor(cursor: str) -> int:
+    """Decode a cursor produced by ``encode_offset_cursor``.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        offset = int(json.loads(urlsafe_b64decode(padded.encode()))["offset"])
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+    if offset < 0:
+        raise ValueError("Invalid cursor")
+    return offset
+
+
+def apply_keyset(query, cursor: Optional[str]):
+    """Order newest first and, given a cursor, start right after it."""
+    if cursor:
+        published_at, message_id = decode_cursor(cursor)
+        query = query.where(
+            tuple_(Message.published_at, Message.id) < tuple_(published_at, message_id)
+        )
+    return query.order_by(desc(Message.published_at), desc(Message.id))
+
+
+async def count_rows(db, query, exact: bool) -> tuple[int, bool]:
+    """Count the rows a query would return.
+
+    On PostgreSQL the planner's row estimate is used unless ``exact`` is
+    set, which avoids scanning every matching row just to render a total.
+
+    Returns:
+        (count, is_exact)
+    """
+    if not exact and db.get_bind().dialect.name == "postgresql":
+        try:
+            estimate = await _planner_estimate(db, query)
+            return estimate, False
+        except Exception as e:
+            logger.warning(f"Row estimate failed, falling back to exact count: {e}")
+
+    result = await db.execute(select(func.count()).select_from(query.subquery()))
+    return result.scalar() or 0, True
+
+
+class _Explain(Executable, ClauseElement):
+    """``EXPLAIN (FORMAT JSON)`` of a query, with its parameters bound by the driver."""
+
+    inherit_cache = False
+
+    def __init__(self, query):
+        # Untyped outer column so the plan row isn't run through the query's
+        # result processors; the planner flattens the subquery away
+        self.query = select(literal_column("*")).select_from(query.subquery())
+
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return f"EXPLAIN (FORMAT JSON) {compiler.process(element.query, **kw)}"
+
+
+async def _planner_estimate(db, query) -> int:
+    # A failed EXPLAIN aborts the transaction on PostgreSQL; the savepoint
+    # keeps it usable for the exact count fallback
+    async with db.begin_nested():
+        result = await db.execute(_Explain(query))
+        plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""CPU throughput of the embedding backends.
+
+Example:
+    python scripts/benchmark_embeddings.py \
+        sentence-transformers/all-MiniLM-L6-v2 \
+        onnx:sentence-transformers/all-MiniLM-L6-v2 \
+        onnx-int8:sentence-transformers/all-MiniLM-L6-v2
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.embeddings import create_backend  # noqa: E402
+
+WORDS = (
+    "air defense strike drone missile convoy bridge port city region overnight "
+    "reported confirmed officials ministry explosion power outage border troops "
+    "talks ceasefire shelling evacuation civilians infrastructure"
+).split()
+
+
+def build_texts(count: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 60)))
+        for _ in range(count)
+    ]
+
+
+def benchmark(spec: str, texts: list[str], batch_size: int, rounds: int) -> None:
+    backend = create_backend(spec, batch_size)
+    started = time.perf_counter()
+    backend.encode(texts[:batch_size])
+    load_seconds = time.perf_counter() - started
+
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        backend.encode(texts)
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    print(
+        f"{spec}: {len(texts) / best:.1f} texts/s "
+        f"(best of {rounds}, {len(texts)} texts, batch {batch_size}, load {load_seconds:.1f}s)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding backends on CPU.")
+    parser.add_argument("models", nargs="+", help="Embedding model specs, as in EMBEDDING_MODEL")
+    parser.add_argument("--texts", type=int, default=1000, help="Number of texts per round")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    texts = build_texts(args.texts, args.seed)
+    for spec in args.models:
+        benchmark(spec, texts, args.batch_size, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select, text
+
+from app.database import AsyncSessionLocal, init_db
+from app.models.alert import Alert, AlertHit, AlertTrigger
+from app.models.channel import Channel
+from app.models.collection import Collection
+from app.models.message import Message
+from app.models.summary import Summary  # noqa: F401
+from app.models.user import User
+from app.services.alert_matcher import AhoCorasick, AlertMatcher
+import app.services.alert_matcher as alert_matcher_module
+from app.services.message_writer import insert_messages
+
+
+def test_automaton_finds_overlapping_patterns() -> None:
+    automaton = AhoCorasick(["he", "she", "HERS", "his"])
+
+    found = automaton.search("USHERS")
+
+    assert {automaton.patterns[index] for index in found} == {"he", "she", "hers"}
+    assert automaton.search("nothing here") == {automaton.patterns.index("he")}
+    assert automaton.search("") == set()
+
+
+async def _create_alerts(
+    suffix: int,
+    alerts: list[dict],
+) -> tuple[Channel, Channel, list, list[Alert]]:
+    """A watched channel in a collection, an unwatched one, and alerts on the collection."""
+    await init_db()
+    watched = Channel(id=uuid.uuid4(), telegram_id=777000000 + suffix, username=f"watched{suffix}", title="Watched")
+    other = Channel(id=uuid.uuid4(), telegram_id=778000000 + suffix, username=f"other{suffix}", title="Other")
+    user = User(
+        id=uuid.uuid4(),
+        email=f"alerts{suffix}@example.com",
+        hashed_password="x",
+        is_active=True,
+        is_superuser=False,
+        is_verified=True,
+    )
+    collection = Collection(id=uuid.uuid4(), user_id=user.id, name="Watched", channels=[watched])
+    created = [
+        Alert(id=uuid.uuid4(), collection_id=collection.id, user_id=user.id, name=f"Alert {index}", **fields)
+        for index, fields in enumerate(alerts)
+    ]
+    async with AsyncSessionLocal() as db:
+        # users.id and collections.user_id are stored in different UUID formats on SQLite
+        await db.execute(text("PRAGMA foreign_keys=OFF"))
+        db.add_all([watched, other, user, collection, *created])
+        await db.commit()
+    return watched, other, [user, collection], created
+
+
+async def _delete_alerts(watched: Channel, other: Channel, owners: list, alerts: list[Alert]) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("PRAGMA foreign_keys=OFF"))
+        alert_ids = [alert.id for alert in alerts]
+        await db.execute(delete(AlertTrigger).where(AlertTrigger.alert_id.in_(alert_ids)))
+        await db.execute(delete(AlertHit).where(AlertHit.alert_id.in_(alert_ids)))
+        await db.execute(delete(Message).where(Message.channel_id.in_([watched.id, other.id])))
+        for instance in (*alerts, *owners, watched, other):
+            await db.delete(await db.get(type(instance), instance.id))
+        await db.commit()
+
+
+def _row(telegram_id: int, text: str, **fields) -> dict:
+    # Distinct timestamps so trigger message order is deterministic
+    published_at = datetime.now(timezone.utc) + timedelta(seconds=telegram_id)
+    return {"telegram_message_id": telegram_id, "original_text": text, "published_at": published_at, **fields}
+
+
+async def _insert(channel: Channel, rows: list[dict]) -> None:
+    async with AsyncSessionLocal() as db:
+        await insert_messages(db, rows, channel_id=channel.id)
+        await db.commit()
+
+
+async def _triggers(alert: Alert) -> list[AlertTrigger]:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(AlertTrigger).where(AlertTrigger.alert_id == alert.id))
+        return list(result.scalars().all())
+
+
+async def test_keyword_alert_fires_at_ingest() -> None:
+    watched, other, owners, [alert] = await _create_alerts(
+        1,
+        [{"keywords": ["Drone", "missile strike"], "min_threshold": 2, "frequency": "realtime"}],
+    )
+    # Two workers (or one restarted) share the counts through the database
+    workers = [AlertMatcher(), AlertMatcher()]
+
+    async def ingest(worker: int, channel: Channel, rows: list[dict]) -> int:
+        await _insert(channel, rows)
+        return await workers[worker].process(rows, channel_id=channel.id)
+
+    assert await ingest(0, watched, [_row(1, "DRONES over the city"), _row(2, "Weather update")]) == 0
+    # Same keyword in a channel outside the collection does not count
+    assert await ingest(1, other, [_row(1, "Drone sighted")]) == 0
+    fired_rows = [_row(3, "Reports of a missile strike near the port")]
+    assert await ingest(1, watched, fired_rows) == 1
+    # Cooldown: no second trigger within the window, whichever worker sees the match
+    assert await ingest(0, watched, [_row(4, "Another drone")]) == 0
+
+    triggers = await _triggers(alert)
+    async with AsyncSessionLocal() as db:
+        stored_alert = await db.get(Alert, alert.id)
+
+    assert len(triggers) == 1
+    assert triggers[0].message_ids[0] == str(fired_rows[0]["id"])
+    assert len(triggers[0].message_ids) == 2
+    assert stored_alert.last_triggered_at is not None
+
+    await _delete_alerts(watched, other, owners, [alert])
+
+
+async def test_periodic_job_evaluates_alerts_in_one_pass(monkeypatch) -> None:
+    from app.jobs import alerts as alerts_job
+
+    monkeypatch.setattr(alert_matcher_module.settings, "alert_streaming_enabled", False)
+    watched, other, owners, (keyword_alert, entity_alert, quiet_alert) = await _create_alerts(
+        2,
+        [
+            {"keywords": ["blackout"], "min_threshold": 2, "frequency": "hourly"},
+            {"keywords": [], "entities": ["Odesa"], "min_threshold": 1, "frequency": "daily"},
+            {"keywords": ["ceasefire"], "min_threshold": 1, "frequency": "realtime"},
+        ],
+    )
+    odesa = {"persons": [], "locations": ["Odesa"], "organizations": []}
+    await _insert(
+        watched,
+        [
+            _row(1, "Blackout in the north", entities=odesa),
+            _row(2, "Rolling BLACKOUTS announced"),
+            _row(3, "Market update"),
+        ],
+    )
+    await _insert(other, [_row(1, "Ceasefire talks", entities=odesa)])
+
+    await alerts_job.evaluate_alerts_job()
+
+    keyword_triggers = await _triggers(keyword_alert)
+    entity_triggers = await _triggers(entity_alert)
+    assert len(keyword_triggers) == 1
+    assert keyword_triggers[0].summary == "2 matching messages in the last 60 minutes."
+    assert len(entity_triggers) == 1
+    assert len(entity_triggers[0].message_ids) == 1
+    assert await _triggers(quiet_alert) == []
+
+    await _delete_alerts(watched, other, owners, [keyword_alert, entity_alert, quiet_alert])
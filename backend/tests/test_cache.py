@@ -0,0 +1,70 @@
+from app.services.cache import LRUCache, TieredCache
+
+
+class _FakePipeline:
+    def __init__(self, redis: "_FakeRedis") -> None:
+        self._redis = redis
+        self._ops: list[tuple[str, str]] = []
+
+    async def __aenter__(self) -> "_FakePipeline":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+    def set(self, key: str, value: str, ex: int | None = None) -> None:
+        self._ops.append((key, value))
+
+    async def execute(self) -> None:
+        self._redis.round_trips += 1
+        self._redis.data.update(self._ops)
+
+
+class _FakeRedis:
+    def __init__(self) -> None:
+        self.data: dict[str, str] = {}
+        self.round_trips = 0
+
+    async def mget(self, keys: list[str]) -> list[str | None]:
+        self.round_trips += 1
+        return [self.data.get(key) for key in keys]
+
+    def pipeline(self, transaction: bool = True) -> _FakePipeline:
+        return _FakePipeline(self)
+
+
+def test_lru_cache_evicts_least_recently_used() -> None:
+    cache = LRUCache(max_size=2, ttl_seconds=60)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"
+    cache.set("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_cache_expires_entries() -> None:
+    cache = LRUCache(max_size=10, ttl_seconds=-1)
+    cache.set("a", "1")
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+async def test_tiered_cache_batches_redis_round_trips() -> None:
+    redis = _FakeRedis()
+    cache = TieredCache(namespace="t", max_size=2, ttl_seconds=60, redis_ttl_seconds=60, redis=redis)
+
+    await cache.set_many({f"key{i}": f"value{i}" for i in range(500)})
+    assert redis.round_trips == 1
+    assert len(cache.local) == 2
+
+    found = await cache.get_many(f"key{i}" for i in range(500))
+    assert len(found) == 500
+    assert redis.round_trips == 2
+
+    stats = cache.stats()
+    assert stats["local"]["hits"] == 2
+    assert stats["redis"]["hits"] == 498
@@ -0,0 +1,30 @@
+import uuid
+
+from app.services.channel_events import (
+    CHANNEL_ADDED,
+    CHANNEL_REMOVED,
+    ChannelEvent,
+    ChannelEventBus,
+)
+from app.services.realtime_collector import RealtimeCollector
+
+
+async def test_channel_events_update_realtime_map_without_polling() -> None:
+    bus = ChannelEventBus()
+    collector = RealtimeCollector()
+    bus.subscribe(collector._on_channel_event)
+    channel_id = uuid.uuid4()
+
+    await bus.publish(ChannelEvent(CHANNEL_ADDED, channel_id, 777, title="News", language="uk"))
+    assert collector._channels[777].id == channel_id
+    assert collector._channels[777].language == "uk"
+
+    await bus.publish(ChannelEvent(CHANNEL_REMOVED, channel_id, 777))
+    assert 777 not in collector._channels
+
+
+def test_channel_event_round_trips_through_json() -> None:
+    event = ChannelEvent(CHANNEL_ADDED, uuid.uuid4(), 42, title="t")
+    decoded, origin = ChannelEvent.from_json(event.to_json("worker-1"))
+    assert decoded == event
+    assert origin == "worker-1"
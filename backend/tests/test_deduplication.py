@@ -20,6 +20,7 @@ if "sentence_transformers" not in sys.modules:
     sys.modules["sentence_transformers"] = sentence_stub
 
 from app.models.channel import Channel  # noqa: F401
+from app.models.duplicate_cluster import DuplicateCluster
 from app.models.message import Message
 from app.services.deduplicator import DeduplicationService
 import app.services.deduplicator as dedup_module
@@ -45,39 +46,72 @@ def _cosine_similarity(left: list[float], right: list[float]) -> float:
 class _FakeVectorStore:
     def __init__(self) -> None:
         self._items: dict[str, dict[str, object]] = {}
+        self.embed_calls = 0
+        self.search_calls = 0
+        self.qdrant_down = False
 
-    @property
-    def is_ready(self) -> bool:
+    async def ensure_ready(self) -> bool:
         return True
 
-    def upsert_texts(self, items: list[dict]) -> list[str]:
+    async def uses_fallback(self) -> bool:
+        return self.qdrant_down
+
+    async def embed_texts(self, texts: list[str]) -> list[list[float]]:
+        self.embed_calls += 1
+        return [_embed_text(text) for text in texts]
+
+    async def upsert_vectors(self, items: list[dict]) -> list[str]:
         ids: list[str] = []
         for item in items:
             vector_id = str(item.get("id") or uuid.uuid4())
             self._items[vector_id] = {
-                "vector": _embed_text(item["text"]),
+                "vector": item["vector"],
                 "metadata": item.get("metadata") or {},
             }
             ids.append(vector_id)
         return ids
 
-    def query_similar(self, text: str, top_k: int = 5, filter: dict | None = None) -> list[dict]:
-        query_vector = _embed_text(text)
+    async def upsert_texts(self, items: list[dict]) -> list[str]:
+        vectors = await self.embed_texts([item["text"] for item in items])
+        return await self.upsert_vectors(
+            [{**item, "vector": vector} for item, vector in zip(items, vectors)]
+        )
+
+    async def retrieve_vectors(self, ids: list[str]) -> dict[str, list[float]]:
+        return {
+            point_id: self._items[point_id]["vector"]
+            for point_id in ids
+            if point_id in self._items
+        }
+
+    def _search(self, query_vector: list[float], top_k: int, filter: dict | None) -> list[dict]:
         matches: list[dict] = []
-        cutoff = None
-        if filter:
-            cutoff = filter.get("published_at_ts", {}).get("$gte")
+        ts_filter = (filter or {}).get("published_at_ts", {})
         for vector_id, payload in self._items.items():
             metadata = payload["metadata"]
-            if cutoff is not None:
-                published_at_ts = metadata.get("published_at_ts")
-                if published_at_ts is None or published_at_ts < cutoff:
-                    continue
+            published_at_ts = metadata.get("published_at_ts")
+            if "$gte" in ts_filter and (published_at_ts is None or published_at_ts < ts_filter["$gte"]):
+                continue
+            if "$lte" in ts_filter and (published_at_ts is None or published_at_ts > ts_filter["$lte"]):
+                continue
             score = _cosine_similarity(query_vector, payload["vector"])
             matches.append({"id": vector_id, "score": score, "metadata": metadata})
         matches.sort(key=lambda item: item["score"], reverse=True)
         return matches[:top_k]
 
+    async def query_similar(self, text: str, top_k: int = 5, filter: dict | None = None) -> list[dict]:
+        return self._search(_embed_text(text), top_k, filter)
+
+    async def query_similar_batch(
+        self,
+        vectors: list[list[float]],
+        top_k: int = 5,
+        filters: list[dict | None] | None = None,
+    ) -> list[list[dict]]:
+        self.search_calls += 1
+        filters = filters or [None] * len(vectors)
+        return [self._search(vector, top_k, raw_filter) for vector, raw_filter in zip(vectors, filters)]
+
 
 def _build_message(channel_id: uuid.UUID, telegram_id: int, text: str, published_at: datetime) -> Message:
     return Message(
@@ -90,7 +124,7 @@ def _build_message(channel_id: uuid.UUID, telegram_id: int, text: str, published
     )
 
 
-def test_deduplication_marks_similar_messages(monkeypatch) -> None:
+async def test_deduplication_marks_similar_messages(monkeypatch) -> None:
     fake_store = _FakeVectorStore()
     monkeypatch.setattr(dedup_module, "vector_store", fake_store)
 
@@ -117,7 +151,7 @@ def test_deduplication_marks_similar_messages(monkeypatch) -> None:
         base_time + timedelta(minutes=2),
     )
 
-    deduper.mark_duplicates([message_a, message_b, message_c])
+    await deduper.mark_duplicates([message_a, message_b, message_c])
 
     assert message_a.is_duplicate is False
     assert message_a.duplicate_group_id == message_a.id
@@ -126,3 +160,245 @@ def test_deduplication_marks_similar_messages(monkeypatch) -> None:
     assert message_b.originality_score is not None and message_b.originality_score < 100
     assert message_c.is_duplicate is False
     assert message_c.duplicate_group_id is None
+
+
+async def test_deduplication_batches_embeddings_and_searches(monkeypatch) -> None:
+    fake_store = _FakeVectorStore()
+    monkeypatch.setattr(dedup_module, "vector_store", fake_store)
+
+    deduper = DeduplicationService(similarity_threshold=0.7)
+    # Exercise the embedding path: these reposts would be caught by fingerprint
+    deduper.prefilter = None
+    base_time = datetime.now(timezone.utc)
+    channel_id = uuid.uuid4()
+
+    original = _build_message(
+        channel_id,
+        200,
+        "Air defense active over Odesa region tonight.",
+        base_time,
+    )
+    await fake_store.upsert_texts(
+        [
+            {
+                "id": str(original.id),
+                "text": original.original_text,
+                "metadata": {"published_at_ts": int(base_time.timestamp())},
+            }
+        ]
+    )
+    original.embedding_id = str(original.id)
+    fake_store.embed_calls = 0
+
+    reposts = [
+        _build_message(
+            uuid.uuid4(),
+            300 + index,
+            "Air defense active over Odesa region tonight!",
+            base_time + timedelta(minutes=index + 1),
+        )
+        for index in range(5)
+    ]
+
+    await deduper.mark_duplicates([original, *reposts])
+
+    assert fake_store.embed_calls == 1
+    assert fake_store.search_calls == 1
+    assert original.is_duplicate is False
+    assert original.duplicate_group_id == original.id
+    assert all(message.is_duplicate for message in reposts)
+    assert all(message.duplicate_group_id == original.id for message in reposts)
+    assert all(message.embedding_id == str(message.id) for message in reposts)
+
+
+async def test_fingerprints_resolve_reposts_without_embeddings(monkeypatch) -> None:
+    fake_store = _FakeVectorStore()
+    monkeypatch.setattr(dedup_module, "vector_store", fake_store)
+
+    deduper = DeduplicationService(similarity_threshold=0.7)
+    base_time = datetime.now(timezone.utc)
+    text = (
+        "Air defense forces intercepted several drones over the Odesa region "
+        "tonight, according to the regional administration. Debris damaged "
+        "two residential buildings in the port district and no casualties were reported."
+    )
+    original = _build_message(uuid.uuid4(), 1, text, base_time)
+    verbatim = _build_message(uuid.uuid4(), 2, text.upper() + " https://t.me/example/1", base_time + timedelta(minutes=1))
+    signed = _build_message(
+        uuid.uuid4(), 3, f"{text}\n\nSubscribe: @frontline_news", base_time + timedelta(minutes=2)
+    )
+    unrelated = _build_message(uuid.uuid4(), 4, "Sunny weather expected in Paris this weekend.", base_time)
+
+    await deduper.mark_duplicates([signed, verbatim, original, unrelated])
+
+    # Only the original and the unrelated message reach the embedding stage
+    assert fake_store.embed_calls == 1
+    # Reposts are stored with the original's vector so semantic search finds them
+    assert len(fake_store._items) == 4
+    assert fake_store._items[str(signed.id)]["vector"] == fake_store._items[str(original.id)]["vector"]
+    assert signed.embedding_id == str(signed.id)
+    assert verbatim.is_duplicate and verbatim.duplicate_group_id == original.id
+    assert signed.is_duplicate and signed.duplicate_group_id == original.id
+    assert verbatim.originality_score == 0
+    assert original.is_duplicate is False and original.duplicate_group_id == original.id
+    assert unrelated.is_duplicate is False
+
+
+async def test_incremental_deduplication_only_processes_new_messages(monkeypatch) -> None:
+    from app.database import AsyncSessionLocal, init_db
+    from app.jobs import collect_messages as collect_module
+    from app.models.job_state import JobState  # noqa: F401
+    from app.services.job_state import get_job_cursor
+
+    fake_store = _FakeVectorStore()
+    monkeypatch.setattr(dedup_module, "vector_store", fake_store)
+    monkeypatch.setattr(collect_module, "vector_store", fake_store)
+    await init_db()
+
+    base_time = datetime.now(timezone.utc) - timedelta(hours=1)
+    channel = Channel(id=uuid.uuid4(), telegram_id=987654321, username="incremental", title="Incremental")
+    original = _build_message(channel.id, 1, "Bridge closed after strike near Kherson.", base_time)
+
+    async with AsyncSessionLocal() as db:
+        db.add(channel)
+        db.add(original)
+        await db.commit()
+
+    assert await collect_module.run_incremental_deduplication() == 1
+    assert await collect_module.run_incremental_deduplication() == 0
+
+    repost = _build_message(
+        channel.id,
+        2,
+        "Bridge closed after strike near Kherson!",
+        base_time + timedelta(minutes=5),
+    )
+    repost.fetched_at = datetime.now(timezone.utc)
+    async with AsyncSessionLocal() as db:
+        db.add(repost)
+        await db.commit()
+
+    assert await collect_module.run_incremental_deduplication() == 1
+
+    async with AsyncSessionLocal() as db:
+        stored_original = await db.get(Message, original.id)
+        stored_repost = await db.get(Message, repost.id)
+
+    assert stored_repost.is_duplicate is True
+    assert stored_repost.duplicate_group_id == original.id
+    assert stored_original.is_duplicate is False
+    assert stored_original.duplicate_group_id == original.id
+
+    async with AsyncSessionLocal() as db:
+        cluster = await db.get(DuplicateCluster, original.id)
+    assert cluster.member_count == 2
+    assert cluster.first_channel_id == channel.id
+    assert cluster.spread_seconds == 300
+
+    # A concurrent writer commits a row stamped before the cursor
+    late = _build_message(
+        channel.id,
+        3,
+        "Bridge closed after strike near Kherson.",
+        base_time + timedelta(minutes=10),
+    )
+    late.fetched_at = repost.fetched_at - timedelta(seconds=30)
+    async with AsyncSessionLocal() as db:
+        db.add(late)
+        await db.commit()
+
+    assert await collect_module.run_incremental_deduplication() == 1
+    assert await collect_module.run_incremental_deduplication() == 0
+    async with AsyncSessionLocal() as db:
+        stored_late = await db.get(Message, late.id)
+    assert stored_late.duplicate_group_id == original.id
+
+    # While Qdrant is down a unique message is only fingerprinted and the
+    # cursor holds, so it is embedded once Qdrant is back
+    fake_store.qdrant_down = True
+    unique = _build_message(channel.id, 4, "Ferry service resumes between Odesa and Izmail.", base_time)
+    unique.fetched_at = datetime.now(timezone.utc)
+    async with AsyncSessionLocal() as db:
+        db.add(unique)
+        await db.commit()
+        cursor = await get_job_cursor(db, collect_module.DEDUP_JOB_NAME)
+
+    assert await collect_module.run_incremental_deduplication() == 1
+    assert str(unique.id) not in fake_store._items
+    async with AsyncSessionLocal() as db:
+        assert await get_job_cursor(db, collect_module.DEDUP_JOB_NAME) == cursor
+
+    fake_store.qdrant_down = False
+    assert await collect_module.run_incremental_deduplication() == 1
+    assert str(unique.id) in fake_store._items
+    assert await collect_module.run_incremental_deduplication() == 0
+
+
+def test_union_merges_clusters_into_the_earliest() -> None:
+    deduper = DeduplicationService()
+    base_time = datetime.now(timezone.utc)
+    first = _build_message(uuid.uuid4(), 1, "first", base_time)
+    first_repost = _build_message(uuid.uuid4(), 2, "first again", base_time + timedelta(minutes=1))
+    second = _build_message(uuid.uuid4(), 3, "second", base_time + timedelta(minutes=2))
+    for message in (first, first_repost):
+        message.duplicate_group_id = first.id
+    second.duplicate_group_id = second.id
+    bridge = _build_message(uuid.uuid4(), 4, "both", base_time + timedelta(minutes=3))
+
+    known = {str(msg.id): msg for msg in (first, first_repost, second)}
+    merges = deduper.union_matches(
+        [bridge],
+        {str(bridge.id): {"id": str(second.id), "score": 0.95, "related": [str(first_repost.id)]}},
+        known_messages=known,
+    )
+
+    assert merges == {second.id: first.id}
+    assert {msg.duplicate_group_id for msg in (first, first_repost, second, bridge)} == {first.id}
+    assert bridge.is_duplicate is True
+
+
+def test_union_resolves_stored_groups_and_orders_by_first_seen() -> None:
+    deduper = DeduplicationService()
+    base_time = datetime.now(timezone.utc)
+    # Canonical messages of both groups are gone; only reposts remain
+    older_group = uuid.UUID("ffffffff-0000-0000-0000-000000000000")
+    newer_group = uuid.UUID("00000000-0000-0000-0000-000000000001")
+    older_repost = _build_message(uuid.uuid4(), 1, "older", base_time)
+    older_repost.duplicate_group_id = older_group
+    newer_repost = _build_message(uuid.uuid4(), 2, "newer", base_time + timedelta(minutes=1))
+    newer_repost.duplicate_group_id = newer_group
+    bridge = _build_message(uuid.uuid4(), 3, "both", base_time + timedelta(minutes=2))
+    orphan = _build_message(uuid.uuid4(), 4, "deleted match", base_time + timedelta(minutes=3))
+
+    merges = deduper.union_matches(
+        [bridge, orphan],
+        {
+            str(bridge.id): {"id": str(newer_repost.id), "score": 0.95, "related": [str(older_repost.id)]},
+            # Matched a message that no longer exists
+            str(orphan.id): {"id": str(uuid.uuid4()), "score": 0.95, "related": []},
+        },
+        known_messages={str(msg.id): msg for msg in (older_repost, newer_repost)},
+        first_seen={older_group: int(base_time.timestamp()) - 60, newer_group: int(base_time.timestamp())},
+    )
+
+    # The earliest group wins even though its ID sorts last
+    assert merges == {newer_group: older_group}
+    assert bridge.duplicate_group_id == older_group
+    assert orphan.is_duplicate is False and orphan.duplicate_group_id is None
+
+
+def test_fingerprint_prune_evicts_expired_entries() -> None:
+    from app.services.text_fingerprint import FingerprintIndex
+
+    index = FingerprintIndex()
+    text = "Shelling reported near the northern district of Kharkiv overnight, officials said."
+    index.add("old", 100, text)
+    index.add("undated", None, "Power outages expected across the city this evening.")
+    index.add("new", 200, text.upper())
+
+    index.prune(150)
+
+    assert "old" not in index and "undated" not in index and "new" in index
+    assert index.match("repost", 300, text)["id"] == "new"
+    index.prune(250)
+    assert len(index) == 0 and index.match("repost", 300, text) is None
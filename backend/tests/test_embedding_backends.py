@@ -0,0 +1,76 @@
+import math
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.services.embeddings import OnnxBackend, SentenceTransformerBackend, create_backend
+
+MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+TEXTS = [
+    "Explosions reported near the port of Odesa overnight.",
+    "Взрывы прогремели ночью в районе порта Одессы.",
+    "Le ministère confirme la fermeture du pont.",
+    "short",
+]
+
+
+def test_create_backend_reads_prefix() -> None:
+    assert isinstance(create_backend(MODEL), SentenceTransformerBackend)
+    onnx = create_backend(f"onnx:{MODEL}")
+    assert isinstance(onnx, OnnxBackend) and onnx.onnx_file == OnnxBackend.DEFAULT_FILE
+    int8 = create_backend(f"onnx-int8:{MODEL}")
+    assert int8.model_name == MODEL and int8.onnx_file == OnnxBackend.DEFAULT_INT8_FILE
+
+
+def test_onnx_backend_mean_pools_and_normalizes_in_input_order() -> None:
+    class FakeTokenizer:
+        def encode_batch(self, texts):
+            width = max(len(text) for text in texts)
+            return [
+                SimpleNamespace(
+                    ids=[1] * len(text) + [0] * (width - len(text)),
+                    attention_mask=[1] * len(text) + [0] * (width - len(text)),
+                    type_ids=[0] * width,
+                )
+                for text in texts
+            ]
+
+    class FakeSession:
+        def run(self, outputs, feeds):
+            mask = feeds["attention_mask"]
+            # Real tokens embed as (3, 4), padding as garbage the pooling must ignore
+            tokens = np.where(mask[..., None] == 1, np.array([3.0, 4.0]), np.array([100.0, -100.0]))
+            return [tokens]
+
+    backend = OnnxBackend(MODEL, batch_size=2)
+    backend._tokenizer = FakeTokenizer()
+    backend._session = FakeSession()
+
+    vectors = backend.encode(["a much longer text", "ab", "abc"])
+
+    assert len(vectors) == 3
+    for vector in vectors:
+        assert vector == pytest.approx([0.6, 0.8])
+
+
+def _cosine(left, right) -> float:
+    dot = sum(a * b for a, b in zip(left, right))
+    return dot / (math.sqrt(sum(a * a for a in left)) * math.sqrt(sum(b * b for b in right)))
+
+
+@pytest.mark.parametrize("spec,min_similarity", [(f"onnx:{MODEL}", 0.999), (f"onnx-int8:{MODEL}", 0.97)])
+def test_onnx_matches_pytorch_embeddings(spec: str, min_similarity: float) -> None:
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("tokenizers")
+    pytest.importorskip("sentence_transformers")
+    pytest.importorskip("huggingface_hub")
+
+    try:
+        reference = SentenceTransformerBackend(MODEL).encode(TEXTS)
+        candidate = create_backend(spec).encode(TEXTS)
+    except Exception as e:
+        pytest.skip(f"Model files unavailable: {e}")
+
+    for expected, actual in zip(reference, candidate):
+        assert _cosine(expected, actual) >= min_similarity
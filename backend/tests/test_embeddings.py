@@ -0,0 +1,67 @@
+import asyncio
+
+import httpx
+
+from app.services.embeddings import DynamicBatcher, EmbeddingServiceClient, parse_service_url
+
+
+def _encode(texts: list[str]) -> list[list[float]]:
+    return [[float(len(text))] for text in texts]
+
+
+async def test_dynamic_batcher_coalesces_concurrent_requests() -> None:
+    batches = []
+
+    def encode(texts):
+        batches.append(len(texts))
+        return _encode(texts)
+
+    batcher = DynamicBatcher(encode, max_batch_size=8, max_wait_seconds=0.05)
+    try:
+        results = await asyncio.gather(*(batcher.embed(["x" * size]) for size in range(1, 11)))
+    finally:
+        await batcher.stop()
+
+    assert results == [[[float(size)]] for size in range(1, 11)]
+    assert batches == [8, 2]
+
+
+async def test_service_client_round_trip(monkeypatch) -> None:
+    from app.services import embedding_worker
+
+    monkeypatch.setattr(embedding_worker.batcher, "_encode", _encode)
+    client = EmbeddingServiceClient("http://embedding-worker")
+    client._client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=embedding_worker.app),
+        base_url="http://embedding-worker",
+    )
+    try:
+        assert await client.embed(["ab", "abcd"]) == [[2.0], [4.0]]
+    finally:
+        await client.close()
+        await embedding_worker.batcher.stop()
+
+    assert parse_service_url("unix:///tmp/embed.sock") == ("/tmp/embed.sock", "http://embedding-worker")
+    assert parse_service_url("http://127.0.0.1:8100/") == (None, "http://127.0.0.1:8100")
+
+
+async def test_dynamic_batcher_fails_only_the_bad_request() -> None:
+    def encode(texts):
+        if "bad" in texts:
+            raise ValueError("cannot encode")
+        return _encode(texts)
+
+    batcher = DynamicBatcher(encode, max_batch_size=8, max_wait_seconds=0.05)
+    try:
+        results = await asyncio.gather(
+            batcher.embed(["ok"]),
+            batcher.embed(["bad"]),
+            batcher.embed(["fine"]),
+            return_exceptions=True,
+        )
+    finally:
+        await batcher.stop()
+
+    assert results[0] == [[2.0]]
+    assert isinstance(results[1], ValueError)
+    assert results[2] == [[4.0]]
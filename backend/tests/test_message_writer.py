@@ -0,0 +1,47 @@
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import func, select
+
+from app.database import AsyncSessionLocal, init_db
+from app.models.channel import Channel
+from app.models.message import Message
+from app.services.message_writer import insert_messages
+
+
+def _rows(telegram_ids: range) -> list[dict]:
+    return [
+        {
+            "telegram_message_id": telegram_id,
+            "original_text": f"message {telegram_id}",
+            "published_at": datetime.now(timezone.utc),
+        }
+        for telegram_id in telegram_ids
+    ]
+
+
+async def test_insert_messages_skips_existing_rows() -> None:
+    await init_db()
+    channel = Channel(id=uuid.uuid4(), telegram_id=555000111, username="writer", title="Writer")
+    async with AsyncSessionLocal() as db:
+        db.add(channel)
+        await db.commit()
+
+    async with AsyncSessionLocal() as db:
+        first = await insert_messages(db, _rows(range(1, 6)), channel_id=channel.id)
+        await db.commit()
+    async with AsyncSessionLocal() as db:
+        second = await insert_messages(db, _rows(range(4, 9)), channel_id=channel.id)
+        await db.commit()
+
+    assert len(first) == 5
+    assert len(second) == 3
+
+    async with AsyncSessionLocal() as db:
+        count = await db.scalar(
+            select(func.count()).select_from(Message).where(Message.channel_id == channel.id)
+        )
+        stored = await db.get(Message, second[0])
+    assert count == 8
+    assert stored.is_duplicate is False
+    assert stored.fetched_at is not None
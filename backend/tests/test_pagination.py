@@ -0,0 +1,76 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.messages import list_messages
+from app.database import AsyncSessionLocal, init_db
+from app.models.channel import Channel
+from app.services.message_writer import insert_messages
+
+
+async def test_cursor_pagination_walks_every_message_once() -> None:
+    await init_db()
+    channel = Channel(id=uuid.uuid4(), telegram_id=555000222, username="pager", title="Pager")
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    # Pairs of messages share a timestamp so the id tie-breaker matters
+    rows = [
+        {
+            "telegram_message_id": i,
+            "original_text": f"message {i}",
+            "published_at": base + timedelta(minutes=i // 2),
+        }
+        for i in range(7)
+    ]
+    # Undated rows are left out rather than breaking the cursor
+    rows += [
+        {"telegram_message_id": i, "original_text": f"undated {i}", "published_at": None}
+        for i in range(7, 10)
+    ]
+    async with AsyncSessionLocal() as db:
+        db.add(channel)
+        await db.commit()
+        await insert_messages(db, rows, channel_id=channel.id)
+        await db.commit()
+
+    seen = []
+    cursor = None
+    async with AsyncSessionLocal() as db:
+        while True:
+            page = await list_messages(
+                channel_id=channel.id, channel_ids=None, limit=3, offset=0, cursor=cursor,
+                include_total=True, start_date=None, end_date=None, user=None, db=db,
+            )
+            assert page.total == 7
+            seen.extend(message.telegram_message_id for message in page.messages)
+            if not page.has_more:
+                assert page.next_cursor is None
+                break
+            cursor = page.next_cursor
+
+        with pytest.raises(HTTPException):
+            await list_messages(
+                channel_id=channel.id, channel_ids=None, limit=3, offset=0, cursor="not-a-cursor",
+                include_total=False, start_date=None, end_date=None, user=None, db=db,
+            )
+
+    assert sorted(seen) == list(range(7))
+    assert len(seen) == 7
+
+
+def test_planner_estimate_binds_search_text() -> None:
+    from sqlalchemy import select
+    from sqlalchemy.dialects import postgresql
+
+    from app.models.message import Message
+    from app.utils.pagination import _Explain
+
+    search = "%'; DROP TABLE messages; --%"
+    compiled = _Explain(select(Message.id).where(Message.original_text.ilike(search))).compile(
+        dialect=postgresql.dialect()
+    )
+
+    assert str(compiled).startswith("EXPLAIN (FORMAT JSON) SELECT")
+    assert "DROP" not in str(compiled)
+    assert search in compiled.params.values()
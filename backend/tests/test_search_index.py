@@ -0,0 +1,117 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import update
+
+from app.api.messages import search_messages
+from app.database import AsyncSessionLocal, init_db
+from app.models.channel import Channel
+from app.models.message import Message
+from app.services.message_writer import insert_messages
+from app.services.search_index import parse_search_query, to_fts5_query, to_tsquery_text
+
+
+def test_parse_search_query_supports_phrases_prefixes_and_exclusions() -> None:
+    parsed = parse_search_query('"power plant" strike* -drill Kyiv')
+
+    assert parsed.phrases == [["power", "plant"]]
+    assert parsed.prefixes == ["strike"]
+    assert parsed.excluded == ["drill"]
+    assert parsed.terms == ["kyiv"]
+    assert to_tsquery_text(parsed) == "'kyiv' & 'strike':* & ('power' <-> 'plant') & !'drill'"
+    assert to_fts5_query(parsed) == '"kyiv" AND "strike"* AND "power plant" NOT "drill"'
+
+
+async def _search(db, q: str, channel_id: uuid.UUID, sort: str = "relevance"):
+    page = await search_messages(
+        q=q, channel_ids=[channel_id], start_date=None, end_date=None, limit=20, offset=0,
+        cursor=None, include_total=False, sort=sort, user=None, db=db,
+    )
+    return [message.telegram_message_id for message in page.messages]
+
+
+async def test_full_text_search_ranks_and_tracks_updates() -> None:
+    await init_db()
+    channel = Channel(id=uuid.uuid4(), telegram_id=555000333, username="fts", title="FTS")
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    texts = [
+        "Drone strike reported near the power plant",
+        "Power outage after the plant was hit; power restored later",
+        "Weather update: sunny",
+        "Striking workers gather at the plant gate",
+    ]
+    rows = [
+        {"telegram_message_id": i, "original_text": text, "published_at": base + timedelta(minutes=i)}
+        for i, text in enumerate(texts)
+    ]
+    # Undated: MessageResponse can't represent it, so neither retriever may return it
+    rows.append({"telegram_message_id": 3, "original_text": "Convoy without a date", "published_at": None})
+    async with AsyncSessionLocal() as db:
+        db.add(channel)
+        await db.commit()
+        await insert_messages(db, rows, channel_id=channel.id)
+        await db.commit()
+
+    async with AsyncSessionLocal() as db:
+        assert await _search(db, '"power plant"', channel.id) == [0]
+        assert sorted(await _search(db, "strik*", channel.id)) == [0, 3]
+        assert await _search(db, "plant -drone", channel.id, sort="date") == [3, 1]
+        # The message mentioning "power" twice ranks first
+        assert (await _search(db, "power", channel.id))[0] == 1
+
+        await db.execute(
+            update(Message)
+            .where(Message.channel_id == channel.id, Message.telegram_message_id == 2)
+            .values(translated_text="Météo ensoleillée")
+        )
+        await db.commit()
+        assert await _search(db, "meteo", channel.id) == [2]
+
+
+async def test_hybrid_search_fuses_lexical_and_semantic_rankings(monkeypatch) -> None:
+    from sqlalchemy import select
+
+    import app.services.hybrid_search as hybrid
+    from app.api.messages import search_messages_hybrid
+
+    await init_db()
+    channel = Channel(id=uuid.uuid4(), telegram_id=555000444, username="hybrid", title="Hybrid")
+    base = datetime(2024, 2, 1, tzinfo=timezone.utc)
+    texts = ["Convoy spotted on the highway", "Armored column moving north", "Convoy column at dawn"]
+    rows = [
+        {"telegram_message_id": i, "original_text": text, "published_at": base + timedelta(minutes=i)}
+        for i, text in enumerate(texts)
+    ]
+    # Undated: MessageResponse can't represent it, so neither retriever may return it
+    rows.append({"telegram_message_id": 3, "original_text": "Convoy without a date", "published_at": None})
+    async with AsyncSessionLocal() as db:
+        db.add(channel)
+        await db.commit()
+        await insert_messages(db, rows, channel_id=channel.id)
+        await db.commit()
+        result = await db.execute(
+            select(Message.telegram_message_id, Message.id).where(Message.channel_id == channel.id)
+        )
+        ids = {telegram_id: str(message_id) for telegram_id, message_id in result.all()}
+
+    class FakeVectorStore:
+        async def ensure_ready(self):
+            return True
+
+        async def query_similar(self, text, top_k=5, filter=None):
+            return [{"id": ids[1], "score": 0.9}, {"id": ids[2], "score": 0.8}, {"id": ids[3], "score": 0.7}]
+
+    monkeypatch.setattr(hybrid, "vector_store", FakeVectorStore())
+
+    async with AsyncSessionLocal() as db:
+        page = await search_messages_hybrid(
+            q="convoy", channel_ids=[channel.id], start_date=None, end_date=None,
+            top_k=10, user=None, db=db,
+        )
+
+    ranked = [message.telegram_message_id for message in page.messages]
+    # Message 2 is found by both retrievers, so fusion ranks it first
+    assert ranked[0] == 2
+    assert sorted(ranked) == [0, 1, 2]
+    assert page.messages[0].similarity_score == 0.8
+    assert hybrid.reciprocal_rank_fusion([["a", "b"], ["b"]], k=60)[0][0] == "b"
@@ -0,0 +1,42 @@
+from types import SimpleNamespace
+
+from telethon.errors import ChannelPrivateError
+from telethon.tl.types import InputPeerChannel
+
+from app.services.entity_cache import entity_cache
+from app.services.telegram_collector import TelegramCollector
+
+
+class _FakeClient:
+    def __init__(self) -> None:
+        self.resolved = 0
+        self.peers = []
+
+    async def get_entity(self, username):
+        self.resolved += 1
+        return SimpleNamespace(id=42, access_hash=2)
+
+    async def iter_messages(self, peer, **kwargs):
+        self.peers.append(peer)
+        if peer.access_hash == 1:
+            raise ChannelPrivateError(request=None)
+        yield SimpleNamespace(id=7, text="hello", date=None, media=None)
+
+
+async def test_stale_cached_entity_is_resolved_again() -> None:
+    client = _FakeClient()
+    await entity_cache.remember("@Rename_Me", SimpleNamespace(id=42, access_hash=1), persist=False)
+    assert entity_cache.get_input_peer("rename_me") == InputPeerChannel(channel_id=42, access_hash=1)
+
+    try:
+        messages = [
+            message
+            async for message in TelegramCollector()._iter_channel_messages(client, "rename_me", limit=1)
+        ]
+
+        assert [message.id for message in messages] == [7]
+        assert client.resolved == 1
+        assert [peer.access_hash for peer in client.peers] == [1, 2]
+        assert entity_cache.get_input_peer("rename_me").access_hash == 2
+    finally:
+        entity_cache.forget("rename_me")
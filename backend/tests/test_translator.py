@@ -0,0 +1,101 @@
+import asyncio
+
+from app.services.llm_translator import LLMTranslator
+
+
+def _build_translator(monkeypatch) -> tuple[LLMTranslator, dict]:
+    translator = LLMTranslator()
+    calls = {"packs": [], "singles": []}
+
+    monkeypatch.setattr(
+        translator,
+        "detect_languages",
+        lambda texts, prior=None: ["ru" if text.startswith("ru:") else "en" for text in texts],
+    )
+
+    async def fake_pack(items, target_lang):
+        calls["packs"].append([text for text, _ in items])
+        await asyncio.sleep(0.01)
+        return [f"[{target_lang}] {text}" for text, _ in items]
+
+    async def fake_single(text, source_lang, target_lang):
+        calls["singles"].append(text)
+        await asyncio.sleep(0.01)
+        return f"[{target_lang}] {text}"
+
+    monkeypatch.setattr(translator, "_translate_pack_with_llm", fake_pack)
+    monkeypatch.setattr(translator, "_translate_uncached", fake_single)
+    return translator, calls
+
+
+async def test_translate_many_packs_and_dedupes(monkeypatch) -> None:
+    translator, calls = _build_translator(monkeypatch)
+
+    texts = ["ru: first", "already english", "ru: second", "ru: first", ""]
+    results = await translator.translate_many(texts, target_lang="en")
+
+    assert results == [
+        ("[en] ru: first", "ru"),
+        ("already english", "en"),
+        ("[en] ru: second", "ru"),
+        ("[en] ru: first", "ru"),
+        ("", "unknown"),
+    ]
+    assert calls["packs"] == [["ru: first", "ru: second"]]
+    assert calls["singles"] == []
+
+
+async def test_concurrent_identical_texts_are_translated_once(monkeypatch) -> None:
+    translator, calls = _build_translator(monkeypatch)
+
+    results = await asyncio.gather(
+        translator.translate("ru: breaking news", target_lang="en"),
+        translator.translate("ru: breaking news", target_lang="en"),
+        translator.translate_many(["ru: breaking news"], target_lang="en"),
+    )
+
+    assert results[0] == ("[en] ru: breaking news", "ru")
+    assert results[1] == ("[en] ru: breaking news", "ru")
+    assert results[2] == [("[en] ru: breaking news", "ru")]
+    assert calls["singles"] == ["ru: breaking news"]
+    assert calls["packs"] == []
+
+
+def test_fast_language_detection_uses_script_stopwords_and_prior() -> None:
+    translator = LLMTranslator()
+
+    assert translator.detect_language("Взрывы прозвучали в центре города этой ночью") == "ru"
+    assert translator.detect_language("Вибухи пролунали в центрі міста цієї ночі") == "uk"
+    assert translator.detect_language("The army said that the bridge was hit in the night") == "en"
+    assert translator.detect_language("Explosions heard in Kharkiv", prior="en") == "en"
+    assert translator.detect_language("Ситуация остаётся напряжённой", prior="uk") == "ru"
+    assert translator.detect_language("Бъдещето на страната е в ръцете на хората", prior="bg") == "bg"
+    assert translator.detection_stats["fallback"] == 0
+
+
+def test_prior_is_not_evidence_on_its_own() -> None:
+    from app.services import language_id
+
+    # No stopword hits: leave it to the statistical fallback rather than the prior
+    assert language_id.detect("Hola amigos, buenas noticias hoy desde Madrid", prior="en") is None
+    assert language_id.detect("Бъдещето на страната е в ръцете на хората") is None
+
+
+async def test_cancelled_batch_releases_in_flight_texts(monkeypatch) -> None:
+    translator, _ = _build_translator(monkeypatch)
+    started = asyncio.Event()
+
+    async def hanging_pack(items, target_lang):
+        started.set()
+        await asyncio.sleep(3600)
+
+    monkeypatch.setattr(translator, "_translate_pack_with_llm", hanging_pack)
+
+    batch = asyncio.create_task(translator.translate_many(["ru: one", "ru: two"], target_lang="en"))
+    await started.wait()
+    batch.cancel()
+    await asyncio.gather(batch, return_exceptions=True)
+
+    assert translator._inflight == {}
+    result = await asyncio.wait_for(translator.translate("ru: one", target_lang="en"), timeout=1)
+    assert result == ("[en] ru: one", "ru")
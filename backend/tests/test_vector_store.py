@@ -0,0 +1,173 @@
+import asyncio
+import time
+
+from app.services import local_vector_index
+from app.services.local_vector_index import LocalVectorIndex
+from app.services.vector_store import VectorStore
+import app.services.vector_store as vector_store_module
+
+
+class _Embeddings(list):
+    def tolist(self) -> list:
+        return list(self)
+
+
+class _SlowEmbedder:
+    def encode(self, texts, batch_size=32, normalize_embeddings=True):
+        time.sleep(0.2)  # Blocking, like real model inference
+        return _Embeddings([[float(len(text))] for text in texts])
+
+
+async def test_embedding_runs_off_the_event_loop() -> None:
+    store = VectorStore()
+    store._backend._model = _SlowEmbedder()
+    ticks = 0
+
+    async def ticker() -> None:
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticker_task = asyncio.create_task(ticker())
+    try:
+        vectors = await store.embed_texts(["abc", "de"])
+    finally:
+        ticker_task.cancel()
+        await store.close()
+
+    assert vectors == [[3.0], [2.0]]
+    # The loop kept serving other coroutines while the model was busy
+    assert ticks >= 5
+
+
+async def test_query_embeddings_are_cached() -> None:
+    store = VectorStore()
+    embedder = _SlowEmbedder()
+    calls = []
+    original_encode = embedder.encode
+
+    def counting_encode(texts, **kwargs):
+        calls.append(list(texts))
+        return original_encode(texts, **kwargs)
+
+    embedder.encode = counting_encode
+    store._backend._model = embedder
+    try:
+        first = await store.embed_query("drone strike")
+        second = await store.embed_query("drone strike")
+    finally:
+        await store.close()
+
+    assert first == second
+    assert calls == [["drone strike"]]
+    assert store.query_cache.stats()["hits"] == 1
+
+
+def test_local_index_filters_and_persists(tmp_path) -> None:
+    day = 86400
+    index = LocalVectorIndex(str(tmp_path), dimension=2)
+    index.upsert(
+        [
+            ("a", [1.0, 0.0], {"channel_id": 1, "published_at_ts": 10 * day}),
+            ("b", [0.9, 0.1], {"channel_id": 2, "published_at_ts": 11 * day}),
+            ("c", [0.0, 1.0], {"channel_id": 1, "published_at_ts": 12 * day}),
+            ("d", [1.0, 0.1], {"channel_id": 1}),
+        ]
+    )
+    # Re-upserting with a new date moves the point between partitions
+    index.upsert([("a", [1.0, 0.0], {"channel_id": 1, "published_at_ts": 12 * day + 5})])
+
+    reopened = LocalVectorIndex(str(tmp_path), dimension=2)
+    assert len(reopened) == 4
+
+    [top] = reopened.search_batch([[1.0, 0.0]], top_k=2)
+    assert [match["id"] for match in top] == ["a", "d"]
+    assert abs(top[0]["score"] - 1.0) < 1e-6
+
+    [recent] = reopened.search_batch(
+        [[1.0, 0.0]],
+        top_k=5,
+        filters=[{"published_at_ts": {"$gte": 11 * day}, "channel_id": {"$in": [1]}}],
+        exclude_ids=["a"],
+    )
+    assert [match["id"] for match in recent] == ["c"]
+
+
+def test_local_index_appends_and_compacts(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(local_vector_index, "_COMPACT_MIN_ROWS", 3)
+    index = LocalVectorIndex(str(tmp_path), dimension=2)
+    partition_path = tmp_path / local_vector_index.UNDATED
+
+    index.upsert([("a", [1.0, 0.0], {}), ("b", [0.0, 1.0], {})])
+    log_size = (partition_path / "log.f32").stat().st_size
+    # Replacing a point appends to the log and leaves a dead row behind
+    index.upsert([("a", [0.0, 1.0], {"version": 2})])
+    assert (partition_path / "log.f32").stat().st_size > log_size
+    assert not (partition_path / "CURRENT").exists()
+
+    reopened = LocalVectorIndex(str(tmp_path), dimension=2)
+    assert len(reopened) == 2
+    assert reopened.retrieve(["a"]) == {"a": [0.0, 1.0]}
+    [top] = reopened.search_batch([[0.0, 1.0]], top_k=5)
+    assert sorted(match["id"] for match in top) == ["a", "b"]
+
+    # Enough logged rows fold the log into the base matrix
+    reopened.upsert([(f"p{i}", [1.0, float(i)], {}) for i in range(4)])
+    generation = (partition_path / "CURRENT").read_text()
+    assert (partition_path / generation / "vectors.npy").exists()
+    assert not (partition_path / "log.jsonl").exists()
+    # A base left behind by an interrupted compaction is ignored and removed
+    (partition_path / "base-999999").mkdir()
+    assert len(LocalVectorIndex(str(tmp_path), dimension=2)) == 6
+    assert sorted(path.name for path in partition_path.iterdir()) == ["CURRENT", generation]
+
+
+async def test_store_falls_back_to_local_index(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(vector_store_module.settings, "local_vector_index_path", str(tmp_path))
+    store = VectorStore()
+    store.url = ""
+    store.dimension = 1
+    store._backend._model = _SlowEmbedder()
+    try:
+        # Initialized on first use, without an explicit initialize() call
+        assert await store.ensure_ready()
+        ids = await store.upsert_texts(
+            [{"id": "p1", "text": "abc", "metadata": {"channel_id": 7}}]
+        )
+        assert await store.retrieve_vectors(ids) == {"p1": [1.0]}
+        matches = await store.query_similar("xyz", top_k=1, filter={"channel_id": {"$eq": 7}})
+        assert [match["id"] for match in matches] == ["p1"]
+        assert await store.query_by_id("p1") == []
+        assert await store.query_by_id("missing") is None
+    finally:
+        await store.close()
+
+
+class _DownQdrant:
+    async def upsert(self, **kwargs):
+        raise ConnectionError("qdrant is down")
+
+    async def query_batch_points(self, **kwargs):
+        raise ConnectionError("qdrant is down")
+
+    async def close(self):
+        pass
+
+
+async def test_store_falls_back_when_qdrant_fails_at_runtime(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(vector_store_module.settings, "local_vector_index_path", str(tmp_path))
+    store = VectorStore()
+    store.url = "http://qdrant:6333"
+    store.collection_name = "messages"
+    store.dimension = 1
+    store._client = _DownQdrant()
+    store._ready = True
+    try:
+        ids = await store.upsert_vectors([{"id": "p1", "vector": [1.0], "metadata": {}}])
+        # Held only by the fallback index, so no embedding ID is recorded
+        assert ids == [None]
+        [matches] = await store.query_similar_batch([[1.0]], top_k=1)
+        assert [match["id"] for match in matches] == ["p1"]
+    finally:
+        await store.close()
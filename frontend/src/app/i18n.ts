@@ -116,6 +116,7 @@ const resources = {
         subtitle: 'Search within signals',
         placeholder: 'Search a topic, an entity, a channel...',
         launch: 'Search',
+        hybrid: 'Best match',
         semantic: 'Semantic',
         keyword: 'Keyword',
         entities: 'Entities',
@@ -408,6 +409,7 @@ const resources = {
         subtitle: 'Rechercher dans les signaux',
         placeholder: 'Rechercher un sujet, une entite, un canal...',
         launch: 'Lancer',
+        hybrid: 'Meilleurs resultats',
         semantic: 'Semantique',
         keyword: 'Mot-cle',
         entities: 'Entites',
@@ -37,21 +37,18 @@ export function CollectionDetailPage() {
 
   const messagesQuery = useInfiniteQuery({
     queryKey: ['collection-messages', id],
-    initialPageParam: 0,
+    initialPageParam: undefined as string | undefined,
     queryFn: async ({ pageParam }) => {
       const channelIds = collectionQuery.data?.channel_ids ?? []
       return (
         await messagesApi.list({
           limit: 20,
-          offset: pageParam,
+          cursor: pageParam,
           channel_ids: channelIds.length ? channelIds : undefined,
         })
       ).data
     },
-    getNextPageParam: (lastPage) => {
-      const nextOffset = lastPage.page * lastPage.page_size
-      return nextOffset < lastPage.total ? nextOffset : undefined
-    },
+    getNextPageParam: (lastPage) => lastPage.next_cursor ?? undefined,
     enabled: Boolean(collectionQuery.data?.channel_ids?.length),
   })
 
@@ -39,21 +39,18 @@ export function FeedPage() {
 
   const messagesQuery = useInfiniteQuery({
     queryKey: ['messages', activeChannelIds, dateRange],
-    initialPageParam: 0,
+    initialPageParam: undefined as string | undefined,
     queryFn: async ({ pageParam }) => {
       return (
         await messagesApi.list({
           limit: 20,
-          offset: pageParam,
+          cursor: pageParam,
           channel_ids: activeChannelIds.length ? activeChannelIds : undefined,
           start_date: subDays(new Date(), rangeDays).toISOString(),
         })
       ).data
     },
-    getNextPageParam: (lastPage) => {
-      const nextOffset = lastPage.page * lastPage.page_size
-      return nextOffset < lastPage.total ? nextOffset : undefined
-    },
+    getNextPageParam: (lastPage) => lastPage.next_cursor ?? undefined,
   })
 
   const messages = useMemo(
@@ -11,7 +11,7 @@ import { collectionsApi, messagesApi } from '@/lib/api/client'
 
 export function SearchPage() {
   const [query, setQuery] = useState('')
-  const [activeTab, setActiveTab] = useState('semantic')
+  const [activeTab, setActiveTab] = useState('hybrid')
   const [collectionIds, setCollectionIds] = useState<string[]>([])
   const { t } = useTranslation()
 
@@ -29,6 +29,19 @@ export function SearchPage() {
     return ids.length ? Array.from(new Set(ids)) : undefined
   }, [collectionsQuery.data, collectionIds])
 
+  const hybridQuery = useQuery({
+    queryKey: ['search', 'hybrid', query, searchChannelIds],
+    queryFn: async () =>
+      (
+        await messagesApi.searchHybrid({
+          q: query,
+          top_k: 20,
+          channel_ids: searchChannelIds,
+        })
+      ).data,
+    enabled: query.length > 2 && activeTab === 'hybrid',
+  })
+
   const semanticQuery = useQuery({
     queryKey: ['search', 'semantic', query, searchChannelIds],
     queryFn: async () =>
@@ -39,7 +52,7 @@ export function SearchPage() {
           channel_ids: searchChannelIds,
         })
       ).data,
-    enabled: query.length > 2,
+    enabled: query.length > 2 && activeTab === 'semantic',
   })
 
   const keywordQuery = useQuery({
@@ -53,7 +66,7 @@ export function SearchPage() {
           channel_ids: searchChannelIds,
         })
       ).data,
-    enabled: query.length > 2,
+    enabled: query.length > 2 && (activeTab === 'keyword' || activeTab === 'entities'),
   })
 
   const entityResults = useMemo(() => {
@@ -118,10 +131,25 @@ export function SearchPage() {
 
       <Tabs value={activeTab} onValueChange={setActiveTab}>
         <TabsList>
+          <TabsTrigger value="hybrid">{t('search.hybrid')}</TabsTrigger>
           <TabsTrigger value="semantic">{t('search.semantic')}</TabsTrigger>
           <TabsTrigger value="keyword">{t('search.keyword')}</TabsTrigger>
           <TabsTrigger value="entities">{t('search.entities')}</TabsTrigger>
         </TabsList>
+        <TabsContent value="hybrid">
+          {query.length < 3 ? (
+            <Card>
+              <CardContent className="py-10 text-sm text-foreground/60">
+                {t('search.minChars')}
+              </CardContent>
+            </Card>
+          ) : (
+            <MessageFeed
+              messages={hybridQuery.data?.messages ?? []}
+              isLoading={hybridQuery.isLoading}
+            />
+          )}
+        </TabsContent>
         <TabsContent value="semantic">
           {query.length < 3 ? (
             <Card>
@@ -132,6 +132,9 @@ export interface MessageListResponse {
   total: number
   page: number
   page_size: number
+  total_is_exact?: boolean
+  next_cursor?: string | null
+  has_more?: boolean
 }
 
 export interface Summary {
@@ -253,6 +256,8 @@ export const messagesApi = {
     channel_ids?: string[]
     limit?: number
     offset?: number
+    cursor?: string
+    include_total?: boolean
     start_date?: string
     end_date?: string
   }) =>
@@ -281,6 +286,16 @@ export const messagesApi = {
     api.get<MessageListResponse>('/api/messages/search/semantic', {
       params: buildParams(params),
     }),
+  searchHybrid: (params: {
+    q: string
+    channel_ids?: string[]
+    top_k?: number
+    start_date?: string
+    end_date?: string
+  }) =>
+    api.get<MessageListResponse>('/api/messages/search/hybrid', {
+      params: buildParams(params),
+    }),
   similar: (id: string, params?: { top_k?: number }) =>
     api.get<MessageListResponse>(`/api/messages/${id}/similar`, { params }),
   fetchHistorical: (channelId: string, days: number = 7) =>